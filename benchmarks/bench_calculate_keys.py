@@ -0,0 +1,44 @@
+"""Compara ``Transformer.calculate_keys`` con la implementación basada en
+``strftime`` sobre un año de datos por minuto.
+
+Uso::
+
+    python -m benchmarks.bench_calculate_keys
+"""
+import timeit
+
+import pandas as pd
+
+from etl.transformer import Transformer
+
+
+def calculate_keys_strftime(df: pd.DataFrame, datetime_col='DateTime') -> pd.DataFrame:
+    """Implementación original, usada como referencia."""
+    df = df.copy()
+    dt = df[datetime_col]
+    df["key"] = dt.dt.strftime('%d_%m_%Y') + "_" + dt.dt.hour.astype(str).str.zfill(2)
+    df["key_m"] = dt.dt.strftime('%d_%m_%Y') + "_" + dt.dt.hour.astype(str).str.zfill(2) + "_" + dt.dt.minute.astype(str).str.zfill(2)
+    df["key_month"] = dt.dt.strftime('%m_%Y')
+    return df
+
+
+def main(repeat: int = 3) -> None:
+    df = pd.DataFrame({'DateTime': pd.date_range('2024-01-01', periods=366 * 24 * 60, freq='min')})
+    pd.testing.assert_frame_equal(calculate_keys_strftime(df), Transformer.calculate_keys(df))
+
+    cases = {
+        'strftime': lambda: calculate_keys_strftime(df),
+        "key_format='str'": lambda: Transformer.calculate_keys(df),
+        "key_format='category'": lambda: Transformer.calculate_keys(df, key_format='category'),
+        "key_format='int'": lambda: Transformer.calculate_keys(df, key_format='int'),
+    }
+    baseline = None
+    print(f"{len(df):,} filas")
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        baseline = baseline or seconds
+        print(f"{name:<24} {seconds:8.3f} s  x{baseline / seconds:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Tamaños de datos y presupuestos de throughput y memoria de la suite."""
+import tracemalloc
+
+# Días de datos por minuto de cada tamaño
+SIZES = {"1d": 1, "1y": 365, "5y": 1826}
+
+# Throughput mínimo (filas de entrada por segundo, mejor ronda)
+MIN_ROWS_PER_SECOND = {
+    "load_csv": 20_000,
+    "load_xlsx": 1_000,
+    "standardize_datetime": 100_000,
+    "calculate_keys": 100_000,
+    "merge_energy_meteo": 100_000,
+    "clean": 50_000,
+    "melt_energy": 20_000,
+    "pipeline": 1_000,
+}
+
+# Memoria pico máxima (bytes asignados por fila de entrada)
+MAX_PEAK_BYTES_PER_ROW = {
+    "load_csv": 1_000,
+    "load_xlsx": 20_000,
+    "standardize_datetime": 1_000,
+    "calculate_keys": 1_000,
+    "merge_energy_meteo": 2_000,
+    "clean": 1_500,
+    "melt_energy": 4_000,
+    "pipeline": 20_000,
+}
+
+
+def peak_bytes(func, *args, **kwargs) -> int:
+    """Memoria pico asignada (``tracemalloc``) durante una llamada."""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
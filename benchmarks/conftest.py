@@ -0,0 +1,96 @@
+"""Fixtures y presupuestos de la suite de rendimiento (pytest-benchmark).
+
+La suite no se ejecuta con ``pytest`` a secas (``testpaths = tests``); se
+lanza explícitamente::
+
+    pytest benchmarks                                   # 1 día
+    ETL_BENCH_SIZES=1d,1y,5y pytest benchmarks          # 1 día, 1 año y 5 años
+
+Cada prueba registra en ``extra_info`` las filas por segundo y la memoria
+pico (``tracemalloc``) y falla si queda por debajo de ``MIN_ROWS_PER_SECOND``
+o por encima de ``MAX_PEAK_BYTES_PER_ROW`` (``benchmarks/budgets.py``).
+Para detectar regresiones de tiempo respecto a una ejecución anterior se
+usan las opciones propias de pytest-benchmark (``--benchmark-autosave`` y
+``--benchmark-compare --benchmark-compare-fail=min:20%``).
+"""
+import os
+
+import pytest
+
+from benchmarks.budgets import MAX_PEAK_BYTES_PER_ROW, MIN_ROWS_PER_SECOND, SIZES
+from benchmarks.synthetic import generate_sources
+from etl.cleaner import DataCleaner
+from etl.mappings import rename_dicts
+from etl.sources.file_source import FileSource
+from etl.transformer import Transformer
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        sizes = os.getenv("ETL_BENCH_SIZES", "1d").split(",")
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise ValueError(f"ETL_BENCH_SIZES contiene tamaños desconocidos: {sorted(unknown)}")
+        metafunc.parametrize("size", sizes)
+
+
+@pytest.fixture(scope="session")
+def synthetic(tmp_path_factory):
+    """Genera (una vez por sesión) las entradas de cada tamaño y formato."""
+    cache = {}
+
+    def get(size: str, fmt: str = "csv") -> dict[str, str]:
+        if (size, fmt) not in cache:
+            out_dir = tmp_path_factory.mktemp(f"synthetic-{size}-{fmt}")
+            cache[size, fmt] = generate_sources(str(out_dir), days=SIZES[size], fmt=fmt)
+        return cache[size, fmt]
+    return get
+
+
+@pytest.fixture(scope="session")
+def frames(synthetic):
+    """Resultados intermedios del pipeline (por tamaño) que usan las etapas."""
+    cache = {}
+    transformer = Transformer()
+
+    def get(size: str) -> dict:
+        if size not in cache:
+            paths = synthetic(size)
+            data = {}
+            for name in ("energia", "meteo"):
+                raw = FileSource().load_excel(paths[name])
+                df = Transformer.standardize_datetime(raw, 'Date', 'Time', 'DateTime', source=name)
+                df = df.rename(columns=rename_dicts[name])
+                data[f"{name}_raw"] = raw
+                data[name] = transformer.generate_keys({name: df})[name]
+            data["energia"] = transformer.convert_units(data["energia"])
+            data["merged"] = transformer.merge_energy_meteo(data["energia"], data["meteo"])
+            data["clean"] = DataCleaner.clean(
+                data["merged"], category_col="key_month",
+                negative_columns=[c for c in data["merged"].columns if "Imp" in c or "Exp" in c],
+                outlier_columns=[c for c in data["merged"].columns if c.endswith("_Act_MWh")],
+                inplace=False,
+            )
+            cache[size] = data
+        return cache[size]
+    return get
+
+
+@pytest.fixture
+def check_budget(benchmark):
+    """Registra throughput y memoria pico y los compara con los presupuestos."""
+
+    def check(name: str, rows: int, peak: int) -> None:
+        rows_per_second = rows / benchmark.stats.stats.min
+        benchmark.extra_info.update({
+            "rows": rows,
+            "rows_per_second": round(rows_per_second),
+            "peak_mb": round(peak / 1024 ** 2, 1),
+        })
+        assert rows_per_second >= MIN_ROWS_PER_SECOND[name], (
+            f"{name}: {rows_per_second:,.0f} filas/s < {MIN_ROWS_PER_SECOND[name]:,} filas/s"
+        )
+        assert peak <= MAX_PEAK_BYTES_PER_ROW[name] * rows, (
+            f"{name}: {peak / rows:,.0f} bytes/fila > {MAX_PEAK_BYTES_PER_ROW[name]:,} bytes/fila"
+        )
+    return check
@@ -0,0 +1,205 @@
+"""Generador de datos SCADA sintéticos para pruebas de rendimiento.
+
+Produce archivos ``Energia``, ``Meteo``, ``CMS`` y ``UPn_pvsyst`` con los
+mismos nombres de columna que ``etl/mappings.py`` y los formatos de fecha de
+las exportaciones reales, con un número configurable de plantas, días,
+intervalo de muestreo y proporción de nulos y outliers.
+
+Uso::
+
+    python -m benchmarks.synthetic salida/ --days 365 --plants 4 --format csv
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from etl.mappings import ENERGY_COLUMNS_RENAME, METEO_COLUMNS_RENAME, PVSYST_COLUMNS_RENAME
+
+# Límite de filas de una hoja de Excel
+XLSX_MAX_ROWS = 1_048_576
+
+# Plantas del mapeo con sensores meteorológicos
+_METEO_PLANTS = sorted({int(m) for m in re.findall(r'UP(\d+)_', " ".join(METEO_COLUMNS_RENAME.values()))})
+
+
+def _plant_columns(mapping: dict[str, str], plant: int) -> list[str]:
+    """
+    Columnas originales de ``plant``. Las plantas que no están en el mapeo
+    reutilizan las columnas de UP1 cambiando el número de planta.
+    """
+    columns = [src for src, dst in mapping.items() if dst.startswith(f"UP{plant}_")]
+    if columns:
+        return columns
+    template = [src for src, dst in mapping.items() if dst.startswith("UP1_")]
+    return [src.replace("Panamá 1", f"Panamá {plant}").replace("UP1", f"UP{plant}") for src in template]
+
+
+def energy_columns(plants: int) -> list[str]:
+    """Columnas de medidores de ``Energia`` para las plantas ``1..plants``."""
+    return [col for plant in range(1, plants + 1) for col in _plant_columns(ENERGY_COLUMNS_RENAME, plant)]
+
+
+def meteo_columns(plants: int) -> list[str]:
+    """Columnas de ``Meteo`` de las plantas con estación meteorológica."""
+    return [col for plant in _METEO_PLANTS if plant <= plants
+            for col in _plant_columns(METEO_COLUMNS_RENAME, plant)]
+
+
+def _date_time_columns(index: pd.DatetimeIndex) -> dict[str, pd.Series]:
+    # Mismo formato que las exportaciones SCADA: "1/1/2025" y "12:05 AM"
+    dates = pd.Series(index.month.astype(str) + "/" + index.day.astype(str) + "/" + index.year.astype(str))
+    times = pd.Series(index.strftime("%I:%M %p"))
+    return {"Date": dates, "Time": times}
+
+
+def _solar_profile(index: pd.DatetimeIndex, rng: np.random.Generator) -> np.ndarray:
+    """Irradiancia (W/m²) con forma de campana entre las 6 y las 18 h y nubosidad aleatoria."""
+    hours = (index.hour + index.minute / 60).to_numpy()
+    clear_sky = np.clip(np.sin(np.pi * (hours - 6) / 12), 0, None) * 1000
+    clouds = rng.uniform(0.6, 1.0, len(index))
+    return clear_sky * clouds
+
+
+def _corrupt(df: pd.DataFrame, columns: list[str], null_rate: float, outlier_rate: float,
+             rng: np.random.Generator) -> pd.DataFrame:
+    """Inserta nulos, outliers (x50) y lecturas negativas en ``columns``."""
+    n = len(df)
+    for col in columns:
+        values = df[col].to_numpy(dtype=float, copy=True)
+        values[rng.random(n) < outlier_rate] *= 50
+        values[rng.random(n) < outlier_rate] *= -1
+        values[rng.random(n) < null_rate] = np.nan
+        df[col] = values
+    return df
+
+
+def make_energia(index: pd.DatetimeIndex, plants: int = 4, null_rate: float = 0.01,
+                 outlier_rate: float = 0.001, seed: int = 0) -> pd.DataFrame:
+    """DataFrame ``Energia`` (kWh por intervalo) con las columnas del mapeo."""
+    rng = np.random.default_rng(seed)
+    irradiance = _solar_profile(index, rng)
+    step_hours = (index[1] - index[0]) / pd.Timedelta(hours=1) if len(index) > 1 else 1 / 60
+    data = _date_time_columns(index)
+    for plant in range(1, plants + 1):
+        capacity_kw = 1000 + 250 * plant
+        active = irradiance / 1000 * capacity_kw * step_hours * rng.uniform(0.95, 1.05, len(index))
+        for col in _plant_columns(ENERGY_COLUMNS_RENAME, plant):
+            if "EXPORTED" in col:
+                data[col] = active * 0.98
+            elif "IMPORTED" in col:
+                data[col] = np.where(active == 0, rng.uniform(0, 0.5, len(index)), 0.0)
+            elif "REACTIVE" in col:
+                data[col] = active * 0.1
+            else:
+                data[col] = active
+    df = pd.DataFrame(data)
+    return _corrupt(df, energy_columns(plants), null_rate, outlier_rate, rng)
+
+
+def make_meteo(index: pd.DatetimeIndex, plants: int = 4, null_rate: float = 0.01,
+               outlier_rate: float = 0.001, seed: int = 1) -> pd.DataFrame:
+    """DataFrame ``Meteo`` con las columnas del mapeo."""
+    rng = np.random.default_rng(seed)
+    irradiance = _solar_profile(index, rng)
+    step_hours = (index[1] - index[0]) / pd.Timedelta(hours=1) if len(index) > 1 else 1 / 60
+    data = _date_time_columns(index)
+    for col in meteo_columns(plants):
+        if "Ambient Temperature" in col:
+            data[col] = 24 + irradiance / 1000 * 8 + rng.normal(0, 0.3, len(index))
+        elif "Panel Temperature" in col:
+            data[col] = 24 + irradiance / 1000 * 30 + rng.normal(0, 0.5, len(index))
+        elif "Irradiance" in col:
+            data[col] = irradiance
+        elif "Insolation" in col:
+            data[col] = irradiance * step_hours / 1000
+        else:
+            data[col] = np.clip(80 - irradiance / 1000 * 30 + rng.normal(0, 2, len(index)), 0, 100)
+    df = pd.DataFrame(data)
+    return _corrupt(df, meteo_columns(plants), null_rate, outlier_rate, rng)
+
+
+def make_cms(start: str, days: int, seed: int = 2) -> pd.DataFrame:
+    """DataFrame ``CMS`` horario con el formato de ``CMS_Mejorado.xlsx``."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=days * 24, freq="h")
+    return pd.DataFrame({
+        "Fecha": index.normalize(),
+        "CMS": rng.uniform(40, 120, len(index)).round(3),
+        "anio": index.year,
+        "mes": index.month,
+        "mes_texto": index.month_name(),
+        "dia": index.day,
+        "hora": index.time,
+        "key": index.strftime("%d-%m-%Y_%H"),
+    })
+
+
+def make_pvsyst(start: str, days: int, plant: int = 1, seed: int = 3) -> pd.DataFrame:
+    """DataFrame mensual de PVSyst con las columnas del mapeo."""
+    rng = np.random.default_rng(seed + plant)
+    months = pd.period_range(start, pd.Timestamp(start) + pd.Timedelta(days=max(days - 1, 0)), freq="M")
+    data = {"Date": months.strftime("%Y-%m")}
+    for col in PVSYST_COLUMNS_RENAME:
+        data[col] = rng.uniform(0.5, 1.0, len(months)) if "proporción" in col else rng.uniform(1, 200, len(months))
+    return pd.DataFrame(data)
+
+
+def _write(df: pd.DataFrame, path: str, fmt: str) -> str:
+    path = f"{path}.{fmt}"
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "xlsx":
+        if len(df) >= XLSX_MAX_ROWS:
+            raise ValueError(f"{os.path.basename(path)}: {len(df)} filas superan el límite de Excel; usa 'csv'.")
+        df.to_excel(path, index=False)
+    else:
+        raise ValueError("Formato no soportado. Usa 'csv' o 'xlsx'")
+    return path
+
+
+def generate_sources(out_dir: str, days: int = 1, plants: int = 4, start: str = "2025-01-01",
+                     freq: str = "min", null_rate: float = 0.01, outlier_rate: float = 0.001,
+                     fmt: str = "csv", seed: int = 0) -> dict[str, str]:
+    """
+    Escribe en ``out_dir`` un juego completo de entradas del pipeline.
+
+    Retorna el diccionario ``file_paths`` que espera ``ETLPipeline``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    index = pd.date_range(start, pd.Timestamp(start) + pd.Timedelta(days=days), freq=freq, inclusive="left")
+    paths = {
+        "cms": _write(make_cms(start, days, seed + 2), os.path.join(out_dir, "CMS_Mejorado"), fmt),
+        "energia": _write(make_energia(index, plants, null_rate, outlier_rate, seed),
+                          os.path.join(out_dir, "Energia"), fmt),
+        "meteo": _write(make_meteo(index, plants, null_rate, outlier_rate, seed + 1),
+                        os.path.join(out_dir, "Meteo"), fmt),
+    }
+    for plant in range(1, plants + 1):
+        paths[f"up{plant}_pvsyst"] = _write(make_pvsyst(start, days, plant, seed + 3),
+                                            os.path.join(out_dir, f"UP{plant}_pvsyst"), fmt)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera entradas SCADA sintéticas para el pipeline ETL.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--plants", type=int, default=4)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--freq", default="min")
+    parser.add_argument("--null-rate", type=float, default=0.01)
+    parser.add_argument("--outlier-rate", type=float, default=0.001)
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_sources(args.out_dir, args.days, args.plants, args.start, args.freq,
+                             args.null_rate, args.outlier_rate, args.format, args.seed)
+    for name, path in paths.items():
+        print(f"📝 {name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Rendimiento de cada etapa y del pipeline completo sobre datos sintéticos."""
+import pytest
+
+from benchmarks.budgets import SIZES, peak_bytes
+from benchmarks.synthetic import XLSX_MAX_ROWS
+from etl.cleaner import DataCleaner
+from etl.pipeline import ETLPipeline
+from etl.sources.file_source import FileSource
+from etl.transformer import Transformer
+
+
+def run(benchmark, func, *args, rounds=3, **kwargs):
+    return benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=rounds, iterations=1)
+
+
+def test_load_csv(benchmark, check_budget, synthetic, size):
+    path = synthetic(size)["energia"]
+    df = run(benchmark, FileSource().load_excel, path)
+    check_budget("load_csv", len(df), peak_bytes(FileSource().load_excel, path))
+
+
+def test_load_xlsx(benchmark, check_budget, synthetic, size):
+    if SIZES[size] * 24 * 60 >= XLSX_MAX_ROWS:
+        pytest.skip("Excel no admite tantas filas")
+    path = synthetic(size, "xlsx")["energia"]
+    df = run(benchmark, FileSource().load_excel, path, rounds=1)
+    check_budget("load_xlsx", len(df), peak_bytes(FileSource().load_excel, path))
+
+
+def test_standardize_datetime(benchmark, check_budget, frames, size):
+    raw = frames(size)["energia_raw"]
+    run(benchmark, Transformer.standardize_datetime, raw, 'Date', 'Time', 'DateTime')
+    check_budget("standardize_datetime", len(raw),
+                 peak_bytes(Transformer.standardize_datetime, raw, 'Date', 'Time', 'DateTime'))
+
+
+def test_calculate_keys(benchmark, check_budget, frames, size):
+    df = frames(size)["energia"][["DateTime"]]
+    run(benchmark, Transformer.calculate_keys, df)
+    check_budget("calculate_keys", len(df), peak_bytes(Transformer.calculate_keys, df))
+
+
+def test_merge_energy_meteo(benchmark, check_budget, frames, size):
+    data = frames(size)
+    transformer = Transformer()
+    run(benchmark, transformer.merge_energy_meteo, data["energia"], data["meteo"])
+    check_budget("merge_energy_meteo", len(data["energia"]),
+                 peak_bytes(transformer.merge_energy_meteo, data["energia"], data["meteo"]))
+
+
+def test_clean(benchmark, check_budget, frames, size):
+    df = frames(size)["merged"]
+    kwargs = dict(
+        category_col="key_month",
+        negative_columns=[c for c in df.columns if "Imp" in c or "Exp" in c],
+        outlier_columns=[c for c in df.columns if c.endswith("_Act_MWh")],
+        inplace=False,
+    )
+    run(benchmark, DataCleaner.clean, df, **kwargs)
+    check_budget("clean", len(df), peak_bytes(DataCleaner.clean, df, **kwargs))
+
+
+def test_melt_energy(benchmark, check_budget, frames, size):
+    df = frames(size)["clean"]
+    transformer = Transformer()
+    run(benchmark, transformer.melt_energy, df)
+    check_budget("melt_energy", len(df), peak_bytes(transformer.melt_energy, df))
+
+
+def test_pipeline_sqlite(benchmark, check_budget, synthetic, size, tmp_path, monkeypatch):
+    paths = synthetic(size)
+    runs = iter(range(100))
+
+    def setup():
+        # Base de datos nueva en cada ronda
+        monkeypatch.setenv("DB_URL", f"sqlite:///{tmp_path / f'bench-{next(runs)}.db'}")
+        return (ETLPipeline(paths),), {}
+
+    benchmark.pedantic(ETLPipeline.run, setup=setup, rounds=1, iterations=1)
+    pipeline = setup()[0][0]
+    rows = sum(len(FileSource().load_excel(paths[name])) for name in ("energia", "meteo"))
+    check_budget("pipeline", rows, peak_bytes(pipeline.run))
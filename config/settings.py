@@ -1,21 +1,37 @@
 import os
-from dotenv import load_dotenv
 
-# Cargar variables desde el archivo .env
-load_dotenv()
+# Las variables se leen al accederlas (PEP 562), tras cargar el archivo .env
+# una sola vez, de modo que importar este módulo no importa python-dotenv.
+_SETTINGS = (
+    # Rutas a archivos Excel
+    "ENERGY_FILE",
+    "METEO_FILE",
+    "CMS_FILE",
+    "UP1_PVSYST_FILE",
+    "UP2_PVSYST_FILE",
+    "UP3_PVSYST_FILE",
+    "UP4_PVSYST_FILE",
+    # Base de datos
+    "DB_URL",
+    # API (futuro)
+    "API_URL",
+    "API_TOKEN",
+)
+_env_loaded = False
 
-# Rutas a archivos Excel
-ENERGY_FILE = os.getenv("ENERGY_FILE")
-METEO_FILE = os.getenv("METEO_FILE")
-CMS_FILE = os.getenv("CMS_FILE")
-UP1_PVSYST_FILE = os.getenv("UP1_PVSYST_FILE")
-UP2_PVSYST_FILE = os.getenv("UP2_PVSYST_FILE")
-UP3_PVSYST_FILE = os.getenv("UP3_PVSYST_FILE")
-UP4_PVSYST_FILE = os.getenv("UP4_PVSYST_FILE")
 
-# Base de datos
-DB_URL = os.getenv("DB_URL")
+def __getattr__(name: str):
+    global _env_loaded
+    if name not in _SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _env_loaded:
+        # Cargar variables desde el archivo .env
+        from dotenv import load_dotenv
 
-# API (futuro)
-API_URL = os.getenv("API_URL")
-API_TOKEN = os.getenv("API_TOKEN")
+        load_dotenv()
+        _env_loaded = True
+    return os.getenv(name)
+
+
+def __dir__():
+    return sorted([*globals(), *_SETTINGS])
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
 
 class DataCleaner:
     """
@@ -11,68 +10,118 @@ class DataCleaner:
     """
 
     @staticmethod
-    def fill_missing_values(df: pd.DataFrame, method='mean', category_col=None, threshold=0.05) -> pd.DataFrame:
+    def fill_missing_values(df: pd.DataFrame, method='mean', category_col=None, threshold=0.05,
+                            inplace: bool = False) -> pd.DataFrame:
         """
         Rellena o elimina valores nulos según el método y un umbral definido.
+
+        Las columnas numéricas se rellenan todas a la vez con un único
+        ``groupby(category_col).transform``. Con ``inplace=True`` el DataFrame
+        recibido se modifica sin copiarlo.
         """
-        df = df.copy()
+        if not inplace:
+            df = df.copy()
         null_ratio = df.isnull().mean().max()
 
         if null_ratio < threshold:
             return df.dropna()
 
-        for col in df.columns:
-            if df[col].isnull().sum() == 0:
-                continue
-
-            if pd.api.types.is_numeric_dtype(df[col]):
-                if category_col and category_col in df.columns:
-                    try:
-                        if method in ['mean', 'median']:
-                            df[col] = df.groupby(category_col)[col].transform(
-                                lambda x: x.fillna(x.mean() if method == 'mean' else x.median())
-                            )
-                        elif method in ['ffill', 'bfill']:
-                            df[col] = df.groupby(category_col)[col].transform(
-                                lambda x: x.fillna(method=method)
-                            )
-                        else:
-                            raise ValueError("Método no soportado.")
-                    except Exception:
-                        valor = df[col].mean() if method == 'mean' else df[col].median()
-                        df[col] = df[col].fillna(valor)
-                else:
-                    valor = df[col].mean() if method == 'mean' else df[col].median()
-                    df[col] = df[col].fillna(valor)
+        with_nulls = df.columns[df.isnull().any()]
+        numeric = [c for c in with_nulls if pd.api.types.is_numeric_dtype(df[c])]
+        other = [c for c in with_nulls if c not in numeric]
+
+        if numeric:
+            def global_fill():
+                return df[numeric].mean() if method == 'mean' else df[numeric].median()
+
+            if category_col and category_col in df.columns:
+                try:
+                    groups = df.groupby(category_col, observed=True)[numeric]
+                    if method in ['mean', 'median']:
+                        df[numeric] = df[numeric].fillna(groups.transform(method))
+                    elif method == 'ffill':
+                        df[numeric] = groups.ffill()
+                    elif method == 'bfill':
+                        df[numeric] = groups.bfill()
+                    else:
+                        raise ValueError("Método no soportado.")
+                except Exception:
+                    df[numeric] = df[numeric].fillna(global_fill())
             else:
-                # Categorías: usar moda
-                moda = df[col].mode().iloc[0] if not df[col].mode().empty else 'Desconocido'
-                df[col] = df[col].fillna(moda)
+                df[numeric] = df[numeric].fillna(global_fill())
+
+        for col in other:
+            # Categorías: usar moda
+            moda = df[col].mode().iloc[0] if not df[col].mode().empty else 'Desconocido'
+            df[col] = df[col].fillna(moda)
 
         return df
 
+    # Alias usado por el pipeline
+    fill_missing = fill_missing_values
+
     @staticmethod
-    def fix_negatives(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    def fix_negatives(df: pd.DataFrame, columns: list[str], inplace: bool = False) -> pd.DataFrame:
         """
         Convierte valores negativos en positivos en las columnas indicadas.
         """
-        df = df.copy()
-        for col in columns:
-            if col in df.columns:
-                df.loc[df[col] < 0, col] = df[col].abs()
+        if not inplace:
+            df = df.copy()
+        columns = [col for col in columns if col in df.columns]
+        if columns:
+            df[columns] = df[columns].abs()
         return df
 
     @staticmethod
-    def remove_outliers(df: pd.DataFrame, column: str, threshold: float = 3.0) -> pd.DataFrame:
-        """Elimina outliers usando el método del rango intercuartílico (IQR)."""
-        df = df.copy()
-        if column in df.columns and pd.api.types.is_numeric_dtype(df[column]):
-            q1 = df[column].quantile(0.25)
-            q3 = df[column].quantile(0.75)
-            iqr = q3 - q1
-            lower = q1 - threshold * iqr
-            upper = q3 + threshold * iqr
-            return df[(df[column] >= lower) & (df[column] <= upper)]
+    def remove_outliers(df: pd.DataFrame, column: str | list[str], threshold: float = 3.0,
+                        strict: bool = False) -> pd.DataFrame:
+        """Elimina outliers usando el método del rango intercuartílico (IQR).
+
+        ``column`` puede ser una lista: los límites de todas las columnas se
+        calculan en una sola pasada sobre el DataFrame recibido y se aplican
+        con un único filtro combinado. Con ``strict=True`` las columnas se
+        filtran una tras otra, recalculando los cuartiles tras cada filtro
+        (resultado idéntico a llamar al método una vez por columna).
+        """
+        columns = [column] if isinstance(column, str) else list(column)
+        columns = [c for c in columns if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+        if not columns:
+            return df.copy()
+
+        if strict and len(columns) > 1:
+            for col in columns:
+                df = DataCleaner.remove_outliers(df, col, threshold=threshold)
+            return df
+
+        values = df[columns]
+        quartiles = values.quantile([0.25, 0.75])
+        q1, q3 = quartiles.loc[0.25], quartiles.loc[0.75]
+        iqr = q3 - q1
+        lower = q1 - threshold * iqr
+        upper = q3 + threshold * iqr
+        mask = ((values >= lower) & (values <= upper)).all(axis=1)
+        return df[mask]
+
+    @staticmethod
+    def clean(df: pd.DataFrame, category_col: str | None = None, negative_columns: list[str] | None = None,
+              outlier_columns: list[str] | None = None, method: str = 'mean', threshold: float = 0.05,
+              outlier_threshold: float = 3.0, strict: bool = False, inplace: bool = False) -> pd.DataFrame:
+        """
+        Aplica en una sola pasada el relleno de nulos, la corrección de
+        negativos y el filtro de outliers.
+
+        Como ``fill_missing_values`` y ``fix_negatives``, por defecto no
+        modifica ``df``. Con ``inplace=True`` opera sobre ``df`` sin copiarlo
+        y la única copia es la del filtro final de outliers; úsese solo cuando
+        el llamador es dueño del DataFrame. ``strict=True`` reproduce el
+        filtrado secuencial columna a columna.
+        """
+        df = DataCleaner.fill_missing_values(df, method=method, category_col=category_col,
+                                             threshold=threshold, inplace=inplace)
+        if negative_columns:
+            df = DataCleaner.fix_negatives(df, negative_columns, inplace=True)
+        if outlier_columns:
+            df = DataCleaner.remove_outliers(df, outlier_columns, threshold=outlier_threshold, strict=strict)
         return df
 
 
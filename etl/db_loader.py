@@ -1,47 +1,280 @@
-from sqlalchemy import create_engine
 import pandas as pd
+import io
 import os
-from dotenv import load_dotenv
+import threading
+import time
+import uuid
+
+# SQLAlchemy y python-dotenv se importan al usarse por primera vez, de modo
+# que importar el pipeline (o construirlo sin cargar datos) no los requiere.
+
+# Motores por URL, compartidos por todos los ``DatabaseLoader`` del proceso
+# para reutilizar su pool de conexiones entre ejecuciones
+_ENGINES: dict = {}
+_ENGINES_LOCK = threading.Lock()
+_ENV_LOADED = False
+
+
+def wide_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devuelve ``df`` con los flotantes como ``float64`` y los enteros como
+    ``int64``. El primer lote fija el esquema de la tabla: con tipos reducidos
+    (``compact_dtypes``) se crearían columnas ``SMALLINT``/``REAL`` en las que
+    valores posteriores mayores desbordarían o perderían precisión.
+    """
+    wide = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_float_dtype(dtype) and dtype != "float64" and not pd.api.types.is_extension_array_dtype(dtype):
+            wide[col] = "float64"
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype) and dtype != "int64":
+            wide[col] = "int64"
+    return df.astype(wide) if wide else df
+
+
+def load_env() -> None:
+    """Carga una sola vez las variables de entorno del archivo ``.env``."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _ENV_LOADED = True
+
+
+def get_engine(url: str):
+    """Retorna el motor de ``url``, creándolo (con su pool) la primera vez."""
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(url)
+        if engine is None:
+            from sqlalchemy import create_engine
+
+            engine = _ENGINES[url] = create_engine(url, pool_pre_ping=True)
+        return engine
 
-# Cargar variables de entorno desde .env
-load_dotenv()
 
 class DatabaseLoader:
-    def __init__(self):
+    def __init__(self, url: str | None = None, batch_size: int = 50_000):
         """
         Inicializa la conexión a la base de datos usando variables de entorno.
+
+        El motor no se crea aquí sino en el primer acceso a ``engine``, y se
+        comparte con los demás loaders del proceso que usen la misma URL.
+
+        Args:
+            url (str | None): URL de conexión SQLAlchemy. Si no se indica se
+                usa ``DB_URL`` o se construye a partir de ``DB_USER``,
+                ``DB_PASSWORD``, ``DB_HOST``, ``DB_PORT``, ``DB_NAME`` y
+                ``DB_DRIVER``.
+            batch_size (int): Filas enviadas por lote en la carga masiva.
         """
-        user = os.getenv("DB_USER")
-        password = os.getenv("DB_PASSWORD")
-        host = os.getenv("DB_HOST", "localhost")
-        port = os.getenv("DB_PORT", "5432")
-        db = os.getenv("DB_NAME")
-        driver = os.getenv("DB_DRIVER", "postgresql")  # por defecto PostgreSQL
+        load_env()
+        if url is None:
+            url = os.getenv("DB_URL")
+        if url is None:
+            user = os.getenv("DB_USER")
+            password = os.getenv("DB_PASSWORD")
+            host = os.getenv("DB_HOST", "localhost")
+            port = os.getenv("DB_PORT", "5432")
+            db = os.getenv("DB_NAME")
+            driver = os.getenv("DB_DRIVER", "postgresql")  # por defecto PostgreSQL
+            url = f"{driver}://{user}:{password}@{host}:{port}/{db}"
 
-        self.engine = create_engine(f"{driver}://{user}:{password}@{host}:{port}/{db}")
-    
-    def insert_dataframe(self, df: pd.DataFrame, table_name: str, if_exists="append"):
+        self.url = url
+        self.batch_size = batch_size
+
+    @property
+    def engine(self):
+        """Motor SQLAlchemy de ``url`` (creado en el primer uso)."""
+        return get_engine(self.url)
+
+    @staticmethod
+    def _copy_postgres(conn, df: pd.DataFrame, table_name: str, batch_size: int) -> None:
+        """Envía ``df`` por lotes con ``COPY ... FROM STDIN`` (formato CSV)."""
+        columns = ", ".join(f'"{c}"' for c in df.columns)
+        sql = f"COPY \"{table_name}\" ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        cursor = conn.connection.cursor()
+        try:
+            for start in range(0, len(df), batch_size):
+                buf = io.StringIO()
+                df.iloc[start:start + batch_size].to_csv(buf, index=False, header=False, na_rep='\\N')
+                buf.seek(0)
+                if hasattr(cursor, "copy_expert"):  # psycopg2
+                    cursor.copy_expert(sql, buf)
+                else:  # psycopg 3
+                    with cursor.copy(sql) as copy:
+                        copy.write(buf.getvalue())
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _executemany(conn, df: pd.DataFrame, table_name: str, batch_size: int) -> None:
+        """Inserta ``df`` por lotes con ``executemany`` (SQLite y otros motores)."""
+        from sqlalchemy import MetaData, Table
+
+        table = Table(table_name, MetaData(), autoload_with=conn)
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size].astype(object)
+            batch = batch.where(batch.notna(), None)
+            conn.execute(table.insert(), batch.to_dict(orient="records"))
+
+    def _bulk_load(self, conn, df: pd.DataFrame, table_name: str, batch_size: int) -> None:
+        if conn.dialect.name == "postgresql":
+            self._copy_postgres(conn, df, table_name, batch_size)
+        else:
+            self._executemany(conn, df, table_name, batch_size)
+
+    def insert_dataframe(self, df: pd.DataFrame, table_name: str, if_exists="append", batch_size: int | None = None):
         """
-        Inserta un DataFrame a la base de datos.
+        Inserta un DataFrame a la base de datos mediante carga masiva.
+
+        En PostgreSQL se usa ``COPY FROM STDIN``; en el resto de motores se
+        usa ``executemany``. La carga completa se hace en una transacción.
 
         Args:
             df (pd.DataFrame): Datos a insertar
             table_name (str): Nombre de la tabla destino
             if_exists (str): "fail", "replace", o "append"
+            batch_size (int | None): Filas por lote (por defecto ``self.batch_size``)
+
+        Raises:
+            Exception: Se propaga cualquier error de la base de datos.
         """
+        batch_size = batch_size or self.batch_size
+        df = wide_dtypes(df)
+        start = time.perf_counter()
         try:
-            df.to_sql(table_name, self.engine, index=False, if_exists=if_exists, method="multi")
-            print(f"✅ Datos insertados en la tabla '{table_name}' ({len(df)} filas).")
+            with self.engine.begin() as conn:
+                # Crea (o reemplaza) la tabla con el esquema del DataFrame
+                df.head(0).to_sql(table_name, conn, index=False, if_exists=if_exists)
+                self._bulk_load(conn, df, table_name, batch_size)
         except Exception as e:
             print(f"❌ Error al insertar en la tabla '{table_name}': {e}")
+            raise
+
+        elapsed = time.perf_counter() - start
+        rate = len(df) / elapsed if elapsed > 0 else float("inf")
+        print(f"✅ Datos insertados en la tabla '{table_name}' ({len(df)} filas, {rate:,.0f} filas/s).")
+
+    @staticmethod
+    def _create_staging(conn, table_name: str, staging: str, columns: list[str]) -> None:
+        """Crea ``staging`` como tabla temporal con los tipos de ``columns`` en ``table_name``."""
+        from sqlalchemy import Column, MetaData, Table
+
+        target = Table(table_name, MetaData(), autoload_with=conn)
+        Table(staging, MetaData(), *(Column(c.name, c.type) for c in target.columns if c.name in columns),
+              prefixes=["TEMPORARY"]).create(conn)
+
+    @staticmethod
+    def _ensure_unique_index(conn, table_name: str, keys: list[str]) -> None:
+        """
+        Crea el índice único ``ux_<tabla>`` sobre ``keys`` si no existe. Antes
+        comprueba que la tabla no tenga claves duplicadas, para fallar con un
+        mensaje claro en lugar del error del motor.
+        """
+        from sqlalchemy import inspect, text
+
+        index = f"ux_{table_name}"
+        if any(ix["name"] == index for ix in inspect(conn).get_indexes(table_name)):
+            return
+        key_list = ", ".join(f'"{k}"' for k in keys)
+        duplicate = conn.execute(text(
+            f'SELECT {key_list} FROM "{table_name}" GROUP BY {key_list} HAVING COUNT(*) > 1 LIMIT 1'
+        )).first()
+        if duplicate is not None:
+            raise ValueError(
+                f"La tabla '{table_name}' tiene claves duplicadas (p. ej. {dict(zip(keys, duplicate))}), "
+                f"probablemente de cargas en modo 'append'. Elimine los duplicados o recargue la tabla "
+                f"antes de usar upsert."
+            )
+        conn.execute(text(f'CREATE UNIQUE INDEX "{index}" ON "{table_name}" ({key_list})'))
+
+    def upsert_dataframe(self, df: pd.DataFrame, table_name: str, keys: list[str], batch_size: int | None = None):
+        """
+        Inserta o actualiza un DataFrame según sus claves naturales.
+
+        Los datos se cargan masivamente en una tabla de staging temporal
+        (``CREATE TEMP TABLE``, visible solo en esta conexión y con nombre
+        único, de modo que dos upserts concurrentes no se pisan) y luego se
+        aplica un único ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` sobre
+        la tabla destino, cuyo índice único sobre ``keys`` se crea si no
+        existe. Recargar los mismos datos no duplica filas.
+
+        Args:
+            df (pd.DataFrame): Datos a insertar
+            table_name (str): Nombre de la tabla destino
+            keys (list[str]): Columnas que identifican una fila
+            batch_size (int | None): Filas por lote (por defecto ``self.batch_size``)
+
+        Raises:
+            ValueError: Si hay que crear el índice único y la tabla ya tiene
+                claves duplicadas (p. ej. de cargas anteriores en modo
+                ``append``).
+            Exception: Se propaga cualquier error de la base de datos.
+        """
+        from sqlalchemy import text
+
+        batch_size = batch_size or self.batch_size
+        staging = f"{table_name}_staging_{uuid.uuid4().hex[:12]}"
+        # Una fila por clave: ON CONFLICT no admite actualizar dos veces la misma fila
+        df = wide_dtypes(df.drop_duplicates(subset=keys, keep="last"))
+
+        columns = ", ".join(f'"{c}"' for c in df.columns)
+        key_list = ", ".join(f'"{k}"' for k in keys)
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in df.columns if c not in keys)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+
+        start = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                df.head(0).to_sql(table_name, conn, index=False, if_exists="append")
+                self._ensure_unique_index(conn, table_name, keys)
+                self._create_staging(conn, table_name, staging, list(df.columns))
+                self._bulk_load(conn, df, staging, batch_size)
+                # ``WHERE true`` evita la ambigüedad de ON CONFLICT tras un SELECT en SQLite
+                conn.execute(text(
+                    f'INSERT INTO "{table_name}" ({columns}) SELECT {columns} FROM "{staging}" WHERE true '
+                    f'ON CONFLICT ({key_list}) {action}'
+                ))
+                conn.execute(text(f'DROP TABLE "{staging}"'))
+        except Exception as e:
+            print(f"❌ Error al actualizar la tabla '{table_name}': {e}")
+            raise
+
+        elapsed = time.perf_counter() - start
+        rate = len(df) / elapsed if elapsed > 0 else float("inf")
+        print(f"✅ Datos actualizados en la tabla '{table_name}' ({len(df)} filas, {rate:,.0f} filas/s).")
+
+    def read_range(self, table_name: str, column: str, start: pd.Timestamp, end: pd.Timestamp,
+                   columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Lee las filas de ``table_name`` con ``start <= column < end`` (solo
+        ``columns`` si se indican).
+
+        Returns:
+            pd.DataFrame: Filas leídas (vacío si la tabla no existe).
+        """
+        from sqlalchemy import DateTime, bindparam, inspect, text
+
+        selected = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        query = text(
+            f'SELECT {selected} FROM "{table_name}" WHERE "{column}" >= :start AND "{column}" < :end'
+        ).bindparams(bindparam("start", type_=DateTime()), bindparam("end", type_=DateTime()))
+        with self.engine.connect() as conn:
+            if not inspect(conn).has_table(table_name):
+                return pd.DataFrame()
+            return pd.read_sql(query, conn, params={"start": start.to_pydatetime(), "end": end.to_pydatetime()},
+                               parse_dates=[column])
 
     def test_connection(self):
         """
         Testea la conexión a la base de datos.
         """
+        from sqlalchemy import text
+
         try:
             with self.engine.connect() as conn:
-                conn.execute("SELECT 1")
+                conn.execute(text("SELECT 1"))
             print("✅ Conexión a base de datos exitosa.")
         except Exception as e:
             print(f"❌ Error de conexión a base de datos: {e}")
@@ -0,0 +1,354 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from etl.transformer import Transformer
+
+# Tipos SQL de las partes de calendario (normales y compactas)
+_CALENDAR_SQL = {
+    'year': ('INTEGER', 'SMALLINT'),
+    'month': ('INTEGER', 'TINYINT'),
+    'day': ('INTEGER', 'TINYINT'),
+    'hour': ('INTEGER', 'TINYINT'),
+    'minute': ('INTEGER', 'TINYINT'),
+}
+
+# Formato ``strftime`` de cada clave (mismo texto que ``Transformer.calculate_keys``)
+_KEY_SQL = {
+    'key': '%d_%m_%Y_%H',
+    'key_m': '%d_%m_%Y_%H_%M',
+    'key_month': '%m_%Y',
+}
+
+
+def _q(name) -> str:
+    """Identificador SQL entre comillas."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _lit(value: str) -> str:
+    """Literal de texto SQL."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _fetch(con, sql: str) -> pd.DataFrame:
+    """Ejecuta ``sql`` y convierte el resultado a pandas vía Arrow (más
+    rápido que ``.df()`` con columnas de texto)."""
+    result = con.execute(sql)
+    table = result.to_arrow_table() if hasattr(result, 'to_arrow_table') else result.fetch_arrow_table()
+    return table.to_pandas()
+
+
+class DuckDBBackend:
+    """
+    Ejecuta la cadena de energía con DuckDB en lugar de pandas.
+
+    Estandarizar fechas, calendario, claves, conversión de unidades, unión
+    con meteorología, relleno de nulos, corrección de negativos y filtro de
+    outliers se expresan como una sola consulta: DuckDB la optimiza, la
+    ejecuta con todos los núcleos y lee de los DataFrames de entrada solo
+    las columnas y filas que necesita. El resultado es el mismo que el de
+    :class:`Transformer` + :class:`DataCleaner`.
+
+    DuckDB es opcional y solo se importa al crear el backend.
+
+    Las opciones del pipeline que la consulta no reproduce
+    (``UNSUPPORTED_OPTIONS``) se rechazan con :meth:`check_options` en lugar
+    de ignorarse.
+    """
+
+    # Opciones de ETLPipeline sin equivalente en la consulta
+    UNSUPPORTED_OPTIONS = ('strict_cleaning', 'shard_by_plant', 'resample')
+
+    @classmethod
+    def check_options(cls, **options) -> None:
+        """
+        Lanza ``ValueError`` si alguna opción de ``UNSUPPORTED_OPTIONS`` está
+        activa, nombrándolas todas, para no producir en silencio un
+        resultado distinto al de pandas.
+        """
+        active = [name for name in cls.UNSUPPORTED_OPTIONS if options.get(name)]
+        if active:
+            raise ValueError(f"El backend 'duckdb' no admite {', '.join(active)}.")
+
+    def __init__(self, threads: int | None = None) -> None:
+        import duckdb
+
+        self.con = duckdb.connect()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        # Filas, filas emparejadas y tasa de la última unión
+        self.merge_stats: dict | None = None
+
+    # ------------------------------------------------------------------
+    # Preparación de cada fuente
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _datetime_sql(df: pd.DataFrame, date_col: str, time_col: str) -> str | None:
+        """
+        Expresión SQL de ``DateTime`` con los mismos formatos que infiere
+        ``Transformer.standardize_datetime``. ``None`` si no se pueden inferir.
+        """
+        if pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            date_sql = f"date_trunc('day', {_q(date_col)})"
+        else:
+            first = df[date_col].dropna()
+            date_fmt = guess_datetime_format(str(first.iloc[0])) if len(first) else None
+            if date_fmt is None:
+                return None
+            date_sql = f"date_trunc('day', try_strptime({_q(date_col)}, {_lit(date_fmt)}))"
+
+        if not pd.api.types.is_string_dtype(df[time_col]):
+            return None
+        labels = pd.Index(pd.unique(df[time_col].dropna())).astype(str)
+        time_fmt = Transformer._infer_time_format(labels[:100])
+        if time_fmt is None:
+            return None
+        time_sql = f"try_strptime({_q(time_col)}, {_lit(time_fmt)})"
+        return f"{date_sql} + ({time_sql} - date_trunc('day', {time_sql}))"
+
+    def _prepare(self, con, name: str, df: pd.DataFrame, date_col: str, time_col: str, rename: dict,
+                 since: pd.Timestamp | None, calendar: str, convert_units: bool) -> list[str]:
+        """
+        Registra ``df`` y define la vista ``<name>_prep`` (fechas, marca de
+        agua, calendario, claves y unidades). Retorna sus columnas en orden.
+        """
+        if 'DateTime' in df.columns:
+            datetime_sql = '"DateTime"'
+            source_cols = [c for c in df.columns if c != 'DateTime']
+        else:
+            datetime_sql = self._datetime_sql(df, date_col, time_col)
+            if datetime_sql is None:
+                # Formato no reconocible: se estandariza con pandas
+                df = Transformer.standardize_datetime(df, date_col, time_col, 'DateTime', source=name)
+                datetime_sql = '"DateTime"'
+                source_cols = [c for c in df.columns if c != 'DateTime']
+            else:
+                source_cols = [c for c in df.columns if c not in (date_col, time_col)]
+
+        con.register(f"{name}_raw", df.assign(_rn=np.arange(len(df))))
+        measures = []
+        for col in source_cols:
+            target = rename.get(col, col)
+            expr = _q(col)
+            if convert_units and (str(target).endswith('_MWh') or str(target).endswith('_MVArh')):
+                expr = f"{expr} / 1000.0"
+            measures.append((target, expr))
+
+        compact = calendar == 'compact'
+        calendar_cols = list(_CALENDAR_SQL) if calendar in ('eager', 'compact') else []
+        select = [f"{expr} AS {_q(target)}" for target, expr in measures]
+        select.append('"DateTime"')
+        select += [f'CAST({level}("DateTime") AS {_CALENDAR_SQL[level][compact]}) AS {level}'
+                   for level in calendar_cols]
+        select += [f'strftime("DateTime", {_lit(fmt)}) AS {key}' for key, fmt in _KEY_SQL.items()]
+        where = ""
+        if since is not None:
+            where = f'WHERE "DateTime" > TIMESTAMP {_lit(pd.Timestamp(since).isoformat(sep=" "))}'
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {name}_prep AS
+            SELECT {", ".join(select)}, _rn
+            FROM (
+                SELECT {", ".join(_q(c) for c in source_cols)}{"," if source_cols else ""}
+                       CAST({datetime_sql} AS TIMESTAMP) AS "DateTime", _rn
+                FROM {name}_raw
+            ) AS src
+            {where}
+        """)
+        return [target for target, _ in measures] + ['DateTime'] + calendar_cols + list(_KEY_SQL)
+
+    # ------------------------------------------------------------------
+    # Unión, limpieza y formato largo
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _merge_sql(energia_cols: list[str], meteo_cols: list[str], how: str, tolerance, direction: str) -> str:
+        """Consulta de la unión de ``energia_prep`` con ``meteo_prep``."""
+        e_cols = ", ".join(f"e.{_q(c)}" for c in energia_cols)
+        if how == 'exact':
+            m_cols = "".join(f", m.{_q(c)}" for c in meteo_cols)
+            return f"""
+                SELECT {e_cols}{m_cols}, e._rn, true AS _matched
+                FROM energia_prep e JOIN meteo_prep m ON e."DateTime" = m."DateTime"
+                ORDER BY e._rn, m._rn
+            """
+
+        # merge_asof: con marcas repetidas en meteo se toma la última lectura
+        meteo = f"""
+            SELECT "DateTime"{"".join(f", {_q(c)}" for c in meteo_cols)} FROM meteo_prep
+            WHERE "DateTime" IS NOT NULL
+            QUALIFY row_number() OVER (PARTITION BY "DateTime" ORDER BY _rn DESC) = 1
+        """
+        energia = 'SELECT * FROM energia_prep WHERE "DateTime" IS NOT NULL'
+        operators = {'backward': ['>='], 'forward': ['<='], 'nearest': ['>=', '<=']}[direction]
+        sides = [
+            f"""(SELECT e._rn, m."DateTime" AS _t{"".join(f", m.{_q(c)}" for c in meteo_cols)}
+                 FROM ({energia}) e ASOF LEFT JOIN ({meteo}) m ON e."DateTime" {op} m."DateTime") AS s{i}"""
+            for i, op in enumerate(operators)
+        ]
+        distance = [f'abs(epoch_us(e."DateTime") - epoch_us(s{i}._t))' for i in range(len(sides))]
+        if len(sides) == 1:
+            pick = "s0"
+        else:
+            # Empate: como pandas, gana la lectura anterior
+            pick = f"(CASE WHEN s1._t IS NOT NULL AND (s0._t IS NULL OR {distance[1]} < {distance[0]}) THEN 1 ELSE 0 END)"
+        limit = ""
+        if tolerance is not None:
+            limit = f" <= {int(pd.Timedelta(tolerance) / pd.Timedelta(microseconds=1))}"
+
+        def chosen(column: str) -> str:
+            if len(sides) == 1:
+                value, dist = f"s0.{column}", distance[0]
+            else:
+                value = f"CASE WHEN {pick} = 1 THEN s1.{column} ELSE s0.{column} END"
+                dist = f"CASE WHEN {pick} = 1 THEN {distance[1]} ELSE {distance[0]} END"
+            return f"CASE WHEN ({dist}){limit} THEN {value} END" if limit else value
+
+        m_cols = "".join(f", {chosen(_q(c))} AS {_q(c)}" for c in meteo_cols)
+        joins = " ".join(f"JOIN {side} USING (_rn)" for side in sides)
+        return f"""
+            SELECT {e_cols}{m_cols}, e._rn, {chosen("_t")} IS NOT NULL AS _matched
+            FROM ({energia}) e {joins}
+            ORDER BY e."DateTime", e._rn
+        """
+
+    @staticmethod
+    def _clean_sql(source: str, columns: list[str], numeric: list[str], category_col: str | None,
+                   negative_columns: list[str], outlier_columns: list[str], method: str,
+                   threshold: float, outlier_threshold: float) -> str:
+        """Relleno de nulos, negativos y outliers sobre ``source`` (ver ``DataCleaner.clean``)."""
+        if method not in ('mean', 'median'):
+            raise ValueError("El backend DuckDB solo admite method='mean' o 'median'.")
+        aggregate = 'avg' if method == 'mean' else 'median'
+        ratio = ", ".join(f"avg(CAST({_q(c)} IS NULL AS DOUBLE))" for c in columns)
+        not_null = " AND ".join(f"{_q(c)} IS NOT NULL" for c in columns)
+        window = f"PARTITION BY {_q(category_col)}" if category_col and category_col in columns else ""
+        in_group = f" AND {_q(category_col)} IS NOT NULL" if window else ""
+
+        def filled(col: str) -> str:
+            if col not in numeric:
+                return _q(col)
+            fill = f"coalesce({_q(col)}, {aggregate}({_q(col)}) OVER ({window}))"
+            return f"CASE WHEN stats.ratio >= {threshold!r}{in_group} THEN {fill} ELSE {_q(col)} END"
+
+        def fixed(col: str) -> str:
+            return f"abs({_q(col)})" if col in negative_columns else _q(col)
+
+        outliers = [c for c in outlier_columns if c in numeric]
+        bounds = ", ".join(
+            f"quantile_cont({_q(c)}, 0.25) AS q1_{i}, quantile_cont({_q(c)}, 0.75) AS q3_{i}"
+            for i, c in enumerate(outliers)
+        )
+        keep = " AND ".join(
+            f"{_q(c)} >= q1_{i} - {outlier_threshold!r} * (q3_{i} - q1_{i}) "
+            f"AND {_q(c)} <= q3_{i} + {outlier_threshold!r} * (q3_{i} - q1_{i})"
+            for i, c in enumerate(outliers)
+        )
+        return f"""
+            WITH merged AS ({source}),
+            stats AS (SELECT greatest({ratio}) AS ratio FROM merged),
+            filled AS (
+                SELECT {", ".join(f"{filled(c)} AS {_q(c)}" for c in columns)}, _rn
+                FROM merged, stats
+                WHERE stats.ratio >= {threshold!r} OR ({not_null})
+            ),
+            fixed AS (SELECT {", ".join(f"{fixed(c)} AS {_q(c)}" for c in columns)}, _rn FROM filled)
+            {f", bounds AS (SELECT {bounds} FROM fixed)" if outliers else ""}
+            SELECT {", ".join(f"fixed.{_q(c)}" for c in columns)}
+            FROM fixed{", bounds" if outliers else ""}
+            {f"WHERE {keep}" if outliers else ""}
+            ORDER BY fixed._rn
+        """
+
+    def consolidate(self, energia: pd.DataFrame, meteo: pd.DataFrame, rename: dict[str, dict] | None = None,
+                    since: dict[str, pd.Timestamp | None] | None = None, calendar: str = 'eager',
+                    how: str = 'exact', tolerance=None, direction: str = 'nearest',
+                    category_col: str | None = 'key_month', negative_columns=None, outlier_columns=None,
+                    method: str = 'mean', threshold: float = 0.05, outlier_threshold: float = 3.0) -> pd.DataFrame:
+        """
+        Equivale a preparar ``energia`` y ``meteo`` (``standardize_datetime``,
+        marca de agua, ``expand_datetime``, renombrado, ``calculate_keys`` y
+        ``convert_units``), unirlas con ``merge_energy_meteo`` y limpiarlas
+        con ``DataCleaner.clean``, en una sola consulta.
+
+        ``negative_columns`` y ``outlier_columns`` pueden ser listas o
+        funciones que reciben las columnas unidas y retornan la lista.
+        """
+        if how not in Transformer.MERGE_MODES:
+            raise ValueError(f"how debe ser uno de {Transformer.MERGE_MODES}.")
+        rename = rename or {}
+        since = since or {}
+        con = self.con.cursor()
+        try:
+            energia_cols = self._prepare(con, 'energia', energia, 'Date', 'Time', rename.get('energia', {}),
+                                         since.get('energia'), calendar, convert_units=True)
+            meteo_all = self._prepare(con, 'meteo', meteo, 'Date', 'Time', rename.get('meteo', {}),
+                                      since.get('meteo'), calendar, convert_units=False)
+            meteo_cols = [c for c in meteo_all if c not in energia_cols]
+            columns = energia_cols + meteo_cols
+
+            dtypes = con.execute("SELECT * FROM energia_prep LIMIT 0").df().dtypes.to_dict()
+            dtypes.update(con.execute("SELECT * FROM meteo_prep LIMIT 0").df().dtypes.to_dict())
+            numeric = [c for c in columns if pd.api.types.is_numeric_dtype(dtypes[c])
+                       and c not in _CALENDAR_SQL]
+            if callable(negative_columns):
+                negative_columns = negative_columns(columns)
+            if callable(outlier_columns):
+                outlier_columns = outlier_columns(columns)
+
+            # La unión se materializa una vez (formato columnar de DuckDB)
+            # para medir la tasa de emparejamiento y limpiarla después
+            merge_sql = self._merge_sql(energia_cols, meteo_cols, how, tolerance, direction)
+            con.execute(f"CREATE OR REPLACE TEMP TABLE merged AS {merge_sql}")
+            valid = ' WHERE "DateTime" IS NOT NULL' if how == 'asof' else ''
+            rows, matched, last = con.execute(
+                f"SELECT (SELECT count(*) FROM energia_prep{valid}), count(*) FILTER (WHERE _matched), "
+                f'max("DateTime") FROM merged'
+            ).fetchone()
+            rate = matched / rows if rows else 1.0
+            self.merge_stats = {'how': how, 'rows': rows, 'matched': matched, 'match_rate': rate,
+                                'max_datetime': last}
+            print(f"🔗 Unión {how}: {matched}/{rows} filas de energía con meteo ({rate:.1%})")
+
+            return _fetch(con, self._clean_sql(
+                "SELECT * FROM merged", columns, numeric, category_col, negative_columns or [],
+                outlier_columns or [], method, threshold, outlier_threshold,
+            ))
+        finally:
+            con.close()
+
+    def melt(self, df: pd.DataFrame, value_vars: list[str]) -> pd.DataFrame:
+        """
+        Equivale a ``Transformer.melt_to_long``: ``Value``, ``Plant`` y
+        ``Metric`` con ``UNPIVOT``. ``Plant`` y ``Metric`` salen como
+        ``Categorical``; las claves de texto se mantienen como texto. Las
+        filas no se reordenan por columna de origen (el orden no importa
+        para la carga y evita ordenar toda la tabla larga).
+        """
+        id_vars = [c for c in df.columns if c not in value_vars]
+        labels = [Transformer.split_plant_metric(c) for c in value_vars]
+
+        def enum(values) -> str:
+            categories = list(dict.fromkeys(v for v in values if v is not None))
+            return f"ENUM({', '.join(_lit(v) for v in categories)})" if categories else "VARCHAR"
+
+        names = pd.DataFrame({
+            '_col': [str(c) for c in value_vars],
+            'Plant': [plant for plant, _ in labels],
+            'Metric': [metric for _, metric in labels],
+        })
+        con = self.con.cursor()
+        try:
+            con.register('wide', df.assign(_rn=np.arange(len(df))))
+            con.register('names', names)
+            ids = "".join(f"u.{_q(c)}, " for c in id_vars)
+            return _fetch(con, f"""
+                SELECT {ids}CAST(u."Value" AS DOUBLE) AS "Value",
+                       CAST(n.Plant AS {enum(names['Plant'])}) AS Plant,
+                       CAST(n.Metric AS {enum(names['Metric'])}) AS Metric
+                FROM wide UNPIVOT INCLUDE NULLS ("Value" FOR _col IN ({", ".join(_q(c) for c in value_vars)})) AS u
+                JOIN names n USING (_col)
+            """)
+        finally:
+            con.close()
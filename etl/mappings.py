@@ -1,3 +1,5 @@
+import re
+
 # Diccionario de renombrado de columnas de energía
 ENERGY_COLUMNS_RENAME = {
     'Universidad Panamá 1 - Medidor Janitza UP1 - ACTIVE ENERGY (kWh)': 'UP1_Act_MWh',
@@ -41,7 +43,7 @@ METEO_COLUMNS_RENAME = {
     'Universidad Panamá 3 - Meteo - Panel Temperature (ºC)': 'UP3_Tpan_C',
     'Universidad Panamá 3 - Meteo - Plant Irradiance (W/m2)': 'UP3_Irr_W_m2',
     'Universidad Panamá 3 - Meteo - Relative Humidity (%)': 'UP3_Humid_pct',
-    # 'Universidad Panamá 3 - Meteo - Plant Insolation (kWh/m2)': 'UP3_Ins_kWh_m2',  # calculado manualmente
+    # 'Universidad Panamá 3 - Meteo - Plant Insolation (kWh/m2)': 'UP3_Ins_kWh_m2',  # derivado de la irradiancia con ``resample``
 }
 
 # Mapeo conveniente para acceder desde el pipeline
@@ -50,3 +52,28 @@ rename_dicts = {
     'meteo': METEO_COLUMNS_RENAME,
     'pvsyst': PVSYST_COLUMNS_RENAME,
 }
+
+# Prefijo de planta de las columnas renombradas (p. ej. ``UP1_Act_MWh``)
+PLANT_PATTERN = re.compile(r'^(UP\d+)_')
+
+
+def plant_of(column: str) -> str | None:
+    """Planta de una columna renombrada (``'UP1_Act_MWh'`` -> ``'UP1'``)."""
+    match = PLANT_PATTERN.match(column)
+    return match.group(1) if match else None
+
+
+def plant_groups(columns=None) -> dict[str, list[str]]:
+    """
+    Agrupa por planta las columnas indicadas o, si no se indican, las
+    columnas renombradas de energía y meteorología. Las plantas quedan en
+    orden de aparición; las columnas sin planta se omiten.
+    """
+    if columns is None:
+        columns = list(ENERGY_COLUMNS_RENAME.values()) + list(METEO_COLUMNS_RENAME.values())
+    groups: dict[str, list[str]] = {}
+    for column in columns:
+        plant = plant_of(column)
+        if plant is not None:
+            groups.setdefault(plant, []).append(column)
+    return groups
@@ -0,0 +1,221 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+
+def _frames(value) -> list[pd.DataFrame]:
+    """DataFrames contenidos en ``value`` (DataFrame, lista/tupla o dict)."""
+    if isinstance(value, pd.DataFrame):
+        return [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [df for v in value for df in _frames(v)]
+    return []
+
+
+def _peak_rss_mb() -> float | None:
+    """RSS pico del proceso en MB, o ``None`` donde no existe ``resource`` (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ``ru_maxrss`` está en KB en Linux y en bytes en macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1)
+
+
+class MetricsRecorder:
+    """
+    Registra métricas de cada etapa del pipeline y de cada llamada
+    instrumentada: tiempo real, tiempo de CPU, filas y memoria de entrada y
+    salida (``memory_usage(deep=True)``) y RSS pico del proceso.
+
+    Cada registro se agrega como una línea JSON a ``jsonl_path``; con
+    ``prometheus_path`` se escribe además un archivo de texto para el
+    *textfile collector* de Prometheus. Con ``profile_dir`` cada etapa se
+    perfila con cProfile (``.prof``) o pyinstrument (``.html``).
+    """
+
+    def __init__(self, jsonl_path: str | None = None, prometheus_path: str | None = None,
+                 profile_dir: str | None = None, profiler: str = "cprofile") -> None:
+        if profiler not in ("cprofile", "pyinstrument"):
+            raise ValueError("profiler debe ser 'cprofile' o 'pyinstrument'.")
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self.records: list[dict] = []
+        self._lock = threading.Lock()
+        # Solo puede haber un perfilador activo a la vez
+        self._profile_lock = threading.Lock()
+
+    def reset(self) -> None:
+        """
+        Descarta los registros en memoria. El pipeline lo llama al inicio de
+        cada ``run()``, de modo que :meth:`summary` y Prometheus reflejan
+        solo la última ejecución (el archivo JSONL conserva el historial).
+        """
+        with self._lock:
+            self.records = []
+
+    @staticmethod
+    def _measure(frames: list[pd.DataFrame]) -> tuple[int, int]:
+        rows = sum(len(df) for df in frames)
+        size = sum(int(df.memory_usage(deep=True).sum()) for df in frames)
+        return rows, size
+
+    def _emit(self, record: dict) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def _profile(self, name: str, profile: bool):
+        if not (profile and self.profile_dir):
+            yield
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with self._profile_lock:
+            if self.profiler == "pyinstrument":
+                from pyinstrument import Profiler
+
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    with open(os.path.join(self.profile_dir, f"{name}.html"), "w", encoding="utf-8") as fh:
+                        fh.write(profiler.output_html())
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+    @contextmanager
+    def track(self, name: str, inputs=None, kind: str = "stage", profile: bool = True):
+        """
+        Mide el bloque y emite un registro. El bloque recibe un diccionario
+        en el que puede guardar sus salidas en ``"outputs"``::
+
+            with metrics.track("clean", inputs=df) as result:
+                result["outputs"] = cleaner.clean(df)
+        """
+        rows_in, bytes_in = self._measure(_frames(inputs))
+        result: dict = {"outputs": None}
+        status = "ok"
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            with self._profile(name, profile):
+                yield result
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            rows_out, bytes_out = self._measure(_frames(result["outputs"]))
+            self._emit({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "kind": kind,
+                "name": name,
+                "status": status,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "rows_in": rows_in,
+                "rows_out": rows_out,
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "peak_rss_mb": _peak_rss_mb(),
+            })
+
+    def instrument(self, obj, prefix: str):
+        """Retorna un proxy de ``obj`` cuyos métodos públicos quedan medidos."""
+        return _InstrumentedProxy(obj, self, prefix)
+
+    def summary(self) -> dict[tuple[str, str], dict]:
+        """
+        Agrega los registros por ``(kind, name)``: una llamada repetida (por
+        ejemplo ``transformer.generate_keys`` en cada etapa de preparación)
+        suma sus tiempos, filas y memoria y conserva el RSS pico máximo.
+        """
+        summary: dict[tuple[str, str], dict] = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            entry = summary.setdefault((record["kind"], record["name"]), {
+                "count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows_out": 0, "bytes_out": 0,
+                "peak_rss_mb": None,
+            })
+            entry["count"] += 1
+            for metric in ("wall_seconds", "cpu_seconds", "rows_out", "bytes_out"):
+                entry[metric] += record[metric]
+            if record["peak_rss_mb"] is not None:
+                entry["peak_rss_mb"] = max(entry["peak_rss_mb"] or 0.0, record["peak_rss_mb"])
+        return summary
+
+    def write_prometheus(self) -> None:
+        """
+        Escribe las métricas en formato de texto de Prometheus, con una
+        única serie por ``(kind, name)`` (ver :meth:`summary`).
+        """
+        if not self.prometheus_path:
+            return
+        metrics = {
+            "count": "Ejecuciones de la etapa o llamada",
+            "wall_seconds": "Tiempo real total de la etapa o llamada",
+            "cpu_seconds": "Tiempo de CPU total de la etapa o llamada",
+            "rows_out": "Filas producidas en total por la etapa o llamada",
+            "bytes_out": "Memoria total de los DataFrames producidos",
+            "peak_rss_mb": "RSS pico del proceso al terminar la etapa o llamada",
+        }
+        summary = self.summary()
+        lines = []
+        for metric, help_text in metrics.items():
+            lines.append(f"# HELP etl_{metric} {help_text}")
+            lines.append(f"# TYPE etl_{metric} gauge")
+            for (kind, name), entry in summary.items():
+                if entry[metric] is None:
+                    continue
+                value = round(entry[metric], 6) if isinstance(entry[metric], float) else entry[metric]
+                lines.append(f'etl_{metric}{{kind="{kind}",name="{name}"}} {value}')
+        tmp = f"{self.prometheus_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prometheus_path)
+
+
+class _InstrumentedProxy:
+    """Envuelve los métodos públicos de un objeto con :meth:`MetricsRecorder.track`."""
+
+    def __init__(self, obj, recorder: MetricsRecorder, prefix: str) -> None:
+        self._obj = obj
+        self._recorder = recorder
+        self._prefix = prefix
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._obj, attr)
+        if attr.startswith("_") or not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def wrapper(*args, **kwargs):
+            inputs = [a for a in (*args, *kwargs.values()) if isinstance(a, (pd.DataFrame, dict))]
+            with self._recorder.track(f"{self._prefix}.{attr}", inputs=inputs, kind="call", profile=False) as result:
+                result["outputs"] = value(*args, **kwargs)
+            return result["outputs"]
+        return wrapper
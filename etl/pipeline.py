@@ -1,97 +1,780 @@
-from etl.sources.file_source import FileSource
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import pandas as pd
+
+from etl.sources.file_source import FileSource, fingerprint_file
 from etl.transformer import DataTransformer
 from etl.cleaner import DataCleaner
 from etl.db_loader import DatabaseLoader
-from etl.mappings import rename_dicts
+from etl.mappings import plant_groups, plant_of, rename_dicts
+from etl.metrics import MetricsRecorder
+from etl.parquet_sink import ParquetSink
+from etl.stages import Stage, StageRunner
+from etl.state import WatermarkStore
+
+# Columnas de fecha y hora de cada fuente (fecha, hora)
+DATETIME_COLUMNS = {
+    "cms": ("Fecha", "hora"),
+    "energia": ("Date", "Time"),
+    "meteo": ("Date", "Time"),
+}
+
+# Columnas de identificación de los archivos PVSyst (además de su mapeo)
+PVSYST_ID_COLUMNS = ("Date",)
+
+# Fuentes SCADA que pueden leerse por lotes
+STREAMED_SOURCES = ("energia", "meteo")
+
+# Claves naturales de las tablas destino para la carga idempotente (upsert)
+UPSERT_KEYS = {
+    "energia_consolidada": ["key_m", "Plant", "Metric"],
+}
+
+# Tablas de agregados de energía y su periodo (unidad de ``datetime64``); cada
+# una se calcula a partir de la anterior
+ROLLUP_TABLES = {"energia_horaria": "h", "energia_diaria": "D", "energia_mensual": "M"}
+ROLLUP_KEYS = ["DateTime", "Plant", "Metric"]
+UPSERT_KEYS.update({table: ROLLUP_KEYS for table in ROLLUP_TABLES})
+
+# Modos de generación de las columnas de calendario (year ... minute)
+CALENDAR_MODES = ("eager", "compact", "deferred", "none")
+
+# Fuentes procesadas de forma incremental según su marca de agua
+INCREMENTAL_SOURCES = ("energia", "meteo")
+
+# Motores de ejecución de la cadena de energía
+BACKENDS = ("pandas", "duckdb")
+
+# Destinos de las tablas finales
+SINKS = ("db", "parquet", "both")
+
+
+def _read_source(source, path: str, chunksize: int | None = None,
+                 datetime_cols: tuple[str, str] | None = None, name: str | None = None,
+                 usecols: list[str] | None = None) -> pd.DataFrame:
+    """
+    Carga ``path`` completo o, si se indica ``chunksize``, por lotes
+    estandarizando la fecha de cada lote antes de concatenarlos. Con
+    ``usecols`` solo se leen esas columnas.
+    """
+    # ``usecols`` solo se pasa si se indica: no todas las fuentes lo admiten
+    read_kwargs = {"usecols": usecols} if usecols is not None else {}
+    if chunksize is None or datetime_cols is None:
+        return source.load_excel(path, **read_kwargs)
+
+    date_col, time_col = datetime_cols
+    chunks = DataTransformer.transform_chunks(
+        source.iter_chunks(path, chunksize=chunksize, **read_kwargs),
+        [lambda df: DataTransformer.standardize_datetime(
+            df, date_col=date_col, time_col=time_col, datetime_col="DateTime", source=name
+        )],
+    )
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _parse_to_feather(path: str, out_dir: str, chunksize: int | None = None,
+                      datetime_cols: tuple[str, str] | None = None, name: str | None = None,
+                      usecols: list[str] | None = None) -> tuple[str | None, pd.DataFrame | None, float]:
+    """
+    Parsea ``path`` en un proceso hijo y deja el resultado en un archivo
+    Arrow IPC (Feather) temporal sin comprimir, evitando serializar el
+    DataFrame completo con pickle. Sin compresión el proceso padre lo lee
+    mapeado en memoria, sin descomprimir ni decodificar.
+
+    Retorna (ruta feather, DataFrame de respaldo, segundos de parseo).
+    """
+    start = time.perf_counter()
+    df = _read_source(FileSource(), path, chunksize, datetime_cols, name, usecols)
+    elapsed = time.perf_counter() - start
+
+    fd, out = tempfile.mkstemp(suffix='.feather', dir=out_dir)
+    os.close(fd)
+    try:
+        df.to_feather(out, compression="uncompressed")
+    except (ValueError, TypeError, NotImplementedError):
+        os.remove(out)
+        return None, df, elapsed
+    return out, None, elapsed
+
+
+def _process_plant(transformer, cleaner, df: pd.DataFrame, negative_columns: list[str],
+                   outlier_columns: list[str], strict: bool) -> pd.DataFrame:
+    """
+    Cadena de una planta: conversión de unidades, limpieza (nulos, negativos
+    y outliers) y paso a formato largo. Se ejecuta en el pool de procesos.
+    """
+    df = transformer.convert_units(df)
+    df = cleaner.clean(
+        df, category_col="key_month", negative_columns=negative_columns,
+        outlier_columns=outlier_columns, method='mean', strict=strict, inplace=True,
+    )
+    return transformer.melt_energy(df)
+
 
 class ETLPipeline:
-    def __init__(self, file_paths: dict[str, str]):
+    def __init__(self, file_paths: dict[str, str], max_workers: int | None = None, executor: str = "thread",
+                 chunksize: int | None = None, incremental: bool = False,
+                 state_path: str = os.path.join(".etl_state", "watermarks.json"), load_mode: str = "append",
+                 calendar: str = "eager", strict_cleaning: bool = False, checkpoint_dir: str | None = None,
+                 metrics: MetricsRecorder | None = None, merge: str = "exact",
+                 merge_tolerance: str | None = "1min", merge_direction: str = "nearest",
+                 compact: bool = False, backend: str = "pandas", sink: str = "db",
+                 parquet_dir: str | None = None, shard_by_plant: bool = False, rollups: bool = False,
+                 resample: str | None = None, max_gap: str | None = "5min", keep_hot: bool = False,
+                 clean_window: str | None = "30D"):
         """
         Inicializa el pipeline con rutas de archivos.
 
         Args:
             file_paths (dict): Diccionario con nombre lógico -> ruta archivo.
+            max_workers (int | None): Número de archivos cargados en paralelo.
+                ``None`` usa un worker por archivo (limitado por las CPUs);
+                ``1`` carga de forma secuencial.
+            executor (str): ``"thread"`` o ``"process"``. El parseo de Excel
+                es intensivo en CPU, por lo que ``"process"`` escala mejor.
+            chunksize (int | None): Si se indica, ``energia`` y ``meteo`` se
+                leen por lotes de este tamaño y su fecha se estandariza lote
+                a lote: solo las cadenas de fecha/hora sin parsear se limitan
+                al tamaño del lote. Los lotes se concatenan después, y el
+                relleno, el filtro IQR y la unión operan sobre la tabla
+                completa.
+            incremental (bool): Si es ``True`` solo se procesan las filas de
+                ``energia`` y ``meteo`` posteriores a su marca de agua; la tabla
+                ``pvsyst_datos`` se reemplaza en cada ejecución. Ambas marcas
+                avanzan hasta la última fecha unida: una fila sin pareja
+                anterior a esa fecha no se vuelve a procesar aunque su pareja
+                llegue después (para recuperarla, ejecutar sin
+                ``incremental``).
+            state_path (str): Archivo JSON donde se guardan las marcas de agua.
+            load_mode (str): ``"append"`` agrega filas; ``"upsert"`` inserta o
+                actualiza según ``UPSERT_KEYS``, de modo que reejecutar el
+                pipeline no duplica filas.
+            calendar (str): Cómo se generan las columnas de calendario:
+                ``"eager"`` tras estandarizar las fechas (enteros por defecto),
+                ``"compact"`` igual pero con ``int16``/``int8``,
+                ``"deferred"`` solo sobre las tablas finales antes de cargarlas
+                (en formato compacto) y ``"none"`` no las genera, dejando que
+                la base de datos o la vista de BI las derive de ``DateTime``.
+            strict_cleaning (bool): Si es ``True`` los outliers se filtran
+                columna a columna (resultado idéntico al filtrado secuencial);
+                por defecto se usan los límites IQR de todas las columnas a la
+                vez con un único filtro.
+            checkpoint_dir (str | None): Directorio donde se guardan las
+                salidas de cada etapa (Parquet) indexadas por su huella. Una
+                nueva ejecución omite las etapas sin cambios.
+            metrics (MetricsRecorder | None): Si se indica, se miden todas las
+                etapas y las llamadas al transformador y al limpiador.
+            merge (str): ``"exact"`` une energía y meteorología por marca de
+                tiempo exacta; ``"asof"`` toma la lectura meteorológica más
+                cercana, tolerando la deriva de reloj entre registradores.
+            merge_tolerance (str | None): Distancia máxima entre marcas de
+                tiempo en el modo ``"asof"`` (p. ej. ``"30s"``).
+            merge_direction (str): ``"backward"``, ``"forward"`` o
+                ``"nearest"`` en el modo ``"asof"``.
+            compact (bool): Si es ``True`` se reducen los tipos de datos
+                (``float32``, enteros pequeños, ``Categorical``) tras cargar
+                cada archivo y en las tablas finales, y se informa la memoria
+                antes y después. Es solo en memoria: ``DatabaseLoader`` vuelve
+                a ``int64``/``float64`` al cargar para no fijar un esquema
+                ``SMALLINT``/``REAL`` en la tabla.
+            backend (str): ``"pandas"`` o ``"duckdb"``. Con ``"duckdb"`` la
+                preparación, unión y limpieza de energía y meteorología se
+                ejecutan como una sola consulta multihilo de DuckDB (ver
+                :class:`~etl.duckdb_backend.DuckDBBackend`), con el mismo
+                resultado. Con ``strict_cleaning``, ``shard_by_plant`` o
+                ``resample`` lanza ``ValueError``.
+            sink (str): Destino de las tablas finales: ``"db"`` (base de
+                datos), ``"parquet"`` (archivos Parquet particionados por
+                planta/año/mes, ver :class:`~etl.parquet_sink.ParquetSink`)
+                o ``"both"``.
+            parquet_dir (str | None): Directorio raíz de los archivos Parquet
+                (por defecto ``ETL_PARQUET_DIR`` o ``parquet``).
+            shard_by_plant (bool): Si es ``True`` la conversión de unidades,
+                limpieza y paso a formato largo se ejecutan por planta (grupos
+                de columnas derivados de ``etl/mappings.py``), en el pool de
+                procesos con ``executor="process"``. Cada planta se limpia por
+                separado: un nulo u outlier de una planta ya no descarta la
+                fila de las demás. Con ``metrics`` y el pool de procesos solo
+                se mide la etapa ``process_plants``, no las llamadas de cada
+                planta. No admite ``backend="duckdb"``.
+            rollups (bool): Si es ``True`` se cargan además agregados horarios,
+                diarios y mensuales por planta y métrica (``ROLLUP_TABLES``).
+                La energía lleva ``Sum``/``Count`` y la meteorología
+                ``Count``/``Mean``/``Min``/``Max``. Solo se actualizan los
+                periodos con filas nuevas: en modo incremental las horas tocadas
+                se recalculan con las filas ya cargadas de esas horas, y los
+                días y meses con el agregado anterior. En modo incremental con
+                base de datos requiere ``load_mode="upsert"``.
+            resample (str | None): Paso de la malla regular (p. ej. ``"1min"``
+                o ``"5min"``) a la que se llevan ``energia`` y ``meteo`` antes
+                de unirlas (ver :meth:`~etl.transformer.Transformer.resample_to_grid`).
+                La insolación que falta se deriva de la irradiancia. No admite
+                ``backend="duckdb"``.
+            max_gap (str | None): Hueco máximo que se interpola linealmente con
+                ``resample``; los más largos quedan nulos y marcados en
+                ``long_gap_energia``/``long_gap_meteo``. ``None`` interpola
+                todos los huecos interiores, sin límite.
+            keep_hot (bool): Si es ``True`` las salidas de cada etapa se
+                conservan en memoria entre llamadas a ``run`` (modo vigilancia,
+                ver :class:`~etl.watch.SourceWatcher`): solo se vuelven a leer
+                los archivos modificados (tamaño o fecha de modificación) y se
+                recalculan las etapas que dependen de ellos.
+            clean_window (str | None): En modo incremental, historial previo
+                a la marca de agua (p. ej. ``"30D"``) que se une y limpia junto
+                con las filas nuevas y se descarta antes de cargar: los límites
+                IQR y las medias de relleno no se calculan solo sobre el delta
+                (p. ej. un delta nocturno casi todo ceros descartaría el
+                amanecer como outlier). ``None`` limpia solo las filas nuevas.
         """
+        if executor not in ("thread", "process"):
+            raise ValueError("executor debe ser 'thread' o 'process'.")
+        if load_mode not in ("append", "upsert"):
+            raise ValueError("load_mode debe ser 'append' o 'upsert'.")
+        if calendar not in CALENDAR_MODES:
+            raise ValueError(f"calendar debe ser uno de {CALENDAR_MODES}.")
+        if merge not in DataTransformer.MERGE_MODES:
+            raise ValueError(f"merge debe ser uno de {DataTransformer.MERGE_MODES}.")
+        if backend not in BACKENDS:
+            raise ValueError(f"backend debe ser uno de {BACKENDS}.")
+        if sink not in SINKS:
+            raise ValueError(f"sink debe ser uno de {SINKS}.")
+        if backend == "duckdb":
+            from etl.duckdb_backend import DuckDBBackend
+
+            DuckDBBackend.check_options(strict_cleaning=strict_cleaning, shard_by_plant=shard_by_plant,
+                                        resample=resample)
+        if rollups and incremental and sink != "parquet" and load_mode != "upsert":
+            # Con "append" un reintento duplicaría filas y los agregados recalculados las contarían dos veces
+            raise ValueError("rollups incrementales requieren load_mode='upsert'.")
         self.file_paths = file_paths
+        self.max_workers = max_workers or min(len(file_paths), os.cpu_count() or 1) or 1
+        self.executor = executor
+        self.chunksize = chunksize
+        self.incremental = incremental
+        self.load_mode = load_mode
+        self.calendar = calendar
+        self.strict_cleaning = strict_cleaning
+        self.checkpoint_dir = checkpoint_dir
+        self.merge = merge
+        self.merge_tolerance = merge_tolerance
+        self.merge_direction = merge_direction
+        self.compact = compact
+        self.shard_by_plant = shard_by_plant
+        self.rollups = rollups
+        self.resample = resample
+        self.max_gap = max_gap
+        self.clean_window = clean_window
+        # Salidas de las etapas entre ejecuciones: etapa -> (huella, salidas)
+        self.stage_memory: dict | None = {} if keep_hot else None
+        self.backend = backend
+        self.duckdb = None
+        if backend == "duckdb":
+            self.duckdb = DuckDBBackend()
+        self.watermarks = WatermarkStore(state_path)
         self.source = FileSource()
         self.transformer = DataTransformer()
         self.cleaner = DataCleaner()
-        self.db = DatabaseLoader()
+        self.sink = sink
+        self.db = DatabaseLoader() if sink in ("db", "both") else None
+        self.parquet = ParquetSink(parquet_dir) if sink in ("parquet", "both") else None
+        self.metrics = metrics
+        # Instancias sin instrumentar para el pool de procesos: los proxies de
+        # métricas no se envían a otros procesos
+        self._unwrapped = (self.transformer, self.cleaner)
+        if metrics is not None:
+            self.transformer = metrics.instrument(self.transformer, "transformer")
+            self.cleaner = metrics.instrument(self.cleaner, "cleaner")
 
         # DataFrames cargados
         self.data = {}
+        # Segundos de carga por archivo
+        self.load_timings: dict[str, float] = {}
+        # Pool de procesos y directorio temporal activos durante ``run``
+        self._process_pool = None
+        self._tmp_dir: str | None = None
+        # Grafo de etapas de la última ejecución (etapas ejecutadas y omitidas)
+        self.runner: StageRunner | None = None
 
-    def run(self):
+    def _chunk_datetime_cols(self, name: str) -> tuple[str, str] | None:
+        if self.chunksize is None or name not in STREAMED_SOURCES:
+            return None
+        return DATETIME_COLUMNS[name]
+
+    @staticmethod
+    def _usecols(name: str) -> list[str] | None:
         """
-        Ejecuta el pipeline completo de ETL.
+        Columnas de ``name`` que consumen las etapas: fecha/hora y columnas
+        del mapeo de la fuente. ``None`` (todas) si la fuente no tiene mapeo.
         """
-        print("▶️ Iniciando proceso ETL...")
+        kind = "pvsyst" if name.endswith("_pvsyst") else name
+        mapping = rename_dicts.get(kind)
+        if not mapping:
+            return None
+        ids = PVSYST_ID_COLUMNS if kind == "pvsyst" else DATETIME_COLUMNS.get(name, ())
+        return list(dict.fromkeys([*ids, *mapping]))
 
-        # 1. Cargar archivos
-        for name, path in self.file_paths.items():
+    def _load_timed(self, name: str, path: str) -> tuple[pd.DataFrame, float]:
+        start = time.perf_counter()
+        df = _read_source(self.source, path, self.chunksize, self._chunk_datetime_cols(name), name,
+                          self._usecols(name))
+        return df, time.perf_counter() - start
+
+    def _incremental_bounds(self, marks: dict) -> tuple[pd.Timestamp | None, pd.Timestamp | None]:
+        """
+        ``(since, start)`` de una ejecución incremental: las filas con
+        ``DateTime > since`` son nuevas y las de ``(start, since]`` son el
+        historial de ``clean_window`` que solo se usa para limpiar.
+        """
+        known = [marks[name] for name in INCREMENTAL_SOURCES if marks.get(name) is not None]
+        if not self.incremental or not known:
+            return None, None
+        since = max(pd.Timestamp(mark) for mark in known)
+        start = since - pd.Timedelta(self.clean_window) if self.clean_window else since
+        return since, start
+
+    def apply_watermark(self, name: str, df: pd.DataFrame, since: pd.Timestamp | None,
+                        start: pd.Timestamp | None = None) -> pd.DataFrame:
+        """
+        Descarta las filas de ``name`` ya cargadas en ejecuciones anteriores,
+        salvo el historial posterior a ``start`` (por defecto ``since``).
+        """
+        start = since if start is None else start
+        if start is not None:
+            df = df[df["DateTime"] > start]
+        new = len(df) if since is None else int((df["DateTime"] > since).sum())
+        print(f"🔖 {name}: {new} filas nuevas, {len(df) - new} de historial (marca de agua: {since})")
+        return df
+
+    @staticmethod
+    def _drop_history(df: pd.DataFrame, since: pd.Timestamp | None) -> pd.DataFrame:
+        """Quita las filas de historial usadas solo para limpiar (``DateTime <= since``)."""
+        if since is None or df.empty:
+            return df
+        return df[df["DateTime"] > since]
+
+    def load_table(self, df: pd.DataFrame, table_name: str, upsert: bool = False,
+                   replace: bool = False) -> None:
+        """
+        Carga ``df`` en ``table_name`` según ``load_mode`` y ``sink``. Con
+        ``upsert`` (agregados) las filas reemplazan a las de sus mismas claves
+        sea cual sea ``load_mode``; con ``replace`` la tabla se recarga
+        completa.
+        """
+        keys = UPSERT_KEYS.get(table_name)
+        if self.parquet is not None:
+            # Las particiones tocadas se combinan por clave natural (si la hay)
+            self.parquet.write_dataframe(df, table_name, keys=keys)
+        if self.db is None:
+            return
+        if self.load_mode == "append" and not (upsert or replace):
+            self.db.insert_dataframe(df, table_name=table_name)
+        elif table_name in UPSERT_KEYS and not replace:
+            self.db.upsert_dataframe(df, table_name=table_name, keys=UPSERT_KEYS[table_name])
+        else:
+            # Sin clave natural (p. ej. PVSyst): recarga completa e idempotente
+            self.db.insert_dataframe(df, table_name=table_name, if_exists="replace")
+
+    def _load_one(self, name: str, path: str) -> tuple[pd.DataFrame, float]:
+        """Carga un archivo en este proceso o en el pool de procesos de ``run``."""
+        if self._process_pool is None:
+            return self._load_timed(name, path)
+        out, df, elapsed = self._process_pool.submit(
+            _parse_to_feather, path, self._tmp_dir, self.chunksize, self._chunk_datetime_cols(name), name,
+            self._usecols(name),
+        ).result()
+        if out is not None:
+            from pyarrow import feather
+
+            df = feather.read_table(out, memory_map=True).to_pandas()
+        return df, elapsed
+
+    # ------------------------------------------------------------------
+    # Etapas del pipeline
+    # ------------------------------------------------------------------
+
+    def _compact(self, name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Reduce los tipos de ``df`` (``compact=True``) e informa la memoria."""
+        if not self.compact:
+            return df
+        before = df.memory_usage(deep=True).sum()
+        df = self.transformer.compact_dtypes(df)
+        after = df.memory_usage(deep=True).sum()
+        ratio = before / after if after else 1.0
+        print(f"🗜️ {name}: {before / 1024 ** 2:.1f} MB -> {after / 1024 ** 2:.1f} MB (x{ratio:.1f})")
+        return df
+
+    def _stage_load(self, name: str, path: str):
+        def func(inputs):
             print(f"📂 Cargando: {name}")
-            self.data[name] = self.source.load_excel(path)
+            df, self.load_timings[name] = self._load_one(name, path)
+            return {name: self._compact(name, df)}
+        return func
 
-        # 2. Estandarizar fechas
-        self.data["cms"] = self.transformer.standardize_datetime(
-            self.data["cms"], date_col="Fecha", time_col="hora", datetime_col="DateTime"
-        )
-        self.data["energia"] = self.transformer.standardize_datetime(
-            self.data["energia"], date_col="Date", time_col="Time", datetime_col="DateTime"
-        )
-        self.data["meteo"] = self.transformer.standardize_datetime(
-            self.data["meteo"], date_col="Date", time_col="Time", datetime_col="DateTime"
-        )
+    def _stage_prepare(self, name: str, since: pd.Timestamp | None, start: pd.Timestamp | None):
+        def func(inputs):
+            df = inputs[name]
+            # Estandarizar fechas (las fuentes leídas por lotes ya lo están)
+            if self._chunk_datetime_cols(name) is None:
+                date_col, time_col = DATETIME_COLUMNS[name]
+                df = self.transformer.standardize_datetime(
+                    df, date_col=date_col, time_col=time_col, datetime_col="DateTime", source=name
+                )
+            # Modo incremental: solo filas posteriores a la marca de agua
+            if self.incremental and name in INCREMENTAL_SOURCES:
+                df = self.apply_watermark(name, df, since, start)
+            # Malla regular con interpolación de huecos cortos
+            if self.resample and name in STREAMED_SOURCES:
+                df = self.transformer.resample_to_grid(
+                    df, freq=self.resample, max_gap=self.max_gap, flag_col=f"long_gap_{name}"
+                )
+            # Expandir fechas
+            if self.calendar in ("eager", "compact"):
+                df = self.transformer.expand_datetime(
+                    df, "DateTime", up_to="minute", compact=self.calendar == "compact"
+                )
+            # Renombrar columnas, generar claves y convertir unidades
+            if name in rename_dicts:
+                df = df.rename(columns=rename_dicts[name])
+            if self.resample and name == "meteo":
+                df = self.transformer.derive_insolation(df)
+            df = self.transformer.generate_keys({name: df})[name]
+            # Con shard_by_plant las unidades se convierten en cada planta
+            if name == "energia" and not self.shard_by_plant:
+                df = self.transformer.convert_units(df)
+            return {f"{name}_prep": df}
+        return func
 
-        # 3. Expandir fechas
-        for key in ["cms", "energia", "meteo"]:
-            self.data[key] = self.transformer.expand_datetime(self.data[key], "DateTime", up_to="minute")
-
-        # 4. Renombrar columnas
-        self.data["energia"].rename(columns=rename_dicts["energia"], inplace=True)
-        self.data["meteo"].rename(columns=rename_dicts["meteo"], inplace=True)
-        for i in range(1, 5):
-            key = f"up{i}_pvsyst"
-            self.data[key].rename(columns=rename_dicts["pvsyst"], inplace=True)
-
-        # 5. Unir PVSyst
-        self.data["pvsyst"] = self.transformer.combine_pvsyst([
-            self.data["up1_pvsyst"],
-            self.data["up2_pvsyst"],
-            self.data["up3_pvsyst"],
-            self.data["up4_pvsyst"]
-        ])
-
-        # 6. Generar claves
-        self.data = self.transformer.generate_keys(self.data)
-
-        # 7. Conversión de unidades
-        self.data["energia"] = self.transformer.convert_units(self.data["energia"])
-
-        # 8. Enriquecer y unir energía con meteo
-        self.data["energia_consolidada"] = self.transformer.merge_energy_meteo(
-            self.data["energia"], self.data["meteo"]
-        )
+    def _pvsyst_sources(self) -> tuple[str, ...]:
+        """Archivos PVSyst de ``file_paths`` (uno por planta, ``<planta>_pvsyst``)."""
+        return tuple(name for name in self.file_paths if name.endswith("_pvsyst"))
 
-        # 9. Limpiar datos
-        self.data["energia_consolidada"] = self.cleaner.fill_missing(
-            self.data["energia_consolidada"], method='mean', category_col="key_month"
-        )
-        self.data["energia_consolidada"] = self.cleaner.fix_negatives(
-            self.data["energia_consolidada"],
-            columns=[col for col in self.data["energia_consolidada"].columns if "Imp" in col or "Exp" in col]
+    def _stage_combine_pvsyst(self, inputs):
+        dfs = [inputs[name].rename(columns=rename_dicts["pvsyst"]) for name in self._pvsyst_sources()]
+        pvsyst = self.transformer.combine_pvsyst(dfs)
+        return {"pvsyst": self.transformer.generate_keys({"pvsyst": pvsyst})["pvsyst"]}
+
+    def _stage_merge(self, inputs):
+        merged = self.transformer.merge_energy_meteo(
+            inputs["energia_prep"], inputs["meteo_prep"],
+            how=self.merge, tolerance=self.merge_tolerance, direction=self.merge_direction,
         )
-        for col in ["UP1_Act_MWh", "UP2_Act_MWh", "UP3_Act_MWh", "UP4_Act_MWh"]:
-            self.data["energia_consolidada"] = self.cleaner.remove_outliers(
-                self.data["energia_consolidada"], column=col
+        return {"energia_merged": merged, "watermarks": self._watermarks(merged["DateTime"].max())}
+
+    def _watermarks(self, last) -> pd.DataFrame:
+        # Ambas fuentes avanzan hasta la última fecha unida. Solo las filas
+        # sin pareja posteriores a esa fecha se reprocesan en la siguiente
+        # ejecución; las anteriores se descartan aunque su pareja llegue
+        # más tarde (requiere una recarga completa, sin ``incremental``).
+        if not self.incremental or pd.isna(last):
+            return pd.DataFrame({"source": pd.Series(dtype=str), "DateTime": pd.Series(dtype="datetime64[ns]")})
+        return pd.DataFrame({"source": list(INCREMENTAL_SOURCES), "DateTime": [last] * len(INCREMENTAL_SOURCES)})
+
+    @staticmethod
+    def _outlier_columns(columns) -> list[str]:
+        return [col for col in columns if col.endswith("_Act_MWh") and plant_of(col) is not None]
+
+    @staticmethod
+    def _negative_columns(columns) -> list[str]:
+        return [col for col in columns if "Imp" in col or "Exp" in col]
+
+    def _stage_consolidate(self, since: pd.Timestamp | None, start: pd.Timestamp | None):
+        def func(inputs):
+            # Backend DuckDB: preparar, unir y limpiar en una sola consulta
+            df = self.duckdb.consolidate(
+                inputs["energia"], inputs["meteo"], rename=rename_dicts,
+                since={name: start for name in INCREMENTAL_SOURCES} if start is not None else None,
+                calendar=self.calendar, how=self.merge, tolerance=self.merge_tolerance,
+                direction=self.merge_direction, category_col="key_month",
+                negative_columns=self._negative_columns, outlier_columns=self._outlier_columns, method="mean",
             )
+            return {
+                "energia_consolidada": self._drop_history(df, since),
+                "watermarks": self._watermarks(self.duckdb.merge_stats["max_datetime"]),
+            }
+        return func
+
+    def _stage_clean(self, since: pd.Timestamp | None):
+        def func(inputs):
+            df = inputs["energia_merged"]
+            df = self.cleaner.clean(
+                df,
+                category_col="key_month",
+                negative_columns=self._negative_columns(df.columns),
+                outlier_columns=self._outlier_columns(df.columns),
+                method='mean',
+                strict=self.strict_cleaning,
+            )
+            return {"energia_consolidada": self._drop_history(df, since)}
+        return func
+
+    @staticmethod
+    def _plant_shards(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+        """
+        Divide ``df`` por planta: las columnas de energía de cada planta más
+        las columnas comunes (fechas, claves y meteorología).
+        """
+        energy = [c for c in df.columns if c.endswith('_MWh') or c.endswith('_MVArh')]
+        common = [c for c in df.columns if c not in energy]
+        return {plant: df[common + columns] for plant, columns in plant_groups(energy).items()}
+
+    @staticmethod
+    def _concat_shards(frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatena los resultados por planta conservando las columnas ``Categorical``."""
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        for col in frames[0].columns:
+            if isinstance(frames[0][col].dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        return df
+
+    def _stage_process_plants(self, since: pd.Timestamp | None):
+        def func(inputs):
+            return self._process_plants(inputs, since)
+        return func
+
+    def _process_plants(self, inputs, since: pd.Timestamp | None):
+        shards = self._plant_shards(inputs["energia_merged"])
+        args = {
+            plant: (df, self._negative_columns(df.columns), self._outlier_columns(df.columns), self.strict_cleaning)
+            for plant, df in shards.items()
+        }
+        if self._process_pool is not None:
+            # Con métricas se mide la etapa completa, no cada llamada por planta
+            transformer, cleaner = self._unwrapped
+            futures = {plant: self._process_pool.submit(_process_plant, transformer, cleaner, *a)
+                       for plant, a in args.items()}
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {plant: pool.submit(_process_plant, self.transformer, self.cleaner, *a)
+                           for plant, a in args.items()}
+        frames = []
+        for plant, future in futures.items():
+            frames.append(future.result())
+            print(f"🏭 {plant}: {len(shards[plant])} -> {len(frames[-1])} filas")
+        df = self._with_deferred_calendar(self._drop_history(self._concat_shards(frames), since))
+        return {"energia_long": self._compact("energia_long", df)}
+
+    def _with_deferred_calendar(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Calendario diferido: solo sobre las tablas que se cargan
+        if self.calendar == "deferred" and "DateTime" in df.columns:
+            return self.transformer.expand_datetime(df, "DateTime", up_to="minute", compact=True)
+        return df
+
+    def _stage_melt_energy(self, inputs):
+        df = inputs["energia_consolidada"]
+        if self.duckdb is not None:
+            value_vars = [c for c in df.columns if c.endswith('_MWh') or c.endswith('_MVArh')]
+            df = self.duckdb.melt(df, value_vars)
+        else:
+            df = self.transformer.melt_energy(df)
+        df = self._with_deferred_calendar(df)
+        return {"energia_long": self._compact("energia_long", df)}
+
+    def _stage_melt_pvsyst(self, inputs):
+        df = self._with_deferred_calendar(self.transformer.melt_pvsyst(inputs["pvsyst"]))
+        return {"pvsyst_long": self._compact("pvsyst_long", df)}
+
+    def _stage_rollup(self, inputs):
+        df = inputs["energia_long"]
+        rollups = {}
+        for table, freq in ROLLUP_TABLES.items():
+            # Horas desde las filas; días y meses desde el agregado anterior
+            rollups[table] = self.transformer.rollup(df, freq) if not rollups else \
+                self.transformer.coarsen_rollup(rollups[list(rollups)[-1]], freq)
+            print(f"📊 {table}: {len(df)} -> {len(rollups[table])} filas")
+        return rollups
+
+    def _read_stored(self, table_name: str, datetimes: pd.Series, freq: str,
+                     columns: list[str] | None = None) -> pd.DataFrame:
+        """Filas ya cargadas de ``table_name`` en los periodos ``freq`` de ``datetimes``."""
+        buckets = datetimes.to_numpy(dtype="datetime64[ns]").astype(f"datetime64[{freq}]")
+        start, end = pd.Timestamp(buckets.min()), pd.Timestamp(buckets.max() + 1)
+        store = self.db if self.db is not None else self.parquet
+        return store.read_range(table_name, "DateTime", start, end, columns=columns)
+
+    def _stage_load_energia(self, inputs):
+        df = inputs["energia_long"]
+        self.load_table(df, table_name="energia_consolidada")
+        # Los agregados se cargan antes de avanzar las marcas de agua. En modo
+        # incremental los periodos tocados se recalculan desde lo ya cargado
+        # (las horas con las filas de ``energia_consolidada`` de esas horas y
+        # cada agregado mayor con el anterior), de modo que un reintento los
+        # reemplaza en lugar de sumarlos dos veces.
+        previous = "energia_consolidada"
+        for table, freq in ROLLUP_TABLES.items():
+            if table not in inputs:
+                continue
+            rollup = inputs[table]
+            if self.incremental and len(df):
+                if previous == "energia_consolidada":
+                    stored = self._read_stored(previous, df["DateTime"], freq, self.transformer.rollup_columns(df))
+                    rollup = self.transformer.rollup(stored, freq)
+                else:
+                    rollup = self.transformer.coarsen_rollup(self._read_stored(previous, df["DateTime"], freq), freq)
+            self.load_table(rollup, table_name=table, upsert=True)
+            previous = table
+        # Avanzar marcas de agua solo tras una carga exitosa
+        marks = inputs["watermarks"]
+        if self.incremental and not marks.empty:
+            self.watermarks.commit(dict(zip(marks["source"], marks["DateTime"].map(pd.Timestamp))))
+        return {}
+
+    def _stage_load_pvsyst(self, inputs):
+        # PVSyst no tiene marca de agua: en modo incremental cada ejecución
+        # trae la simulación completa, que reemplaza a la cargada
+        self.load_table(inputs["pvsyst_long"], table_name="pvsyst_datos", replace=self.incremental)
+        return {}
+
+    def _file_param(self, path: str):
+        """Identifica el archivo en la huella de su etapa de carga."""
+        if self.checkpoint_dir:
+            return fingerprint_file(path)
+        if self.stage_memory is not None:
+            # En memoria basta con detectar cambios sin leer el contenido
+            stat = os.stat(path)
+            return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+        return path
+
+    def build_stages(self) -> list[Stage]:
+        """Define el grafo de etapas del pipeline."""
+        marks = self.watermarks.load() if self.incremental else {}
+        since, start = self._incremental_bounds(marks)
+        stages = []
+        for name, path in self.file_paths.items():
+            stages.append(Stage(
+                f"load_{name}", self._stage_load(name, path), outputs=(name,),
+                params={
+                    "file": self._file_param(path),
+                    "chunksize": self.chunksize if name in STREAMED_SOURCES else None,
+                    "compact": self.compact,
+                    "usecols": self._usecols(name),
+                },
+            ))
+        # Con DuckDB, energía y meteorología se consolidan en una sola etapa
+        prepared = ("cms",) if self.duckdb is not None else tuple(DATETIME_COLUMNS)
+        for name in prepared:
+            stages.append(Stage(
+                f"prepare_{name}", self._stage_prepare(name, since, start),
+                inputs=(name,), outputs=(f"{name}_prep",),
+                params={
+                    "calendar": self.calendar,
+                    "incremental": self.incremental,
+                    "watermark": (since, start) if name in INCREMENTAL_SOURCES else None,
+                    "rename": rename_dicts.get(name),
+                    "shard_by_plant": self.shard_by_plant,
+                    "resample": (self.resample, self.max_gap),
+                },
+            ))
+        stages.append(Stage("combine_pvsyst", self._stage_combine_pvsyst,
+                            inputs=self._pvsyst_sources(), outputs=("pvsyst",),
+                            params={"rename": rename_dicts["pvsyst"]}))
+        merge_params = {
+            "incremental": self.incremental,
+            "merge": self.merge,
+            "tolerance": self.merge_tolerance,
+            "direction": self.merge_direction,
+        }
+        if self.duckdb is not None:
+            stages.append(Stage(
+                "consolidate_energia", self._stage_consolidate(since, start), inputs=("energia", "meteo"),
+                outputs=("energia_consolidada", "watermarks"),
+                params={
+                    **merge_params,
+                    "backend": self.backend,
+                    "calendar": self.calendar,
+                    "watermarks": (since, start),
+                    "rename": {name: rename_dicts.get(name) for name in INCREMENTAL_SOURCES},
+                },
+            ))
+        else:
+            stages.append(Stage("merge_energy_meteo", self._stage_merge, inputs=("energia_prep", "meteo_prep"),
+                                outputs=("energia_merged", "watermarks"), params=merge_params))
+        melt_params = {"calendar": self.calendar, "compact": self.compact, "backend": self.backend}
+        if self.shard_by_plant:
+            # Una cadena limpieza + formato largo por planta
+            stages.append(Stage("process_plants", self._stage_process_plants(since), inputs=("energia_merged",),
+                                outputs=("energia_long",),
+                                params={**melt_params, "strict": self.strict_cleaning, "since": since}))
+        else:
+            if self.duckdb is None:
+                stages.append(Stage("clean", self._stage_clean(since), inputs=("energia_merged",),
+                                    outputs=("energia_consolidada",),
+                                    params={"strict": self.strict_cleaning, "since": since}))
+            stages.append(Stage("melt_energy", self._stage_melt_energy, inputs=("energia_consolidada",),
+                                outputs=("energia_long",), params=melt_params))
+        load_inputs = ("energia_long", "watermarks")
+        if self.rollups:
+            stages.append(Stage("rollup_energia", self._stage_rollup, inputs=("energia_long",),
+                                outputs=tuple(ROLLUP_TABLES)))
+            load_inputs += tuple(ROLLUP_TABLES)
+        stages += [
+            Stage("melt_pvsyst", self._stage_melt_pvsyst, inputs=("pvsyst",),
+                  outputs=("pvsyst_long",), params={"calendar": self.calendar, "compact": self.compact}),
+            Stage("load_energia_consolidada", self._stage_load_energia, inputs=load_inputs,
+                  params={"load_mode": self.load_mode, "sink": self.sink, "incremental": self.incremental}),
+            Stage("load_pvsyst_datos", self._stage_load_pvsyst, inputs=("pvsyst_long",),
+                  params={"load_mode": self.load_mode, "sink": self.sink, "incremental": self.incremental}),
+        ]
+        return self._prune_unused(stages)
+
+    @staticmethod
+    def _prune_unused(stages: list[Stage]) -> list[Stage]:
+        """
+        Descarta las etapas cuyas salidas no llegan a ninguna carga (p. ej.
+        ``cms``, que se prepara pero no se carga): ni siquiera se lee su
+        archivo. ``stages`` debe estar en orden de dependencias.
+        """
+        required: set[str] = set()
+        kept = []
+        for stage in reversed(stages):
+            if stage.outputs and not set(stage.outputs) & required:
+                print(f"✂️ Etapa sin consumidores omitida: {stage.name}")
+                continue
+            kept.insert(0, stage)
+            required.update(stage.inputs)
+        return kept
+
+    def run(self):
+        """
+        Ejecuta el pipeline completo de ETL como un grafo de etapas.
+
+        Con ``checkpoint_dir`` las etapas cuya huella no cambió se omiten y
+        la ejecución se reanuda en la primera etapa pendiente (p. ej. solo la
+        carga a la base de datos si esta falló en la ejecución anterior).
+        """
+        print("▶️ Iniciando proceso ETL...")
+        self.load_timings = {}
+        if self.metrics is not None:
+            self.metrics.reset()
+        runner = StageRunner(self.build_stages(), checkpoint_dir=self.checkpoint_dir,
+                             max_workers=self.max_workers, metrics=self.metrics, memory=self.stage_memory)
+        self.runner = runner
 
-        # 10. Transformar a formato largo
-        self.data["energia_long"] = self.transformer.melt_energy(self.data["energia_consolidada"])
-        self.data["pvsyst_long"] = self.transformer.melt_pvsyst(self.data["pvsyst"])
+        pool_context = nullcontext()
+        if self.executor == "process" and self.max_workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
 
-        # 11. Cargar a la base de datos
-        self.db.insert_dataframe(self.data["energia_long"], table_name="energia_consolidada")
-        self.db.insert_dataframe(self.data["pvsyst_long"], table_name="pvsyst_datos")
+            pool_context = ProcessPoolExecutor(max_workers=self.max_workers)
+        with tempfile.TemporaryDirectory() as tmp_dir, pool_context as pool:
+            self._process_pool, self._tmp_dir = pool, tmp_dir
+            try:
+                self.data = runner.run()
+                if self.stage_memory is not None:
+                    # Incluir las salidas que no cambiaron en esta ejecución
+                    self.data = {
+                        **{ds: df for _, outputs in self.stage_memory.values() for ds, df in outputs.items()},
+                        **self.data,
+                    }
+            finally:
+                self._process_pool, self._tmp_dir = None, None
 
+        for name, seconds in sorted(self.load_timings.items(), key=lambda item: item[1], reverse=True):
+            print(f"⏱️ {name}: {seconds:.2f} s")
+        if self.metrics is not None:
+            self.metrics.write_prometheus()
         print("✅ ETL finalizado correctamente.")
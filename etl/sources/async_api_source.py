@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections.abc import AsyncIterator
+
+import pandas as pd
+from etl.sources.base_source import DataSource
+
+# Códigos HTTP que se reintentan
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class _Retry(Exception):
+    """Respuesta reintentable (``RETRY_STATUS``)."""
+
+    def __init__(self, delay: float | None = None) -> None:
+        super().__init__(f"respuesta reintentable (espera {delay})")
+        self.delay = delay
+
+
+class _StreamReader:
+    """Adapta ``response.aiter_bytes()`` a la interfaz ``read`` que usa ijson."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:  # ijson sondea el tipo con read(0)
+            return b''
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+
+class _ColumnBatches:
+    """
+    Acumula registros JSON en listas por columna y los vuelca a DataFrames
+    de ``batch_size`` filas, sin materializar la lista completa de dicts.
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.columns: dict[str, list] = {}
+        self.rows = 0
+        self.batches: list[pd.DataFrame] = []
+
+    def append(self, record) -> None:
+        if not isinstance(record, dict):
+            record = {'value': record}
+        for col, value in record.items():
+            if col not in self.columns:
+                self.columns[col] = [None] * self.rows
+            self.columns[col].append(value)
+        self.rows += 1
+        for values in self.columns.values():
+            if len(values) < self.rows:
+                values.append(None)
+        if self.rows >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.batches.append(pd.DataFrame(self.columns).infer_objects())
+        self.columns, self.rows = {}, 0
+
+    def frame(self) -> pd.DataFrame:
+        self.flush()
+        if not self.batches:
+            return pd.DataFrame()
+        return pd.concat(self.batches, ignore_index=True) if len(self.batches) > 1 else self.batches[0]
+
+
+class AsyncAPISource(DataSource):
+    """
+    Fuente de datos desde una API REST consultada de forma asíncrona.
+
+    Usa un único cliente ``httpx`` con conexiones persistentes (keep-alive)
+    y compresión, y lanza en paralelo, con a lo sumo ``max_concurrency``
+    solicitudes en vuelo, una consulta por juego de parámetros (p. ej. una
+    por planta y ventana de fechas; ver :meth:`plan_requests`). Cada
+    consulta sigue la paginación por cursor o por número de página.
+
+    La respuesta se parsea en streaming con ijson: los registros bajo
+    ``records_path`` pasan directamente a lotes columnares sin construir la
+    lista completa con ``response.json()``. Los errores transitorios se
+    reintentan con espera exponencial y, con ``cache_dir``, cada página se
+    guarda en Parquet y se revalida con ``ETag``/``If-Modified-Since``: una
+    respuesta ``304`` reutiliza la página guardada.
+    """
+
+    def __init__(self, url: str, headers: dict | None = None, params: dict | None = None,
+                 records_path: str = 'item', cursor_path: str | None = None, cursor_param: str = 'cursor',
+                 page_param: str | None = None, max_concurrency: int = 8, timeout: float = 30.0,
+                 max_retries: int = 3, backoff: float = 0.5, batch_size: int = 10_000,
+                 cache_dir: str | None = None) -> None:
+        """
+        Args:
+            url (str): URL del recurso.
+            headers (dict | None): Encabezados comunes a todas las solicitudes.
+            params (dict | None): Parámetros comunes a todas las solicitudes.
+            records_path (str): Prefijo ijson de los registros: ``'item'``
+                para una lista en la raíz o ``'results.item'`` para
+                ``{"results": [...]}``.
+            cursor_path (str | None): Prefijo ijson del cursor de la página
+                siguiente (p. ej. ``'next_cursor'``). Si el valor es una URL
+                se solicita tal cual; si no, se envía en ``cursor_param``.
+                También se sigue el encabezado ``Link: <...>; rel="next"``.
+            cursor_param (str): Parámetro en el que se envía el cursor.
+            page_param (str | None): Paginación por número de página: se
+                incrementa hasta recibir una página vacía.
+            max_concurrency (int): Solicitudes simultáneas (y conexiones).
+            timeout (float): Segundos de espera por solicitud.
+            max_retries (int): Reintentos ante errores de red o ``RETRY_STATUS``.
+            backoff (float): Espera base (s) entre reintentos; se duplica en
+                cada intento salvo que el servidor envíe ``Retry-After``.
+            batch_size (int): Filas por lote columnar.
+            cache_dir (str | None): Directorio de la caché de respuestas
+                (por defecto ``ETL_API_CACHE_DIR``; sin caché si no existe).
+        """
+        self.url = url
+        self.headers = headers or {}
+        self.params = params or {}
+        self.records_path = records_path
+        self.cursor_path = cursor_path
+        self.cursor_param = cursor_param
+        self.page_param = page_param
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir or os.getenv("ETL_API_CACHE_DIR")
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        # Solicitudes respondidas con 304 (caché) y reintentos realizados
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0}
+
+    @staticmethod
+    def plan_requests(plants: list[str], start, end, freq: str = '7D', plant_param: str = 'plant',
+                      start_param: str = 'start', end_param: str = 'end') -> list[dict]:
+        """
+        Parámetros de una consulta por planta y ventana de fechas
+        ``[inicio, fin)`` de tamaño ``freq`` entre ``start`` y ``end``.
+        """
+        bounds = list(pd.date_range(start, end, freq=freq))
+        if not bounds or bounds[-1] < pd.Timestamp(end):
+            bounds.append(pd.Timestamp(end))
+        return [
+            {plant_param: plant, start_param: lo.isoformat(), end_param: hi.isoformat()}
+            for plant in plants
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+
+    # ------------------------------------------------------------------
+    # Caché de respuestas
+    # ------------------------------------------------------------------
+
+    def _cache_paths(self, url: str, params: dict) -> tuple[str, str]:
+        key = hashlib.sha256(json.dumps([url, sorted(params.items())], default=str).encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.parquet"
+
+    def _cache_get(self, url: str, params: dict) -> dict | None:
+        meta_path, data_path = self._cache_paths(url, params)
+        if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+            return None
+        with open(meta_path, encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def _cache_put(self, url: str, params: dict, meta: dict, df: pd.DataFrame) -> None:
+        meta_path, data_path = self._cache_paths(url, params)
+        try:
+            df.to_parquet(f"{data_path}.tmp", index=False)
+        except (ValueError, TypeError, NotImplementedError) as e:
+            if os.path.exists(f"{data_path}.tmp"):
+                os.remove(f"{data_path}.tmp")
+            print(f"⚠️ No se pudo cachear la respuesta: {e}")
+            return
+        os.replace(f"{data_path}.tmp", data_path)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    # ------------------------------------------------------------------
+    # Descarga
+    # ------------------------------------------------------------------
+
+    async def _parse(self, response) -> tuple[pd.DataFrame, str | None]:
+        """Parsea la respuesta en streaming: registros en lotes columnares y cursor."""
+        import ijson
+
+        batches = _ColumnBatches(self.batch_size)
+        cursor = None
+        builder, depth = None, 0
+        item_prefix = self.records_path
+        async for prefix, event, value in ijson.parse_async(_StreamReader(response.aiter_bytes())):
+            if builder is not None:
+                builder.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                if depth == 0:
+                    batches.append(builder.value)
+                    builder = None
+            elif prefix == item_prefix and event in ('start_map', 'start_array'):
+                builder, depth = ijson.ObjectBuilder(), 1
+                builder.event(event, value)
+            elif prefix == item_prefix and event not in ('end_map', 'end_array', 'map_key'):
+                batches.append(value)
+            elif self.cursor_path and prefix == self.cursor_path and event in ('string', 'number'):
+                cursor = str(value)
+        return batches.frame(), cursor
+
+    async def _request(self, client, semaphore: asyncio.Semaphore, url: str,
+                       params: dict) -> tuple[pd.DataFrame, str | None, str | None]:
+        """
+        Una página con reintentos y revalidación de caché.
+
+        Retorna (datos, cursor del cuerpo, URL ``Link: rel="next"``).
+        """
+        import httpx
+
+        cached = self._cache_get(url, params) if self.cache_dir else None
+        headers = dict(self.headers)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore, client.stream('GET', url, params=params, headers=headers) as response:
+                    self.stats['requests'] += 1
+                    if response.status_code == 304 and cached:
+                        self.stats['not_modified'] += 1
+                        data = pd.read_parquet(self._cache_paths(url, params)[1])
+                        return data, cached.get('cursor'), cached.get('next_url')
+                    if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                        retry_after = response.headers.get('Retry-After')
+                        delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+                        raise _Retry(delay)
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise ConnectionError(f"Error en API: {response.status_code} - {response.text}")
+                    data, cursor = await self._parse(response)
+                    next_url = response.links.get('next', {}).get('url')
+                    if self.cache_dir and ('etag' in response.headers or 'last-modified' in response.headers):
+                        self._cache_put(url, params, {
+                            'etag': response.headers.get('etag'),
+                            'last_modified': response.headers.get('last-modified'),
+                            'cursor': cursor,
+                            'next_url': next_url,
+                        }, data)
+                    return data, cursor, next_url
+            except (_Retry, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    raise ConnectionError(f"Error en API tras {attempt + 1} intentos: {e}") from e
+                self.stats['retries'] += 1
+                delay = e.delay if isinstance(e, _Retry) and e.delay is not None else None
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt * (1 + random.random() / 10)
+                await asyncio.sleep(delay)
+        raise AssertionError("inalcanzable")
+
+    async def _fetch(self, client, semaphore: asyncio.Semaphore, params: dict) -> pd.DataFrame:
+        """Todas las páginas de una consulta, en orden."""
+        url, params = self.url, {**self.params, **params}
+        page = 1
+        if self.page_param:
+            params[self.page_param] = page
+        frames = []
+        while True:
+            data, cursor, next_url = await self._request(client, semaphore, url, params)
+            if data.empty and self.page_param:
+                break
+            frames.append(data)
+            if self.page_param:
+                page += 1
+                params = {**params, self.page_param: page}
+            elif cursor:
+                if cursor.startswith(('http://', 'https://')):
+                    url, params = cursor, {}
+                else:
+                    params = {**params, self.cursor_param: cursor}
+            elif next_url:
+                url, params = next_url, {}
+            else:
+                break
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    async def load_async(self, requests: list[dict] | None = None) -> pd.DataFrame:
+        """
+        Ejecuta una consulta por cada diccionario de ``requests`` (o una sola
+        con ``params``) de forma concurrente y concatena los resultados en
+        el mismo orden.
+        """
+        import httpx
+
+        requests = requests or [{}]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, headers=self.headers) as client:
+            frames = await asyncio.gather(*(self._fetch(client, semaphore, params) for params in requests))
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def load(self, requests: list[dict] | None = None) -> pd.DataFrame:  # type: ignore[override]
+        """Versión síncrona de :meth:`load_async`."""
+        return asyncio.run(self.load_async(requests))
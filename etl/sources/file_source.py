@@ -1,31 +1,230 @@
-import pandas as pd
+import hashlib
 import os
+import threading
+from collections.abc import Iterator
+from itertools import islice
+import pandas as pd
 from etl.sources.base_source import DataSource
 
 
+def _content_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def fingerprint_file(path: str, **params) -> str:
+    """
+    Huella de un archivo: ruta + tamaño + mtime + hash del contenido (y los
+    parámetros de lectura indicados). Cambia si el archivo cambia.
+    """
+    stat = os.stat(path)
+    parts = [
+        os.path.abspath(path),
+        str(stat.st_size),
+        str(stat.st_mtime_ns),
+        _content_hash(path),
+        repr(sorted(params.items())),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+class FileCache:
+    """
+    Caché en disco de archivos ya parseados, almacenados en formato Parquet.
+
+    Cada entrada se direcciona por ruta + tamaño + mtime + hash del contenido,
+    de modo que un archivo sin cambios se lee como Parquet (mapeado en memoria)
+    en lugar de volver a parsear el Excel. El tamaño total está acotado por
+    ``max_bytes``; al superarlo se eliminan las entradas menos usadas (LRU).
+
+    Varios hilos o procesos pueden compartir el directorio: una entrada que
+    otro worker elimina mientras se lee cuenta como fallo de caché.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, path: str, **params) -> str:
+        """Calcula la clave de caché de ``path`` (y parámetros de lectura)."""
+        return fingerprint_file(path, **params)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """Retorna el DataFrame cacheado o ``None`` si no existe."""
+        entry = self._entry_path(key)
+        try:
+            os.utime(entry)  # marca de uso para la política LRU
+            df = pd.read_parquet(entry, memory_map=True)
+        except FileNotFoundError:
+            # No existe o la eliminó otro worker entre ambos pasos
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Guarda ``df`` en la caché. Retorna ``False`` si el DataFrame no puede
+        representarse en Parquet (p. ej. columnas con tipos mezclados).
+        """
+        entry = self._entry_path(key)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+        except (ValueError, TypeError, NotImplementedError) as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            print(f"⚠️ No se pudo cachear el archivo: {e}")
+            return False
+        os.replace(tmp, entry)
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        """Elimina las entradas menos usadas hasta respetar ``max_bytes``."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.parquet'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue  # eliminada por otro worker
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Contadores de aciertos y fallos de la caché."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
 class FileSource(DataSource):
-    """Carga archivos locales (`.csv` o `.xlsx`)."""
+    """
+    Carga archivos locales (`.csv` o `.xlsx`).
+
+    Si se indica ``cache_dir`` (o la variable de entorno ``ETL_CACHE_DIR``),
+    los archivos parseados se guardan en una :class:`FileCache`.
+    """
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, cache_dir: str | None = None, max_cache_bytes: int | None = None) -> None:
+        cache_dir = cache_dir or os.getenv("ETL_CACHE_DIR")
+        if max_cache_bytes is None:
+            max_cache_bytes = int(os.getenv("ETL_CACHE_MAX_MB", "512")) * 1024 * 1024
+        self.cache = FileCache(cache_dir, max_bytes=max_cache_bytes) if cache_dir else None
 
     @staticmethod
-    def _load_file(path: str) -> pd.DataFrame:
+    def _column_filter(usecols: list[str] | None):
+        """
+        Filtro de columnas para ``usecols`` de pandas. Las columnas pedidas
+        que no existan en el archivo se ignoran en lugar de fallar.
+        """
+        if usecols is None:
+            return None
+        wanted = set(usecols)
+        return lambda name: name in wanted
+
+    @classmethod
+    def _load_file(cls, path: str, usecols: list[str] | None = None) -> pd.DataFrame:
         if path.endswith('.csv'):
-            df = pd.read_csv(path)
+            df = pd.read_csv(path, usecols=cls._column_filter(usecols))
         elif path.endswith('.xlsx'):
-            df = pd.read_excel(path)
+            df = pd.read_excel(path, usecols=cls._column_filter(usecols))
         else:
             raise ValueError("Formato no soportado. Usa .csv o .xlsx")
 
         df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
         return df
 
-    def load_excel(self, path: str) -> pd.DataFrame:
-        """Compatibilidad con el pipeline: carga el archivo indicado."""
+    @staticmethod
+    def _iter_xlsx_rows(path: str, chunksize: int, usecols: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            keep = [
+                i for i, name in enumerate(header)
+                if name is not None and not str(name).startswith('Unnamed')
+                and (usecols is None or name in usecols)
+            ]
+            columns = [header[i] for i in keep]
+            while True:
+                batch = [[row[i] if i < len(row) else None for i in keep] for row in islice(rows, chunksize)]
+                if not batch:
+                    break
+                yield pd.DataFrame(batch, columns=columns).infer_objects()
+        finally:
+            wb.close()
+
+    def iter_chunks(self, path: str, chunksize: int = 50_000,
+                    usecols: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        """
+        Lee el archivo por lotes de ``chunksize`` filas, de modo que la memoria
+        usada queda acotada por el tamaño del lote y no por el del archivo.
+
+        Los ``.xlsx`` se recorren con openpyxl en modo de solo lectura y los
+        ``.csv`` con ``chunksize`` de pandas. Con ``usecols`` solo se leen
+        esas columnas.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Archivo no encontrado: {path}")
+
+        if path.endswith('.csv'):
+            for chunk in pd.read_csv(path, chunksize=chunksize, usecols=self._column_filter(usecols)):
+                yield chunk.loc[:, ~chunk.columns.str.contains('^Unnamed')]
+        elif path.endswith('.xlsx'):
+            yield from self._iter_xlsx_rows(path, chunksize, usecols)
+        else:
+            raise ValueError("Formato no soportado. Usa .csv o .xlsx")
+
+    def load_excel(self, path: str, usecols: list[str] | None = None) -> pd.DataFrame:
+        """
+        Compatibilidad con el pipeline: carga el archivo indicado.
+
+        Con ``usecols`` solo se parsean esas columnas (las que no existan se
+        ignoran); la selección forma parte de la clave de caché.
+        """
         if not os.path.exists(path):
             raise FileNotFoundError(f"Archivo no encontrado: {path}")
-        return self._load_file(path)
+        if self.cache is None:
+            return self._load_file(path, usecols)
+
+        key = self.cache.key(path) if usecols is None else self.cache.key(path, usecols=sorted(usecols))
+        df = self.cache.get(key)
+        if df is None:
+            df = self._load_file(path, usecols)
+            self.cache.put(key, df)
+        return df
 
     # Para cumplir la interfaz ``DataSource``
     def load(self, path: str) -> pd.DataFrame:  # type: ignore[override]
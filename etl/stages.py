@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+@dataclass
+class Stage:
+    """
+    Etapa del pipeline con entradas y salidas explícitas.
+
+    ``func`` recibe un diccionario con los DataFrames de ``inputs`` y retorna
+    un diccionario con los DataFrames de ``outputs``. Una etapa sin salidas
+    (p. ej. la carga a la base de datos) solo produce efectos secundarios.
+    ``params`` forma parte de la huella de la etapa: cualquier cambio en
+    ellos invalida su checkpoint.
+    """
+
+    name: str
+    func: Callable[[dict[str, pd.DataFrame]], dict[str, pd.DataFrame]]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    params: dict = field(default_factory=dict)
+    checkpoint: bool = True
+
+
+class StageRunner:
+    """
+    Ejecuta un grafo (DAG) de :class:`Stage` con checkpoints en disco.
+
+    Cada etapa tiene una huella calculada a partir de su nombre, sus
+    parámetros y las huellas de las etapas que producen sus entradas. Si
+    existe un checkpoint para esa huella la etapa no se ejecuta; sus salidas
+    solo se leen (Parquet) cuando alguna etapa pendiente las necesita. Las
+    ramas independientes se ejecutan de forma concurrente. Tras una
+    ejecución exitosa solo se conserva el checkpoint de la huella actual de
+    cada etapa.
+
+    ``memory`` es una caché en memoria (etapa -> (huella, salidas)) que el
+    llamador puede conservar entre ejecuciones: una etapa cuya huella no
+    cambió reutiliza sus salidas sin leer ni escribir disco.
+    """
+
+    def __init__(self, stages: list[Stage], checkpoint_dir: str | None = None, max_workers: int = 4,
+                 metrics=None, memory: dict | None = None) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        self.memory = memory
+        # ``MetricsRecorder`` opcional que mide cada etapa ejecutada
+        self.metrics = metrics
+        self.checkpoint_dir = checkpoint_dir
+        self.max_workers = max_workers
+        self.producers: dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"La salida '{output}' la producen varias etapas.")
+                self.producers[output] = stage.name
+        self.order = self._topological_order()
+        # Etapas ejecutadas y omitidas en la última llamada a ``run``
+        self.executed: list[str] = []
+        self.skipped: list[str] = []
+
+    def _topological_order(self) -> list[str]:
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Ciclo detectado en la etapa '{name}'.")
+            state[name] = "visiting"
+            for dataset in self.stages[name].inputs:
+                if dataset not in self.producers:
+                    raise ValueError(f"La entrada '{dataset}' de '{name}' no la produce ninguna etapa.")
+                visit(self.producers[dataset])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def fingerprints(self) -> dict[str, str]:
+        """Huella de cada etapa, en orden topológico."""
+        result: dict[str, str] = {}
+        for name in self.order:
+            stage = self.stages[name]
+            payload = json.dumps({
+                "name": name,
+                "params": stage.params,
+                "inputs": {d: result[self.producers[d]] for d in stage.inputs},
+            }, sort_keys=True, default=str)
+            result[name] = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        return result
+
+    def _checkpoint_path(self, name: str, fingerprint: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{name}-{fingerprint}")
+
+    def _in_memory(self, name: str, fingerprint: str) -> bool:
+        return self.memory is not None and self.memory.get(name, (None,))[0] == fingerprint
+
+    def _is_done(self, name: str, fingerprint: str) -> bool:
+        if self._in_memory(name, fingerprint):
+            return True
+        if self.checkpoint_dir is None or not self.stages[name].checkpoint:
+            return False
+        return os.path.exists(os.path.join(self._checkpoint_path(name, fingerprint), "_SUCCESS"))
+
+    def _save(self, name: str, fingerprint: str, outputs: dict[str, pd.DataFrame]) -> None:
+        if self.memory is not None:
+            self.memory[name] = (fingerprint, outputs)
+        if self.checkpoint_dir is None or not self.stages[name].checkpoint:
+            return
+        path = self._checkpoint_path(name, fingerprint)
+        os.makedirs(path, exist_ok=True)
+        try:
+            for dataset, df in outputs.items():
+                df.to_parquet(os.path.join(path, f"{dataset}.parquet"))
+        except (ValueError, TypeError, NotImplementedError) as e:
+            print(f"⚠️ No se pudo guardar el checkpoint de '{name}': {e}")
+            return
+        # El marcador se escribe al final: un checkpoint a medias no cuenta
+        open(os.path.join(path, "_SUCCESS"), "w").close()
+
+    def _remove_superseded(self, fingerprints: dict[str, str]) -> None:
+        """Borra los checkpoints de huellas anteriores de cada etapa (conserva la actual)."""
+        if self.checkpoint_dir is None or not os.path.isdir(self.checkpoint_dir):
+            return
+        removed = 0
+        for entry in os.listdir(self.checkpoint_dir):
+            name, _, fingerprint = entry.rpartition("-")
+            if name in self.stages and fingerprint != fingerprints[name]:
+                shutil.rmtree(os.path.join(self.checkpoint_dir, entry), ignore_errors=True)
+                removed += 1
+        if removed:
+            print(f"🧹 Checkpoints obsoletos eliminados: {removed}")
+
+    def _restore(self, name: str, fingerprint: str, dataset: str) -> pd.DataFrame:
+        if self._in_memory(name, fingerprint):
+            return self.memory[name][1][dataset]
+        path = os.path.join(self._checkpoint_path(name, fingerprint), f"{dataset}.parquet")
+        return pd.read_parquet(path, memory_map=True)
+
+    def run(self) -> dict[str, pd.DataFrame]:
+        """
+        Ejecuta las etapas pendientes y retorna los DataFrames producidos o
+        restaurados desde checkpoints durante la ejecución.
+        """
+        fingerprints = self.fingerprints()
+        consumed = {dataset for stage in self.stages.values() for dataset in stage.inputs}
+        pending: list[str] = []
+        required: set[str] = set()
+        # Recorrido inverso: una etapa sin checkpoint solo se ejecuta si es
+        # terminal o si alguna etapa pendiente necesita sus salidas
+        for name in reversed(self.order):
+            stage = self.stages[name]
+            terminal = not stage.outputs or any(d not in consumed for d in stage.outputs)
+            if self._is_done(name, fingerprints[name]) or not (terminal or set(stage.outputs) & required):
+                continue
+            pending.insert(0, name)
+            required.update(stage.inputs)
+        self.executed, self.skipped = [], [name for name in self.order if name not in pending]
+
+        data: dict[str, pd.DataFrame] = {}
+        for name in pending:
+            for dataset in self.stages[name].inputs:
+                producer = self.producers[dataset]
+                if producer in self.skipped and dataset not in data:
+                    data[dataset] = self._restore(producer, fingerprints[producer], dataset)
+        for name in self.skipped:
+            print(f"⏭️ Etapa sin cambios: {name}")
+
+        def execute(name: str) -> dict[str, pd.DataFrame]:
+            stage = self.stages[name]
+            inputs = {dataset: data[dataset] for dataset in stage.inputs}
+            if self.metrics is None:
+                outputs = stage.func(inputs) or {}
+            else:
+                with self.metrics.track(name, inputs=inputs) as result:
+                    outputs = result["outputs"] = stage.func(inputs) or {}
+            missing = set(stage.outputs) - set(outputs)
+            if missing:
+                raise ValueError(f"La etapa '{name}' no produjo: {sorted(missing)}")
+            self._save(name, fingerprints[name], outputs)
+            return outputs
+
+        waiting = list(pending)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while waiting or running:
+                for name in list(waiting):
+                    if all(dataset in data for dataset in self.stages[name].inputs):
+                        waiting.remove(name)
+                        running[pool.submit(execute, name)] = name
+                if not running:
+                    raise RuntimeError(f"Etapas bloqueadas: {waiting}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        data.update(future.result())
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    self.executed.append(name)
+        self._remove_superseded(fingerprints)
+        return data
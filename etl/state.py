@@ -0,0 +1,46 @@
+import json
+import os
+import pandas as pd
+
+
+class WatermarkStore:
+    """
+    Persiste en un archivo JSON la marca de agua (último ``DateTime``
+    procesado) de cada fuente, para las ejecuciones incrementales.
+
+    La escritura es atómica: se escribe un archivo temporal y se reemplaza
+    el original con ``os.replace``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> dict[str, pd.Timestamp]:
+        """Retorna las marcas de agua guardadas (vacío si no hay estado)."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as fh:
+            raw = json.load(fh)
+        return {name: pd.Timestamp(value) for name, value in raw.items()}
+
+    def get(self, name: str) -> pd.Timestamp | None:
+        """Retorna la marca de agua de ``name`` o ``None`` si no existe."""
+        return self.load().get(name)
+
+    def commit(self, marks: dict[str, pd.Timestamp]) -> None:
+        """
+        Avanza las marcas de agua indicadas en una sola escritura atómica.
+        Una marca anterior a la guardada no la retrocede.
+        """
+        state = self.load()
+        state.update({name: mark for name, mark in marks.items() if name not in state or mark > state[name]})
+        raw = {name: value.isoformat() for name, value in state.items()}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(raw, fh, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
@@ -1,32 +1,97 @@
 # etl/transformer.py
 
+import re
+from collections.abc import Callable, Iterable, Iterator
+
+import numpy as np
 import pandas as pd
 
 class Transformer:
+    # Formatos de hora probados, en orden, al inferir el formato de una fuente
+    TIME_FORMATS = ['%I:%M %p', '%H:%M:%S', '%H:%M']
+
+    # Formato de hora inferido por fuente: (source, time_col) -> formato
+    _time_formats: dict[tuple[str, str], str | None] = {}
+
+    @classmethod
+    def _infer_time_format(cls, sample: pd.Index) -> str | None:
+        """Retorna el primer formato que interpreta más del 80% de ``sample``."""
+        for fmt in cls.TIME_FORMATS:
+            parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+            if parsed.notna().sum() > 0.8 * len(sample):
+                return fmt
+        return None
+
+    @classmethod
+    def _parse_times(cls, labels: pd.Index, cache_key: tuple[str, str] | None = None,
+                     sample_size: int = 100) -> pd.TimedeltaIndex:
+        """Convierte horas en texto a ``timedelta`` desde la medianoche.
+
+        El formato se infiere una vez sobre una muestra y se reutiliza para la
+        misma fuente mientras siga siendo válido.
+        """
+        fmt = cls._time_formats.get(cache_key) if cache_key else None
+        parsed = pd.to_datetime(labels, format=fmt, errors='coerce') if fmt else None
+        if parsed is None or parsed.notna().sum() <= 0.8 * len(labels):
+            fmt = cls._infer_time_format(labels[:sample_size])
+            parsed = pd.to_datetime(labels, format=fmt, errors='coerce')
+            if cache_key:
+                cls._time_formats[cache_key] = fmt
+        return parsed - parsed.normalize()
+
     @staticmethod
-    def standardize_datetime(df, date_col='Date', time_col='Time', datetime_col='DateTime') -> pd.DataFrame:
+    def _factorize(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+        """Valores únicos y códigos de ``values`` (``-1`` para nulos)."""
+        codes, uniques = pd.factorize(values)
+        return codes, pd.Index(uniques)
+
+    @classmethod
+    def standardize_datetime(cls, df, date_col='Date', time_col='Time', datetime_col='DateTime',
+                             source: str | None = None) -> pd.DataFrame:
+        """Combina las columnas de fecha y hora en ``datetime_col``.
+
+        Fechas y horas se interpretan solo una vez por valor único (una serie
+        por minuto repite 1.440 horas distintas) y se combinan como
+        ``fecha + timedelta``, sin volver a pasar por texto. Si se indica
+        ``source``, el formato de hora inferido se guarda para esa fuente.
+        """
         df = df.copy()
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        codes, uniques = cls._factorize(df[date_col])
+        dates = pd.to_datetime(uniques, errors='coerce')
 
         if time_col in df.columns:
-            common_formats = ['%I:%M %p', '%H:%M:%S', '%H:%M']
-            for fmt in common_formats:
-                temp = pd.to_datetime(df[time_col], format=fmt, errors='coerce')
-                if temp.notna().sum() > 0.8 * df.shape[0]:
-                    df[time_col] = temp.dt.time
-                    break
-            else:
-                df[time_col] = pd.to_datetime(df[time_col], errors='coerce').dt.time
+            dates = dates.normalize().take(codes, allow_fill=True, fill_value=pd.NaT)
+            codes, uniques = cls._factorize(df[time_col])
+            cache_key = (source, time_col) if source else None
+            times = cls._parse_times(uniques.astype(str), cache_key=cache_key)
+            times = times.take(codes, allow_fill=True, fill_value=pd.NaT)
 
-            df[datetime_col] = pd.to_datetime(df[date_col].astype(str) + " " + df[time_col].astype(str), errors='coerce')
+            df[datetime_col] = dates + times
             df.drop(columns=[date_col, time_col], inplace=True)
         else:
+            df[date_col] = dates.take(codes, allow_fill=True, fill_value=pd.NaT)
             df[datetime_col] = df[date_col]
 
         return df
 
-    @staticmethod
-    def expand_datetime(df, datetime_col='DateTime', up_to='minute') -> pd.DataFrame:
+    # Tipos compactos para las partes de calendario (``compact=True``)
+    CALENDAR_DTYPES = {
+        'year': 'int16',
+        'month': 'int8',
+        'day': 'int8',
+        'hour': 'int8',
+        'minute': 'int8',
+        'second': 'int8',
+    }
+
+    @classmethod
+    def expand_datetime(cls, df, datetime_col='DateTime', up_to='minute', compact: bool = False) -> pd.DataFrame:
+        """Agrega las columnas de calendario (``year`` ... ``up_to``).
+
+        El DataFrame de entrada no se copia: solo se agregan columnas a una
+        vista superficial. Con ``compact=True`` las columnas usan ``int16``
+        (año) e ``int8`` (resto) en lugar de enteros de 32/64 bits.
+        """
         levels = ['year', 'month', 'day', 'hour', 'minute', 'second']
         extractors = {
             'year': lambda x: x.dt.year,
@@ -40,11 +105,16 @@ class Transformer:
         if datetime_col not in df.columns:
             raise ValueError(f"Columna '{datetime_col}' no encontrada.")
 
-        df = df.copy()
+        df = df.copy(deep=False)
         df[datetime_col] = pd.to_datetime(df[datetime_col], errors='coerce')
+        has_nat = df[datetime_col].isna().any()
 
         for level in levels[:levels.index(up_to) + 1]:
-            df[level] = extractors[level](df[datetime_col])
+            values = extractors[level](df[datetime_col])
+            if compact:
+                dtype = cls.CALENDAR_DTYPES[level]
+                values = values.astype(dtype.capitalize() if has_nat else dtype)
+            df[level] = values
 
         return df
 
@@ -52,36 +122,384 @@ class Transformer:
     def rename_columns(df: pd.DataFrame, rename_dict: dict) -> pd.DataFrame:
         return df.rename(columns=rename_dict)
 
+    # Partes de fecha que componen cada clave de texto, unidas con "_"
+    KEY_FORMATS = {
+        'key': ('d', 'mo', 'y', 'h'),
+        'key_m': ('d', 'mo', 'y', 'h', 'mi'),
+        'key_month': ('mo', 'y'),
+    }
+
+    # Textos de dos dígitos ("00".."99") para componer claves sin strftime
+    _TWO_DIGITS = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+
+    @staticmethod
+    def _datetime_parts(values: np.ndarray) -> dict[str, np.ndarray]:
+        """Descompone un arreglo ``datetime64`` en año, mes, día, hora y
+        minuto usando solo aritmética entera de NumPy."""
+        minutes = values.astype('datetime64[m]')
+        days = minutes.astype('datetime64[D]')
+        months = minutes.astype('datetime64[M]')
+        minute_of_day = (minutes - days).astype(np.int64)
+        return {
+            'y': minutes.astype('datetime64[Y]').astype(np.int64) + 1970,
+            'mo': months.astype(np.int64) % 12 + 1,
+            'd': (days - months).astype(np.int64) + 1,
+            'h': minute_of_day // 60,
+            'mi': minute_of_day % 60,
+        }
+
+    @staticmethod
+    def _key_ints(parts: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """Claves como enteros ordenables: ``YYYYMMDDHH``, ``YYYYMMDDHHMM`` y ``YYYYMM``."""
+        key = ((parts['y'] * 100 + parts['mo']) * 100 + parts['d']) * 100 + parts['h']
+        return {
+            'key': key,
+            'key_m': key * 100 + parts['mi'],
+            'key_month': parts['y'] * 100 + parts['mo'],
+        }
+
     @staticmethod
-    def calculate_keys(df: pd.DataFrame, datetime_col='DateTime') -> pd.DataFrame:
+    def _int_parts(name: str, ints: np.ndarray) -> dict[str, np.ndarray]:
+        """Operación inversa de :meth:`_key_ints` para una clave."""
+        if name == 'key_month':
+            return {'y': ints // 100, 'mo': ints % 100}
+        if name == 'key':
+            ints = ints * 100
+        return {
+            'y': ints // 100_000_000,
+            'mo': ints // 1_000_000 % 100,
+            'd': ints // 10_000 % 100,
+            'h': ints // 100 % 100,
+            'mi': ints % 100,
+        }
+
+    @classmethod
+    def _render_key(cls, name: str, ints: np.ndarray, valid: np.ndarray, key_format: str):
+        """Convierte claves enteras a texto formateando solo los valores únicos."""
+        codes = np.full(len(ints), -1, dtype=np.int64)
+        codes[valid], uniques = pd.factorize(ints[valid], sort=True)
+        parts = cls._int_parts(name, np.asarray(uniques, dtype=np.int64))
+        pieces = [
+            parts[part].astype(str).astype(object) if part == 'y' else cls._TWO_DIGITS[parts[part]]
+            for part in cls.KEY_FORMATS[name]
+        ]
+        labels = pieces[0]
+        for piece in pieces[1:]:
+            labels = labels + "_" + piece
+        categorical = pd.Categorical.from_codes(codes, categories=labels)
+        if key_format == 'category':
+            return categorical
+        return categorical.astype(pd.Index(labels).dtype)
+
+    @classmethod
+    def calculate_keys(cls, df: pd.DataFrame, datetime_col='DateTime', key_format: str = 'str') -> pd.DataFrame:
+        """Genera las claves ``key`` (hora), ``key_m`` (minuto) y ``key_month``.
+
+        Las claves se derivan aritméticamente de la representación entera de
+        ``datetime64``; el texto solo se genera una vez por valor único.
+
+        Args:
+            key_format (str): ``'str'`` (texto, p. ej. ``'01_01_2024_10'``),
+                ``'category'`` (el mismo texto como ``Categorical``) o ``'int'``
+                (enteros ``YYYYMMDDHH``; ver :meth:`render_keys`).
+        """
+        if key_format not in ('str', 'category', 'int'):
+            raise ValueError("key_format debe ser 'str', 'category' o 'int'.")
+
         df = df.copy()
-        dt = df[datetime_col]
-        df["key"] = dt.dt.strftime('%d_%m_%Y') + "_" + dt.dt.hour.astype(str).str.zfill(2)
-        df["key_m"] = dt.dt.strftime('%d_%m_%Y') + "_" + dt.dt.hour.astype(str).str.zfill(2) + "_" + dt.dt.minute.astype(str).str.zfill(2)
-        df["key_month"] = dt.dt.strftime('%m_%Y')
+        values = pd.to_datetime(df[datetime_col]).to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(values)
+        ints = cls._key_ints(cls._datetime_parts(values))
+
+        for name, key_ints in ints.items():
+            if key_format == 'int':
+                df[name] = key_ints if valid.all() else pd.arrays.IntegerArray(key_ints, ~valid)
+            else:
+                df[name] = cls._render_key(name, key_ints, valid, key_format)
         return df
 
-    @staticmethod
-    def convert_units(df: pd.DataFrame, columns: list[str], factor: float = 1000.0) -> pd.DataFrame:
+    @classmethod
+    def render_keys(cls, df: pd.DataFrame, key_format: str = 'str') -> pd.DataFrame:
+        """Convierte a texto (o ``Categorical``) las claves generadas con
+        ``key_format='int'``, por ejemplo justo antes de cargarlas."""
         df = df.copy()
-        for col in columns:
-            if col in df.columns:
-                df[col] = df[col] / factor
+        for name in cls.KEY_FORMATS:
+            if name in df.columns and pd.api.types.is_integer_dtype(df[name]):
+                valid = df[name].notna().to_numpy()
+                ints = df[name].fillna(0).to_numpy(dtype=np.int64)
+                df[name] = cls._render_key(name, ints, valid, key_format)
         return df
 
+    # Patrón planta/métrica de las columnas de medidas (p. ej. ``UP1_Act_MWh``)
+    PLANT_METRIC_PATTERN = re.compile(r'(UP\d+)_(.*)')
+
+    @classmethod
+    def split_plant_metric(cls, column: str) -> tuple[str | None, str | None]:
+        """Separa ``'UP1_Act_MWh'`` en ``('UP1', 'Act_MWh')``."""
+        match = cls.PLANT_METRIC_PATTERN.match(column)
+        return (match.group(1), match.group(2)) if match else (None, None)
+
+    @classmethod
+    def melt_to_long(cls, df: pd.DataFrame, id_vars: list[str], value_vars: list[str],
+                     categorical: bool = True) -> pd.DataFrame:
+        """Convierte ``value_vars`` a formato largo (``Value``, ``Plant``, ``Metric``).
+
+        ``Plant`` y ``Metric`` se obtienen una sola vez por columna y se
+        repiten como códigos de un ``Categorical``; las columnas de
+        ``id_vars`` se replican con un único ``take``, y las de texto (claves)
+        como ``Categorical`` para no copiar cadenas. Con ``categorical=False``
+        se mantienen los tipos originales y ``Plant``/``Metric`` como texto.
+        """
+        n_rows = len(df)
+        rows = np.tile(np.arange(n_rows), len(value_vars))
+        ids = df[id_vars]
+        if categorical:
+            # Las claves de texto se replican como códigos, no como cadenas
+            text = [c for c in id_vars if pd.api.types.is_string_dtype(ids[c]) and not isinstance(ids[c].dtype, pd.CategoricalDtype)]
+            ids = ids.astype({c: 'category' for c in text})
+        long = ids.take(rows).reset_index(drop=True)
+
+        values = df[value_vars]
+        if values.shape[1] and len(set(values.dtypes)) == 1:
+            long['Value'] = values.to_numpy().ravel(order='F')
+        else:
+            long['Value'] = pd.concat([values[c] for c in value_vars], ignore_index=True) if value_vars else []
+
+        for position, name in enumerate(['Plant', 'Metric']):
+            labels = [cls.split_plant_metric(c)[position] for c in value_vars]
+            categories = list(dict.fromkeys(label for label in labels if label is not None))
+            codes = np.array([categories.index(l) if l is not None else -1 for l in labels], dtype=np.int64)
+            column = pd.Categorical.from_codes(np.repeat(codes, n_rows), categories=categories)
+            long[name] = column if categorical else column.astype(object)
+        return long
+
     @staticmethod
-    def melt_to_long(df: pd.DataFrame, id_vars: list[str], value_vars: list[str]) -> pd.DataFrame:
-        df = df.copy()
-        df = df.melt(
-            id_vars=id_vars,
-            value_vars=value_vars,
-            var_name='plant_metric',
-            value_name='Value'
+    def resample_to_grid(df: pd.DataFrame, freq: str = '1min', max_gap: str | None = '5min',
+                         datetime_col: str = 'DateTime', flag_col: str = 'long_gap') -> pd.DataFrame:
+        """Lleva ``df`` a una malla regular de paso ``freq``.
+
+        Cada marca de tiempo se ajusta al punto de malla más cercano (si dos
+        caen en el mismo, prevalece la última) y los puntos sin lectura se
+        agregan con nulos. En cada columna numérica los huecos cuyas lecturas
+        válidas vecinas distan a lo sumo ``max_gap`` se interpolan
+        linealmente en el tiempo; el resto (huecos largos, inicio y final
+        sin vecino) queda nulo y se marca en ``flag_col``. Con
+        ``max_gap=None`` se interpolan todos los huecos interiores, sin
+        límite; ``max_gap='0min'`` no interpola ninguno. Todo se calcula con
+        arreglos de NumPy, sin agrupar por periodo.
+        """
+        step = pd.Timedelta(freq).value
+        limit = pd.Timedelta(max_gap).value if max_gap is not None else None
+        times = df[datetime_col].to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(times)
+        if not valid.all():
+            df, times = df[valid], times[valid]
+        if not len(df):
+            return df.assign(**{flag_col: pd.Series(dtype=bool)})
+
+        slots = (times.astype(np.int64) + step // 2) // step
+        start = slots.min()
+        n = int(slots.max() - start + 1)
+        # Última lectura de cada punto de malla
+        _, last = np.unique(slots[::-1], return_index=True)
+        rows = len(slots) - 1 - last
+        grid = df.iloc[rows].set_axis(slots[rows] - start).reindex(np.arange(n))
+        grid[datetime_col] = ((start + np.arange(n)) * step).astype('datetime64[ns]')
+
+        positions = np.arange(n)
+        flag = np.zeros(n, dtype=bool)
+        for col in grid.columns:
+            if col == datetime_col or not pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+                continue
+            values = grid[col].to_numpy(dtype=float, copy=True)
+            ok = ~np.isnan(values)
+            if ok.all():
+                continue
+            # Lectura válida anterior y siguiente de cada punto
+            prev = np.maximum.accumulate(np.where(ok, positions, -1))
+            nxt = np.minimum.accumulate(np.where(ok, positions, n)[::-1])[::-1]
+            fill = ~ok & (prev >= 0) & (nxt < n)
+            if limit is not None:
+                fill &= (nxt - prev) * step <= limit
+            if fill.any():
+                known = np.flatnonzero(ok)
+                values[fill] = np.interp(positions[fill], known, values[known])
+            grid[col] = values
+            flag |= ~ok & ~fill
+        grid[flag_col] = flag
+        return grid.reset_index(drop=True)
+
+    @classmethod
+    def derive_insolation(cls, df: pd.DataFrame, datetime_col: str = 'DateTime') -> pd.DataFrame:
+        """Calcula ``UPn_Ins_kWh_m2`` integrando ``UPn_Irr_W_m2`` en el tiempo.
+
+        La insolación de cada intervalo es la integral trapezoidal de la
+        irradiancia desde la lectura anterior (``df`` ordenado por
+        ``datetime_col``, p. ej. tras :meth:`resample_to_grid`). Solo se
+        completan los valores que faltan: si la columna de insolación existe,
+        sus lecturas se conservan.
+        """
+        irradiance = [c for c in df.columns if cls.split_plant_metric(c)[1] == 'Irr_W_m2']
+        if not irradiance or len(df) < 2:
+            return df
+        times = df[datetime_col].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        hours = np.diff(times, prepend=2 * times[0] - times[1]) / 3.6e12
+        df = df.copy(deep=False)
+        for col in irradiance:
+            irr = df[col].to_numpy(dtype=float)
+            previous = np.concatenate([irr[:1], irr[:-1]])
+            insolation = (irr + previous) / 2 * hours / 1000
+            target = f"{cls.split_plant_metric(col)[0]}_Ins_kWh_m2"
+            if target in df.columns:
+                insolation = df[target].fillna(pd.Series(insolation, index=df.index))
+            df[target] = insolation
+        return df
+
+    # Periodos de agregación (unidades de ``datetime64``) y agregados calculados:
+    # la suma para la energía y media/mín/máx para la meteorología
+    ROLLUP_FREQS = ('h', 'D', 'M')
+    ROLLUP_AGGS = {'sum': 'Sum', 'count': 'Count', 'mean': 'Mean', 'min': 'Min', 'max': 'Max'}
+    ROLLUP_ENERGY_AGGS = ('sum', 'count')
+    ROLLUP_METEO_AGGS = ('count', 'mean', 'min', 'max')
+
+    @classmethod
+    def _rollup_meteo_columns(cls, df: pd.DataFrame) -> list[str]:
+        return [
+            c for c in df.columns
+            if c != 'Value' and cls.split_plant_metric(c)[0] is not None and pd.api.types.is_numeric_dtype(df[c])
+        ]
+
+    @classmethod
+    def rollup_columns(cls, df: pd.DataFrame) -> list[str]:
+        """Columnas de ``df`` que usa :meth:`rollup`."""
+        return ['DateTime', 'Plant', 'Metric', 'Value', *cls._rollup_meteo_columns(df)]
+
+    @staticmethod
+    def _buckets(values, freq: str) -> np.ndarray:
+        return np.asarray(values, dtype='datetime64[ns]').astype(f'datetime64[{freq}]').astype('datetime64[ns]')
+
+    @classmethod
+    def rollup(cls, df: pd.DataFrame, freq: str = 'h') -> pd.DataFrame:
+        """Agrega un DataFrame largo (``melt_energy``) por periodo.
+
+        ``Value`` se agrega por ``Plant``/``Metric`` y las columnas numéricas
+        de planta restantes (meteorología como ``UP1_Tamb_C``, replicada en
+        cada fila de energía) se agregan una sola vez por marca de tiempo,
+        con ``Plant``/``Metric`` tomados de su nombre. ``DateTime`` pasa a ser el
+        inicio del periodo, truncado con aritmética de ``datetime64``
+        (``freq``: ``'h'``, ``'D'`` o ``'M'``). La energía lleva ``Sum`` y
+        ``Count``; la meteorología ``Count``, ``Mean``, ``Min`` y ``Max``. Los
+        agregados que no aplican quedan nulos.
+        """
+        if freq not in cls.ROLLUP_FREQS:
+            raise ValueError(f"freq debe ser uno de {cls.ROLLUP_FREQS}.")
+        bucket = cls._buckets(df['DateTime'], freq)
+
+        energy = (
+            pd.DataFrame({'Plant': df['Plant'], 'Metric': df['Metric'], 'DateTime': bucket, 'Value': df['Value']})
+            .groupby(['Plant', 'Metric', 'DateTime'], observed=True, sort=False)['Value']
+            .agg(list(cls.ROLLUP_ENERGY_AGGS))
+            .reset_index()
         )
-        df[['Plant', 'Metric']] = df['plant_metric'].str.extract(r'(UP\d+)_(.*)')
-        df.drop(columns='plant_metric', inplace=True)
+
+        meteo_cols = cls._rollup_meteo_columns(df)
+        frames = [energy]
+        if meteo_cols:
+            first = ~df['DateTime'].duplicated().to_numpy()
+            meteo = df.loc[first, meteo_cols].set_axis(pd.Index(bucket[first], name='DateTime'))
+            meteo = meteo.groupby(level='DateTime', sort=False).agg(list(cls.ROLLUP_METEO_AGGS))
+            meteo = meteo.stack(level=0, future_stack=True).rename_axis(['DateTime', 'column']).reset_index()
+            names = {c: cls.split_plant_metric(c) for c in meteo_cols}
+            meteo.insert(0, 'Plant', meteo['column'].map(lambda c: names[c][0]))
+            meteo.insert(1, 'Metric', meteo['column'].map(lambda c: names[c][1]))
+            frames.append(meteo.drop(columns='column'))
+
+        result = pd.concat(frames, ignore_index=True).rename(columns=cls.ROLLUP_AGGS)
+        return cls._rollup_result(result)
+
+    @classmethod
+    def _rollup_result(cls, result: pd.DataFrame) -> pd.DataFrame:
+        result = result.reindex(columns=['DateTime', 'Plant', 'Metric', *cls.ROLLUP_AGGS.values()])
+        result['Count'] = result['Count'].astype(np.int64)
+        for col in cls.ROLLUP_AGGS.values():
+            if col != 'Count':
+                result[col] = result[col].astype(np.float64)
+        for col in ('Plant', 'Metric'):
+            result[col] = result[col].astype('category')
+        return result
+
+    @classmethod
+    def coarsen_rollup(cls, df: pd.DataFrame, freq: str) -> pd.DataFrame:
+        """Agrega un resultado de :meth:`rollup` a un periodo mayor (p. ej. horas a días).
+
+        ``Sum``, ``Count``, ``Min`` y ``Max`` se componen directamente y
+        ``Mean`` es la media de las medias ponderada por ``Count``, de modo
+        que el resultado coincide con ``rollup(filas, freq)``.
+        """
+        if freq not in cls.ROLLUP_FREQS:
+            raise ValueError(f"freq debe ser uno de {cls.ROLLUP_FREQS}.")
+        with_mean = df['Mean'].notna()
+        parts = pd.DataFrame({
+            'Plant': df['Plant'], 'Metric': df['Metric'], 'DateTime': cls._buckets(df['DateTime'], freq),
+            'Sum': df['Sum'], 'Count': df['Count'], 'Min': df['Min'], 'Max': df['Max'],
+            '_weighted': df['Mean'] * df['Count'], '_weight': df['Count'].where(with_mean, 0),
+        })
+        result = parts.groupby(['Plant', 'Metric', 'DateTime'], observed=True, sort=False).agg(
+            Sum=('Sum', lambda s: s.sum(min_count=1)), Count=('Count', 'sum'),
+            Min=('Min', 'min'), Max=('Max', 'max'),
+            _weighted=('_weighted', lambda s: s.sum(min_count=1)), _weight=('_weight', 'sum'),
+        ).reset_index()
+        result['Mean'] = result['_weighted'] / result['_weight'].where(result['_weight'] > 0)
+        return cls._rollup_result(result)
+
+    @staticmethod
+    def compact_dtypes(df: pd.DataFrame, rtol: float = 1e-6, max_category_ratio: float = 0.5) -> pd.DataFrame:
+        """Reduce la memoria de ``df`` con tipos más pequeños.
+
+        - ``float64`` pasa a ``float32`` si todos los valores se conservan
+          con un error relativo menor que ``rtol``.
+        - Los enteros se reducen al menor tipo que los contiene (p. ej. las
+          partes de calendario a ``int8``/``int16``).
+        - Las columnas de texto con a lo sumo ``max_category_ratio`` valores
+          distintos por fila pasan a ``Categorical``.
+        """
+        compacted = {}
+        for col in df.columns:
+            series = df[col]
+            if series.dtype == np.float64:
+                values = series.to_numpy()
+                with np.errstate(over='ignore'):
+                    small = values.astype(np.float32)
+                if np.allclose(small, values, rtol=rtol, atol=0, equal_nan=True):
+                    compacted[col] = pd.Series(small, index=df.index, name=col)
+            elif pd.api.types.is_integer_dtype(series.dtype):
+                compacted[col] = pd.to_numeric(series, downcast='integer')
+            elif (pd.api.types.is_string_dtype(series.dtype) and len(series)
+                  and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+                  and series.nunique() <= max_category_ratio * len(series)):
+                compacted[col] = series.astype('category')
+        if not compacted:
+            return df
+        df = df.copy(deep=False)
+        for col, series in compacted.items():
+            df[col] = series
         return df
 
+    @staticmethod
+    def transform_chunks(
+        chunks: Iterable[pd.DataFrame],
+        steps: list[Callable[[pd.DataFrame], pd.DataFrame]],
+    ) -> Iterator[pd.DataFrame]:
+        """Aplica ``steps`` en orden a cada lote de ``chunks`` de forma perezosa.
+
+        Solo deben usarse pasos que operen fila a fila (p. ej.
+        ``standardize_datetime``, ``expand_datetime`` o ``rename_columns``).
+        """
+        for chunk in chunks:
+            for step in steps:
+                chunk = step(chunk)
+            yield chunk
+
     # ------------------------------------------------------------------
     # Métodos de instancia utilizados por el pipeline
     # ------------------------------------------------------------------
@@ -90,12 +508,12 @@ class Transformer:
         """Une una lista de DataFrames de PVSyst en uno solo."""
         return pd.concat(dfs, ignore_index=True)
 
-    def generate_keys(self, data_dict: dict) -> dict:
+    def generate_keys(self, data_dict: dict, key_format: str = 'str') -> dict:
         """Genera columnas de claves para todos los DataFrames que contengan
         ``DateTime``."""
         for key, df in data_dict.items():
             if isinstance(df, pd.DataFrame) and 'DateTime' in df.columns:
-                data_dict[key] = self.calculate_keys(df, datetime_col='DateTime')
+                data_dict[key] = self.calculate_keys(df, datetime_col='DateTime', key_format=key_format)
         return data_dict
 
     def convert_units(self, df: pd.DataFrame, columns: list[str] | None = None, factor: float = 1000.0) -> pd.DataFrame:
@@ -106,11 +524,65 @@ class Transformer:
         """
         if columns is None:
             columns = [c for c in df.columns if c.endswith('_MWh') or c.endswith('_MVArh')]
-        return self.__class__.convert_units(df, columns=columns, factor=factor)
+        df = df.copy()
+        for col in columns:
+            if col in df.columns:
+                df[col] = df[col] / factor
+        return df
+
+    # Modos de unión de energía y meteorología
+    MERGE_MODES = ('exact', 'asof')
+
+    # Filas, filas emparejadas y tasa de la última unión
+    merge_stats: dict | None = None
+
+    def merge_energy_meteo(self, energia: pd.DataFrame, meteo: pd.DataFrame, how: str = 'exact',
+                           tolerance: str | pd.Timedelta | None = None, direction: str = 'nearest',
+                           columns: list[str] | None = None) -> pd.DataFrame:
+        """Une los DataFrames de energía y meteorología por ``DateTime``.
+
+        Las columnas derivadas de ``DateTime`` que ambos comparten (claves y
+        calendario) se toman solo de ``energia`` para no duplicarlas con
+        sufijos ``_x``/``_y``. Si se indica ``columns`` solo se toman esas
+        columnas de ``meteo``.
+
+        Con ``how='exact'`` se hace un *inner join* por marca de tiempo
+        exacta. Con ``how='asof'`` cada fila de energía toma la lectura
+        meteorológica más cercana según ``direction`` (``'backward'``,
+        ``'forward'`` o ``'nearest'``) dentro de ``tolerance``; ambas series
+        ya vienen ordenadas, por lo que la unión es un recorrido lineal. Las
+        filas de energía sin lectura cercana se conservan con nulos. La tasa
+        de filas emparejadas queda en ``merge_stats``.
+        """
+        if how not in self.MERGE_MODES:
+            raise ValueError(f"how debe ser uno de {self.MERGE_MODES}.")
+        if columns is None:
+            columns = [c for c in meteo.columns if c not in energia.columns]
+        meteo = meteo[['DateTime'] + [c for c in columns if c != 'DateTime']]
+
+        if how == 'exact':
+            merged = pd.merge(energia, meteo, on='DateTime')
+            matched = len(merged)
+        else:
+            # merge_asof exige claves sin nulos y ordenadas
+            energia = energia[energia['DateTime'].notna()]
+            meteo = meteo[meteo['DateTime'].notna()]
+            if not energia['DateTime'].is_monotonic_increasing:
+                energia = energia.sort_values('DateTime', kind='stable')
+            if not meteo['DateTime'].is_monotonic_increasing:
+                meteo = meteo.sort_values('DateTime', kind='stable')
+            # Marca de coincidencia para contar las filas emparejadas
+            meteo = meteo.assign(_matched=True)
+            merged = pd.merge_asof(
+                energia, meteo, on='DateTime', direction=direction,
+                tolerance=pd.Timedelta(tolerance) if tolerance is not None else None,
+            )
+            matched = int(merged.pop('_matched').notna().sum())
 
-    def merge_energy_meteo(self, energia: pd.DataFrame, meteo: pd.DataFrame) -> pd.DataFrame:
-        """Une los DataFrames de energía y meteorología por ``DateTime``."""
-        return pd.merge(energia, meteo, on='DateTime')
+        rate = matched / len(energia) if len(energia) else 1.0
+        self.merge_stats = {'how': how, 'rows': len(energia), 'matched': matched, 'match_rate': rate}
+        print(f"🔗 Unión {how}: {matched}/{len(energia)} filas de energía con meteo ({rate:.1%})")
+        return merged
 
     def melt_energy(self, df: pd.DataFrame) -> pd.DataFrame:
         """Convierte a formato largo los datos de energía."""
@@ -134,6 +606,6 @@ def standardize_datetime(df, date_col='Date', time_col='Time', datetime_col='Dat
     return DataTransformer.standardize_datetime(df, date_col=date_col, time_col=time_col, datetime_col=datetime_col)
 
 
-def expand_datetime(df, datetime_col='DateTime', up_to='minute') -> pd.DataFrame:
+def expand_datetime(df, datetime_col='DateTime', up_to='minute', compact: bool = False) -> pd.DataFrame:
     """Wrapper para compatibilidad con los tests."""
-    return DataTransformer.expand_datetime(df, datetime_col=datetime_col, up_to=up_to)
+    return DataTransformer.expand_datetime(df, datetime_col=datetime_col, up_to=up_to, compact=compact)
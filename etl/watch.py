@@ -0,0 +1,114 @@
+import os
+import time
+
+from etl.pipeline import ETLPipeline
+
+
+class SourceWatcher:
+    """
+    Vigila los archivos de entrada de un :class:`~etl.pipeline.ETLPipeline`
+    y lo vuelve a ejecutar cuando alguno cambia.
+
+    Los cambios se detectan por sondeo del tamaño y la fecha de
+    modificación de cada archivo (unas pocas llamadas a ``os.stat`` por
+    intervalo, sin dependencias adicionales). Un archivo modificado se da
+    por completo cuando su estado no cambia durante ``settle`` segundos, de
+    modo que no se lee un Excel a medio guardar.
+
+    El pipeline debe crearse con ``keep_hot=True``: sus etapas conservan las
+    salidas en memoria y el motor de base de datos mantiene su pool de
+    conexiones, por lo que cada cambio solo relee el archivo modificado y
+    recalcula las etapas que dependen de él. Con ``incremental=True`` y
+    ``load_mode="upsert"`` solo se cargan las filas nuevas.
+
+    Si una ejecución falla, la misma versión de los archivos se reintenta
+    con espera exponencial (``interval`` × 2, × 4, ... hasta
+    ``max_backoff`` segundos); un nuevo cambio en los archivos se procesa
+    de inmediato.
+    """
+
+    def __init__(self, pipeline: ETLPipeline, interval: float = 1.0, settle: float = 0.5,
+                 max_backoff: float = 300.0) -> None:
+        if pipeline.stage_memory is None:
+            raise ValueError("El pipeline debe crearse con keep_hot=True.")
+        self.pipeline = pipeline
+        self.interval = interval
+        self.settle = settle
+        self.max_backoff = max_backoff
+        self._state: dict[str, tuple[int, int] | None] | None = None
+        # Estado de los archivos en el último fallo y cuándo reintentarlo
+        self._failed_state: dict[str, tuple[int, int] | None] | None = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def snapshot(self) -> dict[str, tuple[int, int] | None]:
+        """Tamaño y fecha de modificación de cada archivo (``None`` si no existe)."""
+        state = {}
+        for name, path in self.pipeline.file_paths.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                state[name] = None
+            else:
+                state[name] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def changes(self) -> tuple[list[str], dict[str, tuple[int, int] | None]]:
+        """Fuentes modificadas desde la última ejecución, una vez estables, y su estado."""
+        state = self.snapshot()
+        if self._state is None:
+            return list(state), state
+        changed = [name for name in state if state[name] != self._state.get(name)]
+        while changed and self.settle:
+            time.sleep(self.settle)
+            settled = self.snapshot()
+            if settled == state:
+                break
+            state = settled
+            changed = [name for name in state if state[name] != self._state.get(name)]
+        return changed, state
+
+    def refresh(self) -> list[str]:
+        """
+        Ejecuta el pipeline si alguna fuente cambió (siempre en la primera
+        llamada). Un error se informa y no detiene la vigilancia: la misma
+        versión de los archivos se reintenta cuando vence la espera
+        exponencial, o antes si vuelven a cambiar.
+
+        Returns:
+            list[str]: Fuentes que cambiaron (vacía si no hubo ejecución).
+        """
+        if (self._failed_state is not None and time.monotonic() < self._retry_at
+                and self.snapshot() == self._failed_state):
+            return []
+        changed, state = self.changes()
+        if not changed:
+            return []
+        print(f"🔄 Cambios detectados: {', '.join(changed)}")
+        start = time.perf_counter()
+        try:
+            self.pipeline.run()
+        except Exception as e:
+            self._failures = self._failures + 1 if state == self._failed_state else 1
+            self._failed_state = state
+            delay = min(self.interval * 2 ** self._failures, self.max_backoff)
+            self._retry_at = time.monotonic() + delay
+            print(f"❌ Error al actualizar: {e} (reintento en {delay:.0f} s)")
+            return changed
+        self._state = state
+        self._failed_state, self._failures = None, 0
+        print(f"⚡ Actualizado en {time.perf_counter() - start:.2f} s")
+        return changed
+
+    def run(self, max_polls: int | None = None) -> None:
+        """Vigila las fuentes hasta interrumpirse (o ``max_polls`` sondeos)."""
+        print(f"👀 Vigilando {len(self.pipeline.file_paths)} archivos cada {self.interval} s...")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                self.refresh()
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("⏹️ Vigilancia detenida.")
@@ -1,5 +1,8 @@
+import argparse
 import os
+from etl.metrics import MetricsRecorder
 from etl.pipeline import ETLPipeline
+from etl.watch import SourceWatcher
 
 # Puedes usar dotenv si decides guardar las rutas en un .env
 # from dotenv import load_dotenv
@@ -17,8 +20,27 @@ file_paths = {
 }
 
 def main():
+    parser = argparse.ArgumentParser(description="Pipeline ETL para Power BI")
+    parser.add_argument("--watch", action="store_true",
+                        help="Vigilar los archivos de entrada y recargar solo lo que cambie")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Segundos entre comprobaciones en modo --watch (por defecto 1)")
+    args = parser.parse_args()
+
     print("🚀 Iniciando pipeline ETL para Power BI...")
-    pipeline = ETLPipeline(file_paths)
+    metrics = None
+    if os.getenv("ETL_METRICS_FILE") or os.getenv("ETL_PROMETHEUS_FILE") or os.getenv("ETL_PROFILE_DIR"):
+        metrics = MetricsRecorder(
+            jsonl_path=os.getenv("ETL_METRICS_FILE"),
+            prometheus_path=os.getenv("ETL_PROMETHEUS_FILE"),
+            profile_dir=os.getenv("ETL_PROFILE_DIR"),
+            profiler=os.getenv("ETL_PROFILER", "cprofile"),
+        )
+    if args.watch:
+        pipeline = ETLPipeline(file_paths, metrics=metrics, keep_hot=True, incremental=True, load_mode="upsert")
+        SourceWatcher(pipeline, interval=args.interval).run()
+        return
+    pipeline = ETLPipeline(file_paths, metrics=metrics)
     pipeline.run()
 
 if __name__ == "__main__":
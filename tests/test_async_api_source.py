@@ -0,0 +1,99 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("ijson")
+
+from etl.sources.async_api_source import AsyncAPISource
+
+
+class _StubAPI(BaseHTTPRequestHandler):
+    """API de prueba: dos páginas por planta con cursor, ETag y gzip."""
+
+    protocol_version = "HTTP/1.1"
+    hits: list = []
+    fail_once: set = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        plant, cursor = query.get("plant", "UP1"), query.get("cursor")
+        self.hits.append((plant, cursor, self.headers.get("If-None-Match")))
+
+        if plant in self.fail_once:
+            self.fail_once.discard(plant)
+            return self._send(503, headers={"Retry-After": "0"})
+
+        etag = f'"{plant}-{cursor}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+
+        page = 0 if cursor is None else 1
+        records = [{"DateTime": f"2025-01-01 00:0{page * 2 + i}", "Plant": plant, "Value": page * 2 + i}
+                   for i in range(2)]
+        payload = {"results": records, "next_cursor": "p2" if page == 0 else None}
+        self._send(200, gzip.compress(json.dumps(payload).encode()), {
+            "Content-Type": "application/json", "Content-Encoding": "gzip", "ETag": etag,
+        })
+
+
+@pytest.fixture
+def stub_api():
+    _StubAPI.hits, _StubAPI.fail_once = [], set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/data"
+    server.shutdown()
+    server.server_close()
+
+
+def _source(url, **kwargs):
+    return AsyncAPISource(url, records_path="results.item", cursor_path="next_cursor",
+                          max_concurrency=2, backoff=0, **kwargs)
+
+
+def test_load_follows_cursor_across_concurrent_requests(stub_api):
+    _StubAPI.fail_once = {"UP2"}
+    source = _source(stub_api)
+
+    df = source.load([{"plant": "UP1"}, {"plant": "UP2"}, {"plant": "UP3"}])
+
+    assert df["Plant"].tolist() == ["UP1"] * 4 + ["UP2"] * 4 + ["UP3"] * 4
+    assert df["Value"].tolist() == [0, 1, 2, 3] * 3
+    assert source.stats["retries"] == 1
+    assert len(_StubAPI.hits) == 7
+
+
+def test_load_revalidates_cached_pages_with_etag(stub_api, tmp_path):
+    _source(stub_api, cache_dir=str(tmp_path)).load([{"plant": "UP1"}])
+    _StubAPI.hits = []
+
+    source = _source(stub_api, cache_dir=str(tmp_path))
+    df = source.load([{"plant": "UP1"}])
+
+    assert df["Value"].tolist() == [0, 1, 2, 3]
+    assert source.stats["not_modified"] == 2
+    assert [etag for _, _, etag in _StubAPI.hits] == ['"UP1-None"', '"UP1-p2"']
+
+
+def test_plan_requests_splits_plants_and_windows():
+    requests = AsyncAPISource.plan_requests(["UP1", "UP2"], "2025-01-01", "2025-01-10", freq="7D")
+
+    assert len(requests) == 4
+    assert requests[1] == {"plant": "UP1", "start": "2025-01-08T00:00:00", "end": "2025-01-10T00:00:00"}
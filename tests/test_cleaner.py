@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from etl.cleaner import fill_missing_values, remove_outliers
+from etl.cleaner import DataCleaner, fill_missing_values, remove_outliers
 
 
 def test_fill_missing_mean():
@@ -17,3 +17,34 @@ def test_remove_outliers():
     clean_df = remove_outliers(df, 'x', threshold=2)
     assert 3000 not in clean_df['x'].values
     assert len(clean_df) == 4
+
+
+def test_fill_missing_matches_per_column_groups():
+    df = pd.DataFrame({
+        'cat': ['a', 'a', 'b', 'b', 'b'],
+        'x': [1.0, None, 3.0, 5.0, None],
+        'y': [None, 2.0, None, 6.0, 8.0],
+    })
+    result = fill_missing_values(df, method='median', category_col='cat')
+    assert result['x'].tolist() == [1.0, 1.0, 3.0, 5.0, 4.0]
+    assert result['y'].tolist() == [2.0, 2.0, 7.0, 6.0, 8.0]
+
+
+def test_remove_outliers_many_columns():
+    df = pd.DataFrame({'a': [10, 12, 11, 9, 3000, 10], 'b': [5, 6, 5, 6, 5, -900]})
+    combined = DataCleaner.remove_outliers(df, ['a', 'b'], threshold=2)
+    strict = DataCleaner.remove_outliers(df, ['a', 'b'], threshold=2, strict=True)
+    sequential = remove_outliers(remove_outliers(df, 'a', threshold=2), 'b', threshold=2)
+    assert combined.index.tolist() == [0, 1, 2, 3]
+    pd.testing.assert_frame_equal(strict, sequential)
+
+
+def test_clean_copies_unless_in_place():
+    df = pd.DataFrame({'cat': ['a', 'a'], 'UP1_Exp_MWh': [-1.0, None], 'UP1_Act_MWh': [1.0, 1.0]})
+    result = DataCleaner.clean(df, category_col='cat', negative_columns=['UP1_Exp_MWh'],
+                               outlier_columns=['UP1_Act_MWh'])
+    assert result['UP1_Exp_MWh'].tolist() == [1.0, 1.0]
+    assert df['UP1_Exp_MWh'].isna().tolist() == [False, True]
+
+    DataCleaner.clean(df, category_col='cat', negative_columns=['UP1_Exp_MWh'], inplace=True)
+    assert df['UP1_Exp_MWh'].tolist() == [1.0, 1.0]
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+from etl.db_loader import DatabaseLoader
+
+
+@pytest.fixture
+def loader(tmp_path):
+    return DatabaseLoader(url=f"sqlite:///{tmp_path / 'etl.db'}", batch_size=2)
+
+
+def test_insert_dataframe_in_batches(loader):
+    df = pd.DataFrame({
+        'DateTime': pd.to_datetime(['2024-01-01 00:00', '2024-01-01 00:05', '2024-01-01 00:10']),
+        'Plant': ['UP1', 'UP1', 'UP2'],
+        'Value': [1.5, None, 3.0],
+    })
+    loader.insert_dataframe(df, 'energia_consolidada')
+    loader.insert_dataframe(df, 'energia_consolidada')
+
+    result = pd.read_sql_table('energia_consolidada', loader.engine)
+    assert len(result) == 6
+    assert result['Value'].isna().sum() == 2
+
+
+def test_insert_dataframe_raises_on_failure(loader):
+    df = pd.DataFrame({'x': [1]})
+    loader.insert_dataframe(df, 'tabla')
+    with pytest.raises(ValueError):
+        loader.insert_dataframe(df, 'tabla', if_exists='fail')
+
+
+def test_upsert_dataframe_is_idempotent(loader):
+    df = pd.DataFrame({
+        'key_m': ['01_01_2024_00_00', '01_01_2024_00_00'],
+        'Plant': ['UP1', 'UP2'],
+        'Metric': ['Act_MWh', 'Act_MWh'],
+        'Value': [1.0, 2.0],
+    })
+    loader.upsert_dataframe(df, 'energia_consolidada', keys=['key_m', 'Plant', 'Metric'])
+    df.loc[0, 'Value'] = 5.0
+    loader.upsert_dataframe(df, 'energia_consolidada', keys=['key_m', 'Plant', 'Metric'])
+
+    result = pd.read_sql_table('energia_consolidada', loader.engine).sort_values('Plant')
+    assert result['Value'].tolist() == [5.0, 2.0]
+
+
+def test_upsert_stages_in_a_temporary_table(loader, monkeypatch):
+    from sqlalchemy import inspect
+
+    staged = []
+    bulk_load = loader._bulk_load
+
+    def record(conn, df, table_name, batch_size):
+        staged.append((table_name, table_name in inspect(conn).get_temp_table_names()))
+        bulk_load(conn, df, table_name, batch_size)
+
+    monkeypatch.setattr(loader, '_bulk_load', record)
+    df = pd.DataFrame({'key_m': ['01_01_2024_00_00'], 'Plant': ['UP1'], 'Value': [1.0]})
+    for _ in range(2):
+        loader.upsert_dataframe(df, 'energia_consolidada', keys=['key_m', 'Plant'])
+
+    assert all(temporary for _, temporary in staged)
+    assert len({name for name, _ in staged}) == 2
+    assert inspect(loader.engine).get_table_names() == ['energia_consolidada']
+
+
+def test_upsert_rejects_table_with_duplicate_keys(loader):
+    df = pd.DataFrame({'key_m': ['01_01_2024_00_00'], 'Plant': ['UP1'], 'Value': [1.0]})
+    loader.insert_dataframe(df, 'energia_consolidada')
+    loader.insert_dataframe(df, 'energia_consolidada')
+
+    with pytest.raises(ValueError, match="claves duplicadas"):
+        loader.upsert_dataframe(df, 'energia_consolidada', keys=['key_m', 'Plant'])
+    assert len(pd.read_sql_table('energia_consolidada', loader.engine)) == 2
+
+
+def test_compact_dtypes_do_not_narrow_the_table_schema(loader):
+    from sqlalchemy import inspect
+
+    first = pd.DataFrame({'Value': pd.Series([1, 2], dtype='int16'), 'Temp': pd.Series([30.5], dtype='float32')})
+    loader.insert_dataframe(first, 'energia_consolidada')
+    loader.insert_dataframe(pd.DataFrame({'Value': [100_000], 'Temp': [30.123456789]}), 'energia_consolidada')
+
+    types = {c['name']: str(c['type']) for c in inspect(loader.engine).get_columns('energia_consolidada')}
+    assert types == {'Value': 'BIGINT', 'Temp': 'FLOAT'}
+    assert pd.read_sql_table('energia_consolidada', loader.engine)['Value'].max() == 100_000
+
+
+def test_engine_created_on_first_use_and_shared(tmp_path):
+    from etl import db_loader
+
+    url = f"sqlite:///{tmp_path / 'lazy.db'}"
+    first = DatabaseLoader(url=url)
+    assert url not in db_loader._ENGINES
+
+    second = DatabaseLoader(url=url)
+    assert first.engine is second.engine
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from benchmarks.synthetic import make_energia, make_meteo
+from etl.cleaner import DataCleaner
+from etl.duckdb_backend import DuckDBBackend
+from etl.mappings import rename_dicts
+from etl.transformer import Transformer
+
+
+def _pandas_chain(energia, meteo, how):
+    transformer = Transformer()
+    prepared = {}
+    for name, df in (("energia", energia), ("meteo", meteo)):
+        df = transformer.standardize_datetime(df, 'Date', 'Time', 'DateTime', source=name)
+        df = transformer.expand_datetime(df, 'DateTime')
+        df = df.rename(columns=rename_dicts[name])
+        prepared[name] = transformer.generate_keys({name: df})[name]
+    prepared["energia"] = transformer.convert_units(prepared["energia"])
+    merged = transformer.merge_energy_meteo(prepared["energia"], prepared["meteo"], how=how, tolerance='30s')
+    cleaned = DataCleaner.clean(
+        merged, category_col="key_month",
+        negative_columns=[c for c in merged.columns if "Imp" in c or "Exp" in c],
+        outlier_columns=[c for c in merged.columns if c.endswith("_Act_MWh")],
+    )
+    return cleaned, transformer.melt_energy(cleaned)
+
+
+def _normalize(df):
+    df = df.reset_index(drop=True).copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].astype("datetime64[ns]")
+    return df
+
+
+@pytest.mark.parametrize("how", ["exact", "asof"])
+@pytest.mark.parametrize("null_rate", [0.01, 0.1])  # dropna / relleno por grupo
+def test_duckdb_backend_matches_pandas(how, null_rate):
+    index = pd.date_range("2025-01-30", periods=3 * 24 * 60, freq="min")
+    energia = make_energia(index, null_rate=null_rate, outlier_rate=0.01)
+    meteo = make_meteo(index, null_rate=null_rate, outlier_rate=0.01)
+
+    expected, expected_long = _pandas_chain(energia, meteo, how)
+
+    backend = DuckDBBackend()
+    result = backend.consolidate(
+        energia, meteo, rename=rename_dicts, how=how, tolerance='30s',
+        negative_columns=lambda cols: [c for c in cols if "Imp" in c or "Exp" in c],
+        outlier_columns=lambda cols: [c for c in cols if c.endswith("_Act_MWh")],
+    )
+    value_vars = [c for c in result.columns if c.endswith(("_MWh", "_MVArh"))]
+    result_long = backend.melt(result, value_vars)
+
+    pd.testing.assert_frame_equal(_normalize(result), _normalize(expected), check_dtype=False)
+    order = ["Plant", "Metric", "DateTime"]
+    pd.testing.assert_frame_equal(
+        _normalize(result_long).sort_values(order, kind="stable").reset_index(drop=True),
+        _normalize(expected_long).sort_values(order, kind="stable").reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert isinstance(result_long["Plant"].dtype, pd.CategoricalDtype)
+
+
+def test_duckdb_backend_rejects_unsupported_options():
+    DuckDBBackend.check_options(strict_cleaning=False, shard_by_plant=False, resample=None)
+    with pytest.raises(ValueError, match="strict_cleaning, resample"):
+        DuckDBBackend.check_options(strict_cleaning=True, shard_by_plant=False, resample="1min")
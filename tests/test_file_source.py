@@ -0,0 +1,88 @@
+import os
+import pandas as pd
+import pytest
+from etl.sources.file_source import FileSource, FileCache
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "energia.csv"
+    pd.DataFrame({'Date': ['2024-01-01', '2024-01-02'], 'Value': [1.5, 2.5]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_cache_hit_after_first_load(csv_file, tmp_path):
+    source = FileSource(cache_dir=str(tmp_path / "cache"))
+    first = source.load_excel(csv_file)
+    second = source.load_excel(csv_file)
+    assert source.cache.stats == {'hits': 1, 'misses': 1}
+    pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+
+def test_cache_invalidated_when_file_changes(csv_file, tmp_path):
+    source = FileSource(cache_dir=str(tmp_path / "cache"))
+    source.load_excel(csv_file)
+    pd.DataFrame({'Date': ['2024-01-03'], 'Value': [9.0]}).to_csv(csv_file, index=False)
+    result = source.load_excel(csv_file)
+    assert source.cache.stats['misses'] == 2
+    assert result['Value'].tolist() == [9.0]
+
+
+def test_cache_eviction_respects_max_bytes(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=1)
+    cache.put('a', pd.DataFrame({'x': range(100)}))
+    cache.put('b', pd.DataFrame({'x': range(100)}))
+    assert os.listdir(cache.cache_dir) == []
+
+
+def test_cache_tolerates_entries_removed_by_other_workers(tmp_path, monkeypatch):
+    cache = FileCache(str(tmp_path / "cache"))
+    cache.put('a', pd.DataFrame({'x': range(3)}))
+
+    def vanished(path, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(pd, 'read_parquet', vanished)
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+    assert cache.stats == {'hits': 0, 'misses': 2}
+
+    listdir = os.listdir
+    monkeypatch.setattr(os, 'listdir', lambda path: listdir(path) + ['gone.parquet'])
+    cache.max_bytes = 0
+    cache.evict()
+    assert listdir(cache.cache_dir) == []
+
+
+@pytest.mark.parametrize("ext", ["csv", "xlsx"])
+def test_iter_chunks_matches_full_load(tmp_path, ext):
+    df = pd.DataFrame({'Date': ['2024-01-0%d' % i for i in range(1, 6)], 'Value': [1.0, 2.0, 3.0, 4.0, 5.0]})
+    path = str(tmp_path / f"meteo.{ext}")
+    if ext == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+    chunks = list(FileSource().iter_chunks(path, chunksize=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), FileSource().load_excel(path), check_dtype=False)
+
+
+@pytest.mark.parametrize("ext", ["csv", "xlsx"])
+def test_usecols_reads_only_requested_columns(tmp_path, ext):
+    df = pd.DataFrame({'Date': ['2024-01-01'], 'Value': [1.0], 'Extra': ['x']})
+    path = str(tmp_path / f"energia.{ext}")
+    if ext == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+    source = FileSource(cache_dir=str(tmp_path / "cache"))
+    pruned = source.load_excel(path, usecols=['Date', 'Value', 'Missing'])
+    full = source.load_excel(path)
+    chunks = list(source.iter_chunks(path, chunksize=1, usecols=['Value']))
+
+    assert pruned.columns.tolist() == ['Date', 'Value']
+    assert full.columns.tolist() == ['Date', 'Value', 'Extra']
+    assert source.cache.stats == {'hits': 0, 'misses': 2}
+    assert chunks[0].columns.tolist() == ['Value']
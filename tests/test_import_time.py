@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+# Módulos que no deben importarse al importar el pipeline
+LAZY_MODULES = ("sqlalchemy", "scipy", "dotenv", "duckdb", "httpx", "ijson", "concurrent.futures.process")
+
+# Tiempo máximo de importación propio del pipeline, sin pandas (µs)
+IMPORT_BUDGET_US = 200_000
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Tiempos acumulados (µs) de ``python -X importtime -c 'import module'``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_pipeline_import_is_lazy_and_within_budget():
+    times = _import_times("etl.pipeline")
+
+    assert not [m for m in LAZY_MODULES if m in times]
+    # pandas (que incluye NumPy) es imprescindible para cualquier ejecución
+    own = times["etl.pipeline"] - times.get("pandas", 0)
+    assert own < IMPORT_BUDGET_US
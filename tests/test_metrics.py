@@ -0,0 +1,75 @@
+import json
+import os
+import pandas as pd
+from etl.metrics import MetricsRecorder
+from etl.transformer import DataTransformer
+
+
+def test_track_records_rows_and_memory(tmp_path):
+    recorder = MetricsRecorder(
+        jsonl_path=str(tmp_path / "metrics.jsonl"),
+        prometheus_path=str(tmp_path / "etl.prom"),
+        profile_dir=str(tmp_path / "profiles"),
+    )
+    df = pd.DataFrame({'x': range(10)})
+    with recorder.track("filtrar", inputs=df) as result:
+        result["outputs"] = df[df['x'] > 4]
+    recorder.write_prometheus()
+
+    record = json.loads((tmp_path / "metrics.jsonl").read_text().splitlines()[0])
+    assert record["name"] == "filtrar"
+    assert record["rows_in"] == 10 and record["rows_out"] == 5
+    assert record["bytes_out"] > 0
+    assert os.path.exists(tmp_path / "profiles" / "filtrar.prof")
+    assert 'etl_wall_seconds{kind="stage",name="filtrar"}' in (tmp_path / "etl.prom").read_text()
+
+
+def test_instrumented_transformer_calls():
+    recorder = MetricsRecorder()
+    transformer = recorder.instrument(DataTransformer(), "transformer")
+    df = pd.DataFrame({'DateTime': pd.to_datetime(['2024-01-01 10:15:00'])})
+    result = transformer.calculate_keys(df)
+
+    assert 'key_m' in result.columns
+    assert [r["name"] for r in recorder.records] == ["transformer.calculate_keys"]
+    assert recorder.records[0]["kind"] == "call"
+
+
+def test_prometheus_aggregates_repeated_calls(tmp_path, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_resource(name, *args, **kwargs):
+        if name == "resource":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    recorder = MetricsRecorder(prometheus_path=str(tmp_path / "etl.prom"))
+    transformer = recorder.instrument(DataTransformer(), "transformer")
+    df = pd.DataFrame({'DateTime': pd.to_datetime(['2024-01-01 10:15:00', '2024-01-01 10:30:00'])})
+    transformer.calculate_keys(df)
+    monkeypatch.setattr(builtins, "__import__", no_resource)
+    transformer.calculate_keys(df)
+    recorder.write_prometheus()
+
+    assert recorder.records[1]["peak_rss_mb"] is None
+    samples = [line for line in (tmp_path / "etl.prom").read_text().splitlines() if not line.startswith("#")]
+    assert len(samples) == len(set(line.split(" ")[0] for line in samples))
+    assert 'etl_count{kind="call",name="transformer.calculate_keys"} 2' in samples
+    assert 'etl_rows_out{kind="call",name="transformer.calculate_keys"} 4' in samples
+
+
+def test_peak_rss_units_per_platform(monkeypatch):
+    import sys
+    import types
+    from etl import metrics
+
+    usage = types.SimpleNamespace(ru_maxrss=512 * 1024 * 1024)
+    fake = types.SimpleNamespace(RUSAGE_SELF=0, getrusage=lambda who: usage)
+    monkeypatch.setitem(sys.modules, "resource", fake)
+
+    monkeypatch.setattr(sys, "platform", "darwin")
+    assert metrics._peak_rss_mb() == 512.0
+    monkeypatch.setattr(sys, "platform", "linux")
+    assert metrics._peak_rss_mb() == 512.0 * 1024
@@ -0,0 +1,80 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from etl.parquet_sink import ParquetSink
+
+
+def _long(datetimes, values, plant='UP1'):
+    dt = pd.to_datetime(datetimes)
+    return pd.DataFrame({
+        'DateTime': dt,
+        'key_m': dt.strftime('%d_%m_%Y_%H_%M'),
+        'Value': values,
+        'Plant': pd.Categorical([plant] * len(dt)),
+        'Metric': pd.Categorical(['Act_MWh'] * len(dt)),
+    })
+
+
+def test_write_dataframe_partitions_by_plant_year_month(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    df = pd.concat([
+        _long(['2025-01-31 23:59', '2025-02-01 00:00'], [1.0, 2.0]),
+        _long(['2025-01-31 23:59'], [3.0], plant='UP2'),
+    ], ignore_index=True)
+
+    written = sink.write_dataframe(df, 'energia_consolidada', keys=['key_m', 'Plant', 'Metric'])
+
+    assert sorted(written) == [
+        os.path.join('Plant=UP1', 'year=2025', 'month=1'),
+        os.path.join('Plant=UP1', 'year=2025', 'month=2'),
+        os.path.join('Plant=UP2', 'year=2025', 'month=1'),
+    ]
+    path = tmp_path / 'energia_consolidada' / 'Plant=UP1' / 'year=2025' / 'month=1' / 'part-0.parquet'
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.row_group(0).column(metadata.schema.names.index('DateTime'))
+    assert column.compression == 'ZSTD'
+    assert column.statistics.has_min_max
+
+    result = pd.read_parquet(tmp_path / 'energia_consolidada')
+    assert len(result) == 3
+    assert sorted(result['Value']) == [1.0, 2.0, 3.0]
+
+
+def test_write_dataframe_rewrites_only_touched_partitions(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    keys = ['key_m', 'Plant', 'Metric']
+    sink.write_dataframe(_long(['2025-01-10 10:00', '2025-02-10 10:00'], [1.0, 2.0]), 'energia', keys=keys)
+    january = tmp_path / 'energia' / 'Plant=UP1' / 'year=2025' / 'month=1' / 'part-0.parquet'
+    before = os.stat(january).st_mtime_ns
+
+    # Carga incremental: corrige una fila de febrero y agrega otra
+    written = sink.write_dataframe(_long(['2025-02-10 10:00', '2025-02-11 10:00'], [5.0, 6.0]), 'energia', keys=keys)
+
+    assert written == [os.path.join('Plant=UP1', 'year=2025', 'month=2')]
+    assert os.stat(january).st_mtime_ns == before
+    result = pd.read_parquet(tmp_path / 'energia').sort_values('DateTime')
+    assert result['Value'].tolist() == [1.0, 5.0, 6.0]
+    assert not [f for f in os.listdir(january.parent) if f.endswith('.tmp')]
+
+
+def test_write_file_hides_temporary_from_readers(tmp_path, monkeypatch):
+    sink = ParquetSink(str(tmp_path))
+    df = _long(['2025-01-10 10:00'], [1.0])
+    sink.write_dataframe(df, 'energia', keys=['key_m', 'Plant', 'Metric'])
+    table_dir = tmp_path / 'energia'
+    to_parquet = pd.DataFrame.to_parquet
+    seen = []
+
+    def write_and_read(self, path, **kwargs):
+        to_parquet(self, path, **kwargs)
+        # Un lector concurrente mientras el temporal existe
+        seen.append((os.path.basename(path), len(pd.read_parquet(table_dir))))
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', write_and_read)
+    sink.write_dataframe(_long(['2025-01-11 10:00'], [2.0]), 'energia', keys=['key_m', 'Plant', 'Metric'])
+
+    name, rows = seen[0]
+    assert name.startswith('.part-0.parquet.')
+    assert rows == 1
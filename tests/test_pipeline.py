@@ -1,3 +1,5 @@
+import os
+import numpy as np
 import pandas as pd
 import pytest
 import importlib
@@ -33,6 +35,9 @@ class DummyCleaner:
     def remove_outliers(self, df, column, threshold=3.0):
         return df
 
+    def clean(self, df, **kwargs):
+        return df
+
 
 class DummyTransformer(pipeline_module.DataTransformer):
     def combine_pvsyst(self, dfs):
@@ -47,7 +52,7 @@ class DummyTransformer(pipeline_module.DataTransformer):
     def convert_units(self, df):
         return df
 
-    def merge_energy_meteo(self, energia, meteo):
+    def merge_energy_meteo(self, energia, meteo, **kwargs):
         return pd.merge(energia, meteo, on='DateTime')
 
     def melt_energy(self, df):
@@ -99,3 +104,419 @@ def test_pipeline_run(sample_files, monkeypatch):
     assert 'Metric' in pvsyst_long.columns
     assert pipeline.db.inserted['energia_consolidada'].equals(energia_long)
     assert pipeline.db.inserted['pvsyst_datos'].equals(pvsyst_long)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_load_stages_parallel(sample_files, executor, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    pipeline = ETLPipeline(sample_files, max_workers=2, executor=executor)
+    pipeline.run()
+
+    loaded = set(sample_files) - {'cms'}
+    assert loaded <= set(pipeline.data)
+    assert set(pipeline.load_timings) == loaded
+    assert pipeline.data['energia']['UP1_Act_MWh'].tolist() == [1000]
+
+
+def test_load_stages_chunked(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    pipeline = ETLPipeline(sample_files, max_workers=1, chunksize=1)
+    pipeline.run()
+
+    assert 'DateTime' in pipeline.data['energia'].columns
+    assert 'Date' not in pipeline.data['meteo'].columns
+
+
+def test_pipeline_incremental_run(sample_files, tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    state_path = str(tmp_path / "state" / "watermarks.json")
+
+    first = ETLPipeline(sample_files, incremental=True, state_path=state_path)
+    first.run()
+    assert len(first.db.inserted['energia_consolidada']) == 1
+
+    for name, column, value in [('energia', 'UP1_Act_MWh', 2000), ('meteo', 'Temp', 31)]:
+        df = pd.read_csv(sample_files[name])
+        df.loc[1] = ['2024-01-01', '00:05:00', value]
+        df.to_csv(sample_files[name], index=False)
+
+    second = ETLPipeline(sample_files, incremental=True, state_path=state_path)
+    second.run()
+    inserted = second.db.inserted['energia_consolidada']
+    assert inserted['Value'].tolist() == [2000]
+    assert second.watermarks.get('energia') == pd.Timestamp('2024-01-01 00:05:00')
+
+
+def test_pipeline_incremental_cleans_delta_with_history(sample_files, tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    state_path = str(tmp_path / "watermarks.json")
+
+    def write(times):
+        hours = times.hour + times.minute / 60
+        production = (1000 * np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)).round(1)
+        base = {'Date': times.strftime('%Y-%m-%d'), 'Time': times.strftime('%H:%M:%S')}
+        pd.DataFrame({**base, 'UP1_Act_MWh': production}).to_csv(sample_files['energia'], index=False)
+        pd.DataFrame({**base, 'Temp': 30}).to_csv(sample_files['meteo'], index=False)
+
+    write(pd.date_range('2024-01-01', '2024-01-02 05:00', freq='min'))
+    ETLPipeline(sample_files, incremental=True, state_path=state_path).run()
+
+    # Delta de madrugada: casi todo ceros y el amanecer al final
+    write(pd.date_range('2024-01-01', '2024-01-02 06:10', freq='min'))
+    pipeline = ETLPipeline(sample_files, incremental=True, state_path=state_path)
+    pipeline.run()
+
+    loaded = pipeline.db.inserted['energia_consolidada']
+    assert len(loaded) == 70
+    assert loaded['Value'].max() > 0
+    assert pipeline.watermarks.get('energia') == pd.Timestamp('2024-01-02 06:10')
+
+
+def test_pipeline_clean_leaves_merged_input_untouched(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    pd.DataFrame({'Date': '2024-01-01', 'Time': ['00:00:00', '00:01:00', '00:02:00'],
+                  'UP1_Exp_MWh': [-1000.0, None, 3000.0], 'UP1_Act_MWh': [1000, 2000, 3000]}) \
+        .to_csv(sample_files['energia'], index=False)
+    pd.DataFrame({'Date': '2024-01-01', 'Time': ['00:00:00', '00:01:00', '00:02:00'], 'Temp': 30}) \
+        .to_csv(sample_files['meteo'], index=False)
+
+    pipeline = ETLPipeline(sample_files, keep_hot=True)
+    pipeline.run()
+
+    merged = pipeline.data['energia_merged']
+    assert merged['UP1_Exp_MWh'].isna().sum() == 1
+    assert (merged['UP1_Exp_MWh'] < 0).sum() == 1
+    assert pipeline.runner.memory['merge_energy_meteo'][1]['energia_merged'] is merged
+
+
+def test_pipeline_incremental_replaces_pvsyst(sample_files, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'etl.db'}"
+    loader_cls = pipeline_module.DatabaseLoader
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: loader_cls(url))
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    state_path = str(tmp_path / "watermarks.json")
+
+    for _ in range(3):
+        pipeline = ETLPipeline(sample_files, incremental=True, state_path=state_path)
+        pipeline.run()
+
+    assert len(pd.read_sql_table('pvsyst_datos', pipeline.db.engine)) == 4
+
+
+def test_pipeline_upsert_is_idempotent(sample_files, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'etl.db'}"
+    loader_cls = pipeline_module.DatabaseLoader
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: loader_cls(url))
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    for _ in range(2):
+        pipeline = ETLPipeline(sample_files, load_mode="upsert")
+        pipeline.run()
+
+    result = pd.read_sql_table('energia_consolidada', pipeline.db.engine)
+    assert len(result) == 1
+    assert result.loc[0, 'key_m'] == '01_01_2024_00_00'
+
+
+def test_pipeline_deferred_calendar(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    pipeline = ETLPipeline(sample_files, calendar="deferred")
+    pipeline.run()
+
+    assert 'year' not in pipeline.data['energia_consolidada'].columns
+    assert pipeline.db.inserted['energia_consolidada']['year'].dtype == 'int16'
+
+
+def test_pipeline_compact_dtypes(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    pipeline = ETLPipeline(sample_files, compact=True)
+    pipeline.run()
+
+    # Tipos reducidos solo en memoria: DatabaseLoader los amplía al cargar
+    compacted = pipeline.data['energia_long']
+    assert compacted['Value'].dtype == 'int16'
+    assert compacted['Temp'].dtype == 'int8'
+
+
+def test_pipeline_duckdb_backend(sample_files, monkeypatch):
+    pytest.importorskip("duckdb")
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    pipeline = ETLPipeline(sample_files, backend="duckdb")
+    pipeline.run()
+
+    loaded = pipeline.db.inserted['energia_consolidada']
+    assert loaded['Value'].tolist() == [1.0]  # kWh -> MWh
+    assert loaded['Plant'].astype(str).tolist() == ['UP1']
+    assert loaded['key_m'].tolist() == ['01_01_2024_00_00']
+
+
+@pytest.mark.parametrize("option", [{"strict_cleaning": True}, {"shard_by_plant": True}, {"resample": "1min"}])
+def test_pipeline_duckdb_rejects_unsupported_options(sample_files, option):
+    with pytest.raises(ValueError, match=next(iter(option))):
+        ETLPipeline(sample_files, backend="duckdb", **option)
+
+
+def test_pipeline_parquet_sink(sample_files, tmp_path, monkeypatch):
+    def no_db():
+        raise AssertionError("sink='parquet' no debe conectarse a la base de datos")
+
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', no_db)
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    pipeline = ETLPipeline(sample_files, sink="parquet", parquet_dir=str(tmp_path / 'lake'),
+                           calendar="deferred")
+    pipeline.run()
+
+    assert (tmp_path / 'lake' / 'energia_consolidada' / 'Plant=UP1' / 'year=2024' / 'month=1').is_dir()
+    result = pd.read_parquet(tmp_path / 'lake' / 'energia_consolidada')
+    assert result['Value'].tolist() == [1000]
+
+
+def test_pipeline_checkpoint_resume(sample_files, tmp_path, monkeypatch):
+    class FailingDB(DummyDB):
+        def insert_dataframe(self, df, table_name, if_exists="append"):
+            raise ConnectionError("DB no disponible")
+
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    checkpoint_dir = str(tmp_path / "checkpoints")
+
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: FailingDB())
+    with pytest.raises(ConnectionError):
+        ETLPipeline(sample_files, checkpoint_dir=checkpoint_dir).run()
+
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    pipeline = ETLPipeline(sample_files, checkpoint_dir=checkpoint_dir)
+    pipeline.run()
+
+    assert pipeline.load_timings == {}
+    assert set(pipeline.db.inserted) == {'energia_consolidada', 'pvsyst_datos'}
+    assert pipeline.db.inserted['energia_consolidada']['Plant'].tolist() == ['UP1']
+
+
+def test_pipeline_records_stage_metrics(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    recorder = pipeline_module.MetricsRecorder()
+    pipeline = ETLPipeline(sample_files, metrics=recorder)
+    pipeline.run()
+    first_run = len(recorder.records)
+    pipeline.run()
+
+    stages = {r["name"] for r in recorder.records if r["kind"] == "stage"}
+    calls = {r["name"] for r in recorder.records if r["kind"] == "call"}
+    assert {"load_energia", "clean", "melt_energy", "load_energia_consolidada"} <= stages
+    assert {"transformer.standardize_datetime", "cleaner.clean"} <= calls
+    assert len(recorder.records) == first_run
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_pipeline_shard_by_plant(sample_files, tmp_path, executor, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    times = pd.date_range('2024-01-01', periods=20, freq='min')
+    energia = pd.DataFrame({
+        'Date': times.strftime('%Y-%m-%d'), 'Time': times.strftime('%H:%M:%S'),
+        'UP1_Act_MWh': [1000.0 + i for i in range(20)],
+        'UP2_Act_MWh': [2000.0 + i for i in range(19)] + [1e7],  # outlier solo en UP2
+    })
+    meteo = pd.DataFrame({'Date': energia['Date'], 'Time': energia['Time'], 'Temp': 30})
+    energia.to_csv(sample_files['energia'], index=False)
+    meteo.to_csv(sample_files['meteo'], index=False)
+
+    wide = ETLPipeline(sample_files)
+    wide.run()
+    metrics = pipeline_module.MetricsRecorder()
+    sharded = ETLPipeline(sample_files, shard_by_plant=True, executor=executor, max_workers=2, metrics=metrics)
+    sharded.run()
+
+    # En el pool de procesos las llamadas por planta no pasan por los proxies
+    plant_calls = [r for r in metrics.records if r["name"] == "cleaner.clean"]
+    assert len(plant_calls) == (0 if executor == "process" else 2)
+    assert "process_plants" in [r["name"] for r in metrics.records]
+
+    counts = sharded.db.inserted['energia_consolidada']['Plant'].value_counts()
+    assert counts.to_dict() == {'UP1': 20, 'UP2': 19}
+    assert wide.db.inserted['energia_consolidada']['Plant'].value_counts().to_dict() == {'UP1': 19, 'UP2': 19}
+    assert isinstance(sharded.data['energia_long']['Plant'].dtype, pd.CategoricalDtype)
+    assert sharded.data['energia_long']['Value'].iloc[0] == 1.0
+
+
+def test_pipeline_prunes_unused_columns_and_sources(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts',
+                        {'energia': {'UP1_Act_MWh': 'UP1_Act_MWh'}, 'meteo': {}, 'pvsyst': {}})
+    energia = pd.read_csv(sample_files['energia']).assign(Extra=5)
+    energia.to_csv(sample_files['energia'], index=False)
+
+    pipeline = ETLPipeline(sample_files)
+    pipeline.run()
+
+    assert 'Extra' not in pipeline.data['energia_consolidada'].columns
+    assert 'cms' not in pipeline.load_timings
+    assert pipeline.db.inserted['energia_consolidada']['Value'].tolist() == [1000]
+
+
+def test_pipeline_rollups_update_incrementally(sample_files, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'etl.db'}"
+    loader_cls = pipeline_module.DatabaseLoader
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: loader_cls(url))
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    state_path = str(tmp_path / "watermarks.json")
+    options = dict(incremental=True, state_path=state_path, rollups=True, load_mode="upsert")
+
+    with pytest.raises(ValueError):
+        ETLPipeline(sample_files, incremental=True, rollups=True)
+
+    ETLPipeline(sample_files, **options).run()
+    for name, value in [('energia', 2000), ('meteo', 31)]:
+        df = pd.read_csv(sample_files[name])
+        df.loc[1] = ['2024-01-01', '00:05:00', value]
+        df.to_csv(sample_files[name], index=False)
+    pipeline = ETLPipeline(sample_files, **options)
+    pipeline.run()
+
+    for table in ('energia_horaria', 'energia_diaria', 'energia_mensual'):
+        rollup = pd.read_sql_table(table, pipeline.db.engine)
+        assert rollup[['Sum', 'Count']].values.tolist() == [[3.0, 2]]
+        assert rollup[['Mean', 'Min', 'Max']].isna().all().all()
+
+
+def test_pipeline_rollups_survive_partial_load_failure(sample_files, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'etl.db'}"
+
+    class FlakyLoader(pipeline_module.DatabaseLoader):
+        failures = {'energia_diaria'}
+
+        def upsert_dataframe(self, df, table_name, keys, batch_size=None):
+            if table_name in self.failures:
+                self.failures.discard(table_name)
+                raise ConnectionError("DB no disponible")
+            return super().upsert_dataframe(df, table_name, keys, batch_size)
+
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: FlakyLoader(url))
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    state_path = str(tmp_path / "watermarks.json")
+
+    options = dict(incremental=True, state_path=state_path, rollups=True, load_mode="upsert")
+    with pytest.raises(ConnectionError):
+        ETLPipeline(sample_files, **options).run()
+    pipeline = ETLPipeline(sample_files, **options)
+    pipeline.run()
+
+    for table in ('energia_horaria', 'energia_diaria', 'energia_mensual'):
+        rollup = pd.read_sql_table(table, pipeline.db.engine)
+        assert rollup[['Sum', 'Count']].values.tolist() == [[1.0, 1]]
+
+
+def test_pipeline_resamples_onto_regular_grid(sample_files, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+    pd.DataFrame({'Date': '2024-01-01', 'Time': ['00:00:00', '00:02:00'], 'UP1_Act_MWh': [1000, 3000]}) \
+        .to_csv(sample_files['energia'], index=False)
+    pd.DataFrame({'Date': '2024-01-01', 'Time': ['00:00:00', '00:01:00', '00:02:00'], 'Temp': [30, 31, 32]}) \
+        .to_csv(sample_files['meteo'], index=False)
+
+    pipeline = ETLPipeline(sample_files, resample="1min", max_gap="2min")
+    pipeline.run()
+
+    loaded = pipeline.db.inserted['energia_consolidada']
+    assert loaded['Value'].tolist() == [1000, 2000, 3000]
+    assert not loaded['long_gap_energia'].any()
+
+
+def test_watcher_reruns_only_changed_sources(sample_files, monkeypatch):
+    from etl.watch import SourceWatcher
+
+    monkeypatch.setattr(pipeline_module, 'FileSource', lambda: DummyFileSource())
+    monkeypatch.setattr(pipeline_module, 'DatabaseLoader', lambda: DummyDB())
+    monkeypatch.setattr(pipeline_module, 'DataCleaner', DummyCleaner)
+    monkeypatch.setattr(pipeline_module, 'DataTransformer', DummyTransformer)
+    monkeypatch.setattr(pipeline_module, 'rename_dicts', {'energia': {}, 'meteo': {}, 'pvsyst': {}})
+
+    with pytest.raises(ValueError):
+        SourceWatcher(ETLPipeline(sample_files))
+
+    pipeline = ETLPipeline(sample_files, keep_hot=True)
+    watcher = SourceWatcher(pipeline, settle=0)
+    assert watcher.refresh() == list(sample_files)
+    assert watcher.refresh() == []
+
+    path = sample_files['meteo']
+    pd.DataFrame({'Date': ['2024-01-01'], 'Time': ['00:00:00'], 'Temp': [35]}).to_csv(path, index=False)
+    mtime = os.stat(path).st_mtime_ns + 10**9
+    os.utime(path, ns=(mtime, mtime))
+
+    assert watcher.refresh() == ['meteo']
+    assert {'load_energia', 'load_pvsyst_datos'} <= set(pipeline.runner.skipped)
+    assert pipeline.db.inserted['energia_consolidada']['Temp'].tolist() == [35]
+
+
+def test_watcher_backs_off_after_failures(sample_files, monkeypatch):
+    from types import SimpleNamespace
+    from etl import watch
+
+    runs = []
+
+    def run():
+        runs.append(now[0])
+        raise RuntimeError("fuente inválida")
+
+    now = [0.0]
+    monkeypatch.setattr(watch.time, 'monotonic', lambda: now[0])
+    pipeline = SimpleNamespace(file_paths=sample_files, stage_memory={}, run=run)
+    watcher = watch.SourceWatcher(pipeline, interval=1, settle=0, max_backoff=8)
+
+    for second in range(20):
+        now[0] = float(second)
+        watcher.refresh()
+    # Esperas de 2, 4, 8 y 8 s
+    assert runs == [0.0, 2.0, 6.0, 14.0]
+
+    path = sample_files['meteo']
+    mtime = os.stat(path).st_mtime_ns + 10**9
+    os.utime(path, ns=(mtime, mtime))
+    watcher.refresh()
+    assert runs[-1] == 19.0
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+from etl.stages import Stage, StageRunner
+
+
+def make_stages(calls, fail_load=False):
+    def source(inputs):
+        calls.append('source')
+        return {'raw': pd.DataFrame({'x': [1, 2, 3]})}
+
+    def double(inputs):
+        calls.append('double')
+        return {'doubled': inputs['raw'] * 2}
+
+    def load(inputs):
+        calls.append('load')
+        if fail_load:
+            raise RuntimeError("DB caída")
+        return {}
+
+    return [
+        Stage('load', load, inputs=('doubled',)),
+        Stage('double', double, inputs=('raw',), outputs=('doubled',)),
+        Stage('source', source, outputs=('raw',), params={'file': 'v1'}),
+    ]
+
+
+def test_runner_executes_in_dependency_order():
+    calls = []
+    data = StageRunner(make_stages(calls)).run()
+    assert calls == ['source', 'double', 'load']
+    assert data['doubled']['x'].tolist() == [2, 4, 6]
+
+
+def test_runner_resumes_at_failed_stage(tmp_path):
+    calls = []
+    with pytest.raises(RuntimeError):
+        StageRunner(make_stages(calls, fail_load=True), checkpoint_dir=str(tmp_path)).run()
+
+    calls.clear()
+    runner = StageRunner(make_stages(calls), checkpoint_dir=str(tmp_path))
+    runner.run()
+    assert calls == ['load']
+    assert runner.skipped == ['source', 'double']
+
+    calls.clear()
+    StageRunner(make_stages(calls), checkpoint_dir=str(tmp_path)).run()
+    assert calls == []
+
+
+def test_runner_removes_superseded_checkpoints(tmp_path):
+    StageRunner(make_stages([]), checkpoint_dir=str(tmp_path)).run()
+    stages = make_stages([])
+    stages[2].params['file'] = 'v2'
+    runner = StageRunner(stages, checkpoint_dir=str(tmp_path))
+    runner.run()
+
+    current = runner.fingerprints()
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"{name}-{current[name]}" for name in ('source', 'double', 'load')
+    )
+
+
+def test_runner_rejects_missing_inputs():
+    with pytest.raises(ValueError):
+        StageRunner([Stage('a', lambda inputs: {}, inputs=('nada',))])
+
+
+def test_runner_reuses_outputs_kept_in_memory():
+    calls, memory = [], {}
+    StageRunner(make_stages(calls), memory=memory).run()
+
+    calls.clear()
+    runner = StageRunner(make_stages(calls), memory=memory)
+    runner.run()
+    assert calls == []
+    assert runner.skipped == ['source', 'double', 'load']
+    assert memory['double'][1]['doubled']['x'].tolist() == [2, 4, 6]
+
+    calls.clear()
+    stages = make_stages(calls)
+    stages[2].params['file'] = 'v2'
+    StageRunner(stages, memory=memory).run()
+    assert calls == ['source', 'double', 'load']
@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from etl.transformer import standardize_datetime, expand_datetime
+from etl.transformer import DataTransformer, standardize_datetime, expand_datetime
 
 
 def test_standardize_datetime():
@@ -18,3 +18,156 @@ def test_expand_datetime():
     result = expand_datetime(df, 'DateTime', up_to='minute')
     for col in ['year', 'month', 'day', 'hour', 'minute']:
         assert col in result.columns
+
+
+def test_merge_energy_meteo_keeps_single_key_columns():
+    transformer = DataTransformer()
+    dt = pd.to_datetime(['2024-01-01 00:00', '2024-01-01 00:05'])
+    energia = transformer.calculate_keys(pd.DataFrame({'DateTime': dt, 'UP1_Act_MWh': [1.0, 2.0]}))
+    meteo = transformer.calculate_keys(pd.DataFrame({'DateTime': dt, 'UP1_Tamb_C': [25.0, 26.0]}))
+    result = transformer.merge_energy_meteo(energia, meteo)
+    assert 'key_m' in result.columns
+    assert not any(c.endswith(('_x', '_y')) for c in result.columns)
+
+
+def test_merge_energy_meteo_asof_tolerates_clock_drift():
+    transformer = DataTransformer()
+    energia = pd.DataFrame({
+        'DateTime': pd.to_datetime(['2024-01-01 00:00:00', '2024-01-01 00:01:00', '2024-01-01 00:02:00']),
+        'UP1_Act_MWh': [1.0, 2.0, 3.0],
+    })
+    meteo = pd.DataFrame({
+        'DateTime': pd.to_datetime(['2024-01-01 00:00:03', '2024-01-01 00:00:58']),
+        'UP1_Tamb_C': [25.0, 26.0],
+        'UP1_Humid_pct': [70.0, 71.0],
+    })
+    assert transformer.merge_energy_meteo(energia, meteo).empty
+
+    result = transformer.merge_energy_meteo(energia, meteo, how='asof', tolerance='5s', columns=['UP1_Tamb_C'])
+    assert list(result.columns) == ['DateTime', 'UP1_Act_MWh', 'UP1_Tamb_C']
+    assert result['UP1_Tamb_C'].tolist()[:2] == [25.0, 26.0]
+    assert pd.isna(result['UP1_Tamb_C'].iloc[2])
+    assert transformer.merge_stats['matched'] == 2
+
+
+@pytest.mark.parametrize("key_format", ["str", "category", "int"])
+def test_calculate_keys_formats(key_format):
+    df = pd.DataFrame({'DateTime': pd.to_datetime(['2024-01-05 09:07:00', '2023-12-31 23:59:00'])})
+    result = DataTransformer.calculate_keys(df, key_format=key_format)
+    if key_format == 'int':
+        assert result['key_m'].tolist() == [202401050907, 202312312359]
+        result = DataTransformer.render_keys(result)
+    assert result['key'].astype(str).tolist() == ['05_01_2024_09', '31_12_2023_23']
+    assert result['key_m'].astype(str).tolist() == ['05_01_2024_09_07', '31_12_2023_23_59']
+    assert result['key_month'].astype(str).tolist() == ['01_2024', '12_2023']
+
+
+def test_standardize_datetime_caches_time_format():
+    df = pd.DataFrame({
+        'Date': ['1/1/2025', '1/1/2025', '1/2/2025'],
+        'Time': ['12:05 AM', '1:10 PM', '12:05 AM'],
+    })
+    result = DataTransformer.standardize_datetime(df, source='meteo_test')
+    assert result['DateTime'].tolist() == list(pd.to_datetime(['2025-01-01 00:05', '2025-01-01 13:10', '2025-01-02 00:05']))
+    assert DataTransformer._time_formats[('meteo_test', 'Time')] == '%I:%M %p'
+
+
+def test_expand_datetime_compact_does_not_modify_input():
+    df = pd.DataFrame({'DateTime': pd.to_datetime(['2024-01-01 10:15:00'])})
+    result = expand_datetime(df, 'DateTime', up_to='minute', compact=True)
+    assert result['year'].dtype == 'int16'
+    assert result['minute'].dtype == 'int8'
+    assert list(df.columns) == ['DateTime']
+
+
+def test_melt_to_long_categorical_plant_metric():
+    df = pd.DataFrame({
+        'key_m': ['01_01_2024_00_00', '01_01_2024_00_05'],
+        'UP1_Act_MWh': [1.0, 2.0],
+        'UP2_Exp_MWh': [3.0, 4.0],
+    })
+    result = DataTransformer.melt_to_long(df, id_vars=['key_m'], value_vars=['UP1_Act_MWh', 'UP2_Exp_MWh'])
+    assert list(result.columns) == ['key_m', 'Value', 'Plant', 'Metric']
+    assert result['Value'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert result['Plant'].tolist() == ['UP1', 'UP1', 'UP2', 'UP2']
+    assert result['Metric'].tolist() == ['Act_MWh', 'Act_MWh', 'Exp_MWh', 'Exp_MWh']
+    assert isinstance(result['Plant'].dtype, pd.CategoricalDtype)
+    assert result['key_m'].astype(str).tolist() == df['key_m'].tolist() * 2
+
+
+def test_compact_dtypes():
+    df = pd.DataFrame({
+        'Value': [0.25, 1.5, None, 2.0],
+        'Big': [1e300, 1.0, 2.0, 3.0],
+        'year': [2024, 2024, 2025, 2025],
+        'Plant': ['UP1', 'UP1', 'UP2', 'UP2'],
+        'key_m': ['a', 'b', 'c', 'd'],
+    })
+    result = DataTransformer.compact_dtypes(df)
+    assert result['Value'].dtype == 'float32'
+    assert result['Big'].dtype == 'float64'  # no cabe en float32
+    assert result['year'].dtype == 'int16'
+    assert isinstance(result['Plant'].dtype, pd.CategoricalDtype)
+    assert not isinstance(result['key_m'].dtype, pd.CategoricalDtype)  # casi todo distinto
+    assert df['Value'].dtype == 'float64'
+    pd.testing.assert_frame_equal(result.astype(df.dtypes.to_dict()), df)
+
+
+def test_rollup_aggregates_energy_and_meteo():
+    times = pd.date_range('2024-01-01 00:30', periods=60, freq='min')
+    wide = pd.DataFrame({'DateTime': times, 'UP1_Act_MWh': 1.0, 'UP2_Act_MWh': 2.0, 'UP1_Tamb_C': range(60)})
+    long = DataTransformer().melt_energy(DataTransformer.calculate_keys(wide))
+
+    hourly = DataTransformer.rollup(long, 'h').set_index(['Plant', 'Metric', 'DateTime'])
+
+    first = hourly.loc[('UP1', 'Act_MWh', pd.Timestamp('2024-01-01 00:00'))]
+    assert first[['Sum', 'Count']].tolist() == [30, 30]
+    assert hourly.loc[('UP2', 'Act_MWh', pd.Timestamp('2024-01-01 01:00')), 'Sum'] == 60
+    tamb = hourly.loc[('UP1', 'Tamb_C', pd.Timestamp('2024-01-01 00:00'))]
+    assert tamb[['Mean', 'Min', 'Max', 'Count']].tolist() == [14.5, 0, 29, 30]
+
+    assert pd.isna(tamb['Sum']) and pd.isna(first['Mean'])  # sin agregados sin sentido
+
+    daily = DataTransformer.rollup(long, 'D')
+    tamb = daily[daily['Metric'] == 'Tamb_C'].iloc[0]
+    assert [tamb['Count'], tamb['Mean'], tamb['Max']] == [60, 29.5, 59]
+
+    keys = ['DateTime', 'Plant', 'Metric']
+    coarse = DataTransformer.coarsen_rollup(DataTransformer.rollup(long, 'h'), 'D')
+    pd.testing.assert_frame_equal(coarse.sort_values(keys, ignore_index=True),
+                                  daily.sort_values(keys, ignore_index=True))
+
+
+def test_resample_to_grid_interpolates_short_gaps_and_flags_long_ones():
+    df = pd.DataFrame({
+        'DateTime': pd.to_datetime(['2024-01-01 00:00:10', '2024-01-01 00:01:00', '2024-01-01 00:03:00',
+                                    '2024-01-01 00:10:00']),
+        'UP1_Irr_W_m2': [0.0, 60.0, 180.0, 600.0],
+    })
+
+    grid = DataTransformer.resample_to_grid(df, freq='1min', max_gap='3min')
+
+    assert len(grid) == 11
+    assert grid['DateTime'].iloc[0] == pd.Timestamp('2024-01-01 00:00')
+    assert grid['UP1_Irr_W_m2'].iloc[2] == 120.0
+    assert grid['UP1_Irr_W_m2'].iloc[4:10].isna().all()
+    assert grid['long_gap'].tolist() == [False] * 4 + [True] * 6 + [False]
+
+    unbounded = DataTransformer.resample_to_grid(df, freq='1min', max_gap=None)
+    assert unbounded['UP1_Irr_W_m2'].tolist() == [0.0, 60.0, 120.0, 180.0, 240.0, 300.0, 360.0, 420.0,
+                                                  480.0, 540.0, 600.0]
+    assert not unbounded['long_gap'].any()
+
+
+def test_derive_insolation_integrates_irradiance():
+    df = pd.DataFrame({
+        'DateTime': pd.date_range('2024-01-01', periods=3, freq='5min'),
+        'UP3_Irr_W_m2': [600.0, 600.0, 1200.0],
+        'UP1_Irr_W_m2': [0.0, 0.0, 0.0],
+        'UP1_Ins_kWh_m2': [0.5, None, 0.5],
+    })
+
+    result = DataTransformer.derive_insolation(df)
+
+    assert result['UP3_Ins_kWh_m2'].tolist() == pytest.approx([0.05, 0.05, 0.075])
+    assert result['UP1_Ins_kWh_m2'].tolist() == [0.5, 0.0, 0.5]